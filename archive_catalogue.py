@@ -0,0 +1,146 @@
+import os
+import json
+from datetime import datetime
+import pytz
+from atomic_file import atomic_write
+from product import Product
+
+LATEST_ARCHIVE_NAME = 'latest.zip'
+DELTA_ARCHIVE_SUFFIX = '.delta.zip'
+
+
+def archive_entry(archives_path, name):
+    """Catalogue entry of an archive file: name, size, timestamp and type
+
+    Timestamped archives carry their creation time in the name,
+    latest.zip is timestamped by its modification time.
+    """
+    path = os.path.join(archives_path, name)
+    archive_type = 'delta' if name.endswith(DELTA_ARCHIVE_SUFFIX) else 'full'
+    if name == LATEST_ARCHIVE_NAME:
+        latest_datetime = datetime.fromtimestamp(os.path.getmtime(path), tz=pytz.timezone('GMT'))
+        timestamp = latest_datetime.strftime(Product.TIMESTAMP_FORMAT)
+    else:
+        timestamp = name.removesuffix(DELTA_ARCHIVE_SUFFIX if archive_type == 'delta' else '.zip')
+    return {'name': name, 'size': os.path.getsize(path), 'timestamp': timestamp, 'type': archive_type}
+
+
+def is_archive_name(name):
+    return name == LATEST_ARCHIVE_NAME or (name[:1].isdigit() and name.endswith('.zip'))
+
+
+class ArchiveCatalogue:
+    """Name, size, timestamp and type of every archive of a category, kept in catalogue.json
+
+    Updated as archives are created, renamed and deleted,
+    so archive counts and sizes don't take a stat() of every archive.
+    Files added or removed behind its back (copied from another machine, deleted by hand)
+    are noticed by comparing names with one listing of the folder.
+    """
+
+    FILE_NAME = 'catalogue.json'
+    VERSION = 1
+
+    @property
+    def path(self):
+        return os.path.join(self.archives_path, self.FILE_NAME)
+
+    def load(self):
+        self.entries = {}
+        try:
+            with open(self.path, encoding='utf-8') as catalogue_file:
+                data = json.load(catalogue_file)
+            if data.get('version') == self.VERSION:
+                self.entries = {entry['name']: entry for entry in data['archives']}
+        except (OSError, ValueError):
+            pass
+        self.sync()
+
+    def sync(self):
+        """Catch up with archive files created or deleted without the catalogue"""
+        names = set(name for name in os.listdir(self.archives_path) if is_archive_name(name)) if os.path.isdir(self.archives_path) else set()
+        changed = False
+        for name in set(self.entries) - names:
+            del self.entries[name]
+            changed = True
+        for name in names - set(self.entries):
+            self.entries[name] = archive_entry(self.archives_path, name)
+            changed = True
+        # latest.zip keeps its name when rewritten
+        if LATEST_ARCHIVE_NAME in self.entries:
+            latest_entry = archive_entry(self.archives_path, LATEST_ARCHIVE_NAME)
+            changed = changed or latest_entry != self.entries[LATEST_ARCHIVE_NAME]
+            self.entries[LATEST_ARCHIVE_NAME] = latest_entry
+        if changed:
+            self.save()
+
+    def save(self):
+        if not os.path.isdir(self.archives_path):
+            return
+        archives = sorted(self.entries.values(), key=lambda entry: entry['name'])
+        with atomic_write(self.path, "w", encoding='utf-8') as catalogue_file:
+            json.dump({'version': self.VERSION, 'archives': archives}, catalogue_file, indent=2)
+
+    def archives(self):
+        """Entries with their path, sorted by creation time"""
+        self.sync()
+        archives = [{**entry, 'path': os.path.join(self.archives_path, entry['name'])} for entry in self.entries.values()]
+        return sorted(archives, key=lambda a: a['timestamp'])
+
+    def add(self, name):
+        self.entries[name] = archive_entry(self.archives_path, name)
+        self.save()
+
+    def rename(self, name, new_name):
+        self.entries.pop(name, None)
+        self.add(new_name)
+
+    def remove(self, name):
+        self.entries.pop(name, None)
+        self.save()
+
+    @property
+    def total_size(self):
+        return sum(entry['size'] for entry in self.entries.values())
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __init__(self, archives_path, log_tag):
+        self.archives_path = archives_path
+        self.log_tag = log_tag
+        self.entries = {}
+
+
+def retained_archives(chains, now, keep_daily=None, keep_weekly=None, keep_monthly=None):
+    """Names of archives a keep-daily/weekly/monthly retention policy keeps
+
+    `chains` are lists of archives, a full archive followed by its deltas, oldest first.
+    Every archive of the newest chain is kept. keep_daily keeps every archive created
+    in the last `keep_daily` days; keep_weekly and keep_monthly keep the newest full archive
+    of each of the last that many ISO weeks and calendar months that have one.
+    A kept delta keeps the archives before it in its chain, since restoring it needs them.
+    Without any keep_* setting every archive is kept.
+    """
+    if keep_daily is None and keep_weekly is None and keep_monthly is None:
+        return set(a['name'] for chain in chains for a in chain)
+
+    kept = set(a['name'] for a in chains[-1]) if len(chains) > 0 else set()
+    parse = lambda a: datetime.strptime(a['timestamp'], Product.TIMESTAMP_FORMAT).replace(tzinfo=pytz.timezone('GMT'))
+
+    if keep_daily is not None:
+        for chain in chains:
+            recent = [i for i, a in enumerate(chain) if (now - parse(a)).total_seconds() < keep_daily * 24 * 60 * 60]
+            if len(recent) > 0:
+                kept.update(a['name'] for a in chain[:recent[-1] + 1])
+
+    fulls = [chain[0] for chain in chains if chain[0]['type'] == 'full']
+    for keep, period in [(keep_weekly, lambda d: d.isocalendar()[:2]), (keep_monthly, lambda d: (d.year, d.month))]:
+        if keep is None:
+            continue
+        newest_by_period = {}
+        for full in fulls:
+            newest_by_period[period(parse(full))] = full['name']
+        for key in sorted(newest_by_period, reverse=True)[:keep]:
+            kept.add(newest_by_period[key])
+    return kept
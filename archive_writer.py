@@ -0,0 +1,148 @@
+import os
+import sys
+import time
+import zlib
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Zip archive writer compressing entries on worker threads.
+# zlib, bz2 and lzma release the GIL while compressing, so entries are compressed in parallel
+# and written in order as regular zip entries. deflate and bzip2 archives are readable by any unzip,
+# lzma ones by zipfile and 7-Zip, but not by Info-ZIP unzip 6.0 (`unzip -t` reports method 14 unsupported).
+
+# Compression methods, by --archive-codec name
+CODECS = {
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+# Larger files are compressed while streamed into the archive on the writing thread.
+# Files read ahead of the writer, with their compressed copies, are bounded by
+# workers * IN_FLIGHT_PER_WORKER * MAX_PARALLEL_FILE_BYTES * 2 in the worst case:
+# 128 MB per worker, so 256 MB with the default of 2 --archive-workers.
+# Snapshots are a few kilobytes, so typical use is far below it.
+MAX_PARALLEL_FILE_BYTES = 16 * 1024 * 1024
+IN_FLIGHT_PER_WORKER = 4
+
+# Entries compressed by workers are appended with zipfile internals, which aren't public API.
+# They are only used on Python versions tests/test_archive_writer.py was run with,
+# elsewhere ParallelZipWriter compresses every entry with ZipFile.write() on the writing thread.
+CHECKED_PYTHON_VERSIONS = [(3, 9), (3, 10), (3, 11), (3, 12), (3, 13)]
+
+
+def zipfile_internals_supported():
+    return (
+        sys.version_info[:2] in CHECKED_PYTHON_VERSIONS
+        and hasattr(zipfile, '_get_compressor')
+        and hasattr(zipfile.ZipFile, '_writecheck')
+        and hasattr(zipfile.ZipInfo, 'FileHeader')
+    )
+
+
+PARALLEL_SUPPORTED = zipfile_internals_supported()
+
+
+def compress(contents, compress_type, compresslevel):
+    """Contents compressed the way zipfile stores an entry of compress_type"""
+    # zipfile's own compressor objects, so entries match what ZipFile.write() produces
+    compressor = zipfile._get_compressor(compress_type, compresslevel)
+    return compressor.compress(contents) + compressor.flush()
+
+
+def append_compressed(archive, zinfo, compressed):
+    """Append an entry compressed elsewhere to a ZipFile open for writing, the way ZipFile.write() would
+
+    zinfo must have CRC, file_size, compress_size and compress_type set.
+    """
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+    if zinfo.compress_type == zipfile.ZIP_LZMA:
+        # end of stream marker, as zipfile sets it, a named constant since 3.11
+        zinfo.flag_bits |= getattr(zipfile, '_MASK_COMPRESS_OPTION_1', 0x02)
+    archive.fp.seek(archive.start_dir)
+    zinfo.header_offset = archive.fp.tell()
+    archive._writecheck(zinfo)
+    archive.fp.write(zinfo.FileHeader(zip64))
+    archive.fp.write(compressed)
+    # Registered like ZipFile._open_to_write() does, so close() writes the central directory
+    archive.filelist.append(zinfo)
+    archive.NameToInfo[zinfo.filename] = zinfo
+    archive.start_dir = archive.fp.tell()
+    archive._didModify = True
+
+
+class ParallelZipWriter:
+    """Write files into a new zip archive, compressing them on `workers` threads
+
+    Use as a context manager, entries are written in the order they are added.
+    Counts input and output bytes and compression time for throughput reports.
+    """
+
+    def add_file(self, file_path, arcname):
+        if not PARALLEL_SUPPORTED or self.workers <= 1 or os.path.getsize(file_path) > MAX_PARALLEL_FILE_BYTES:
+            self.write_pending()
+            started_at = time.perf_counter()
+            self.zipfile.write(file_path, arcname)
+            self.compress_seconds += time.perf_counter() - started_at
+            self.input_bytes += self.zipfile.getinfo(arcname).file_size
+            return
+
+        zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+        zinfo.compress_type = self.compress_type
+        self.pending.append((zinfo, self.executor.submit(self.compress_file, file_path)))
+        # Don't read files far ahead of the writer
+        while len(self.pending) >= self.workers * IN_FLIGHT_PER_WORKER:
+            self.write_entry(*self.pending.popleft())
+
+    def writestr(self, arcname, data):
+        self.write_pending()
+        self.zipfile.writestr(arcname, data)
+
+    def compress_file(self, file_path):
+        """Runs on a worker thread: CRC, size and compressed contents of a file"""
+        started_at = time.perf_counter()
+        with open(file_path, 'rb') as source_file:
+            contents = source_file.read()
+        compressed = compress(contents, self.compress_type, self.compresslevel)
+        return zlib.crc32(contents), len(contents), compressed, time.perf_counter() - started_at
+
+    def write_entry(self, zinfo, future):
+        """Append an entry compressed by a worker"""
+        crc, file_size, compressed, seconds = future.result()
+        zinfo.CRC = crc
+        zinfo.file_size = file_size
+        zinfo.compress_size = len(compressed)
+        self.compress_seconds += seconds
+        self.input_bytes += file_size
+        append_compressed(self.zipfile, zinfo, compressed)
+
+    def write_pending(self):
+        while len(self.pending) > 0:
+            self.write_entry(*self.pending.popleft())
+
+    @property
+    def output_bytes(self):
+        return os.path.getsize(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.write_pending()
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.zipfile.close()
+
+    def __init__(self, path, codec='deflate', compresslevel=None, workers=1):
+        self.path = path
+        self.compress_type = CODECS[codec]
+        self.compresslevel = compresslevel
+        self.workers = workers
+        self.zipfile = zipfile.ZipFile(path, 'w', self.compress_type, compresslevel=compresslevel)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='ParallelZipWriter')
+        self.pending = deque()
+        self.input_bytes = 0
+        self.compress_seconds = 0
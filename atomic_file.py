@@ -0,0 +1,37 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Read once, os.umask() can only be read by setting it and threads may create files meanwhile
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def published_mode(path):
+    """Mode a file replacing `path` should have: that of `path`, or what open() would create"""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~UMASK
+
+
+@contextmanager
+def atomic_write(path, mode="w", encoding=None):
+    """Write to a temporary file next to `path` and move it in place when done
+
+    Readers and a crashed run never see a half-written file:
+    `path` holds either the previous contents or the new ones.
+    The file keeps the mode of the file it replaces, mkstemp() creates it readable by the owner only
+    while the web server reads published files as another user.
+    """
+    directory = os.path.dirname(path) or "."
+    # https://docs.python.org/3/library/os.html#os.replace
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-", suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as temp_file:
+            yield temp_file
+        os.chmod(temp_path, published_mode(path))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
@@ -29,6 +29,14 @@ function buildFilterShareUrl(currentUrl, categoryName, headerFilters) {
     return url.toString();
 }
 
+// numbers parsed by download-products.py from string fields
+var numericFields = {
+    "ram": "ram_gb",
+    "storage": "storage_gb",
+    "size": "size_in",
+    "refresh_rate": "refresh_hz",
+};
+
 function numericColumn(title, field) {
     var isCapacityCol = ["ram", "storage"].includes(field);
     return {
@@ -38,6 +46,7 @@ function numericColumn(title, field) {
         headerFilterFunc: numericTextFilterFunc,
         headerFilterFuncParams: {
             parseCapacity: isCapacityCol,
+            numericField: numericFields[field],
         },
         headerTooltip: "Try >, >=, <, <=, =" + (isCapacityCol ? "; expects GB" : "")
     };
@@ -63,6 +72,7 @@ function normalizeCapacityToGb(value, unit) {
     return numberValue / 1024;
 }
 
+// keep in sync with numeric_fields.py
 function parseCapacityValue(value) {
     var rawValue = String(value);
     var capacityRegex = /([+-]?\d+(?:[.,]\d+)?)\s*(gb|gб|tb|mb|гб|тб|tб|tr|[gt](?=\s|$|[^a-zа-яё]))/gi;
@@ -143,7 +153,10 @@ function numericTextFilterFunc(headerValue, rowValue, rowData, filterParams) {
         return Tabulator.moduleBindings.filter.filters.like(headerValue, rowValue, rowData, filterParams);
     }
 
-    var numericRowValue = parseNumericRowValue(rowValue, filterParams);
+    // inventories dumped before numeric fields were added still get parsed here
+    var numericRowValue = rowData && filterParams.numericField && filterParams.numericField in rowData
+        ? rowData[filterParams.numericField]
+        : parseNumericRowValue(rowValue, filterParams);
 
     if (numericRowValue === null || Number.isNaN(numericRowValue)) {
         return false;
@@ -152,34 +165,106 @@ function numericTextFilterFunc(headerValue, rowValue, rowData, filterParams) {
     return Tabulator.moduleBindings.filter.filters[expression.operator](expression.value, numericRowValue, rowData, filterParams);
 }
 
+// facets.json written by download-products.py next to normalized.json, see facets.py:
+// distinct values with product ids and numeric ranges, so filters don't scan every row
+var categoryFacets = Promise.resolve(null);
+var currentFacets = null;
+
+function indexFacets(facets) {
+    // value → facet entry, sets of product ids are built on first use
+    facets.entriesByField = {};
+    for (const [field, entries] of Object.entries(facets.values)) {
+        facets.entriesByField[field] = new Map(entries.map(entry => [String(entry.value), entry]));
+    }
+    return facets;
+}
+
+function loadFacets(categoryName) {
+    var facetsPromise = fetch(`inventory/${categoryName}/facets.json`)
+        .then(response => response.ok ? response.json() : null)
+        .then(facets => facets && indexFacets(facets))
+        .catch(() => null);
+    currentFacets = null;
+    categoryFacets = facetsPromise;
+    facetsPromise.then(function(facets) {
+        // unless another category was opened meanwhile
+        if (categoryFacets === facetsPromise) {
+            currentFacets = facets;
+        }
+    });
+    return facetsPromise;
+}
+
+function facetFilterFunc(headerValue, rowValue, rowData, filterParams) {
+    var entries = currentFacets && currentFacets.entriesByField[filterParams.field];
+    var entry = entries && entries.get(String(headerValue));
+
+    // a value picked from the list, other input is matched as substring like before
+    if (entry && rowData) {
+        if (!entry.idSet) {
+            entry.idSet = new Set(entry.ids);
+        }
+        return entry.idSet.has(rowData.id);
+    }
+
+    return Tabulator.moduleBindings.filter.filters.like(headerValue, rowValue, rowData, filterParams);
+}
+
+function facetColumn(title, field) {
+    return {
+        title: title,
+        field: field,
+        headerFilter: "list",
+        headerFilterParams: {
+            valuesLookup: function() {
+                return categoryFacets.then(function(facets) {
+                    if (facets && facets.values[field]) {
+                        return facets.values[field].map(entry => ({label: `${entry.value} (${entry.count})`, value: String(entry.value)}));
+                    }
+                    // inventories dumped before facets.json was added
+                    var values = table.getData().map(row => row[field]).filter(value => value !== undefined && value !== null && value !== "");
+                    return Array.from(new Set(values)).sort();
+                });
+            },
+            autocomplete: true,
+            freetext: true,
+            allowEmpty: true,
+            listOnEmpty: true,
+            clearable: true,
+        },
+        headerFilterFunc: facetFilterFunc,
+        headerFilterFuncParams: {field: field},
+    };
+}
+
 var categories = [
     {
         "name": "laptops",
         "columns": [
-            {title: "CPU", field: "cpu", headerFilter: true},
+            facetColumn("CPU", "cpu"),
             numericColumn("RAM", "ram"),
             numericColumn("Storage", "storage"),
-            {title: "GPU", field: "gpu", headerFilter: true}
+            facetColumn("GPU", "gpu")
         ]
     },
     {
         "name": "desktops",
         "columns": [
-            {title: "CPU", field: "cpu", headerFilter: true},
+            facetColumn("CPU", "cpu"),
             numericColumn("RAM", "ram"),
             numericColumn("Storage", "storage"),
-            {title: "GPU", field: "gpu", headerFilter: true},
-            {title: "OS", field: "os", headerFilter: true},
-            {title: "Motherboard", field: "motherboard", headerFilter: true}
+            facetColumn("GPU", "gpu"),
+            facetColumn("OS", "os"),
+            facetColumn("Motherboard", "motherboard")
         ]
     },
     {
         "name": "monitors",
         "columns": [
-            {title: "Resolution", field: "resolution", headerFilter: true},
+            facetColumn("Resolution", "resolution"),
             numericColumn("Size", "size"),
             numericColumn("Refresh rate", "refresh_rate"),
-            {title: "Panel", field: "panel", headerFilter: true}
+            facetColumn("Panel", "panel")
         ]
     }
 ];
@@ -236,6 +321,14 @@ function loadInventory(categoryName) {
         container.appendChild(document.createElement("br"));
         container.appendChild(end);
 
+        categoryFacets.then(function(facets) {
+            var range = facets && facets.ranges[cell.getField()];
+            if (range) {
+                start.setAttribute("placeholder", `Min ${range.min}`);
+                end.setAttribute("placeholder", `Max ${range.max}`);
+            }
+        });
+
         return container;
     }
 
@@ -295,6 +388,7 @@ function loadInventory(categoryName) {
         categoryName = categoryNames[0];
     }
     var categoryColumns = categories.find(category => category.name == categoryName).columns;
+    loadFacets(categoryName);
 
     var banknoteInventoryURL = `inventory/${categoryName}/normalized.json`;
 
@@ -381,6 +475,13 @@ function loadInventory(categoryName) {
             oldestEntryTimestamp.add(initialScrapeDurationEstimate)
             timestampTrustThreshold = oldestEntryTimestamp
 
+            // product ids of facets written for another index don't match these rows
+            categoryFacets.then(function(facets) {
+                if (facets && facets.index_file_modification_timestamp !== response['index_file_modification_timestamp']) {
+                    currentFacets = null;
+                }
+            });
+
             return response['inventory'];
         },
         columns: [
@@ -454,8 +555,8 @@ function loadInventory(categoryName) {
             ]
         .concat(categoryColumns)
         .concat([
-            {title:"Defect", field:"defect", headerFilter: true},
-            {title:"City", field:"city", headerFilter: true},
+            facetColumn("Defect", "defect"),
+            facetColumn("City", "city"),
             {title:"Address", field:"local_address", headerFilter: true},
             {title:"URL", field:"url", headerFilter: true, formatter: "link"},
         ]),
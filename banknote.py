@@ -1,4 +1,4 @@
-import itertools
+import json
 import math
 import os
 import glob
@@ -8,6 +8,18 @@ import time
 import zipfile
 import shutil
 from product import Product
+from storage import BACKENDS as STORAGE_BACKENDS, FolderStorage
+from price_history import PriceHistory
+from run_stats import RunStats
+import compact_inventory
+from atomic_file import atomic_write
+from checkpoint import Checkpoint
+from fetch_schedule import FetchSchedule
+import snapshot_loader
+from archive_writer import ParallelZipWriter
+from facets import FacetBuilder
+from change_feed import ChangeFeed
+from archive_catalogue import ArchiveCatalogue, LATEST_ARCHIVE_NAME, DELTA_ARCHIVE_SUFFIX, retained_archives
 
 
 class Banknote:
@@ -29,10 +41,124 @@ class Banknote:
     def normalized_file_path(self):
         return os.path.join(self.path, self.normalized_file_name)
 
+    @property
+    def compact_normalized_file_name(self):
+        return 'normalized.compact.json'
+
+    @property
+    def compact_normalized_file_path(self):
+        return os.path.join(self.path, self.compact_normalized_file_name)
+
+    @property
+    def facets_file_path(self):
+        """Filter values, ranges and product ids of normalized.json for the frontend, see facets.py"""
+        return os.path.join(self.path, 'facets.json')
+
+    def dump_normalized_inventory(self, index_file_modification_timestamp, items, removal_reasons=None):
+        """Write normalized.json, its compact columnar variant, facets.json and precompressed siblings of them
+
+        `items` may be a generator, normalized products are written as they come
+        with the same layout json.dump(..., indent=2) produces, so they don't have to be held in a list.
+        Differences from the previous dump are appended to the change feed,
+        `removal_reasons` tells why products were removed from the index, see change_feed.py.
+        Returns amount of products written.
+        """
+        print(f"{self.log_tag} Dumping products to {self.normalized_file_path}")
+        columnar = compact_inventory.ColumnarBuilder()
+        facets = FacetBuilder()
+        self.change_feed.load()
+        with atomic_write(self.normalized_file_path, "w", encoding='utf-8') as normalized_file:
+            normalized_file.write(f'{{\n  "index_file_modification_timestamp": {json.dumps(index_file_modification_timestamp)},\n  "inventory": [')
+            for item in items:
+                separator = ",\n    " if columnar.count > 0 else "\n    "
+                normalized_file.write(separator + json.dumps(item, indent=2).replace("\n", "\n    "))
+                columnar.add(item)
+                facets.add(item)
+                self.change_feed.observe(item)
+            normalized_file.write("\n  ]\n}" if columnar.count > 0 else "]\n}")
+        print(f"{self.log_tag} Dumped {columnar.count} products")
+
+        with atomic_write(self.compact_normalized_file_path, "wb") as compact_file:
+            compact_file.write(compact_inventory.dumps_columnar(columnar.to_columnar(index_file_modification_timestamp)))
+
+        with atomic_write(self.facets_file_path, "w", encoding='utf-8') as facets_file:
+            json.dump(facets.to_facets(index_file_modification_timestamp), facets_file, ensure_ascii=False, separators=(',', ':'))
+
+        events = self.change_feed.finish(index_file_modification_timestamp, removal_reasons)
+        self.stats.count('change_events', len(events))
+        self.change_feed.compact()
+
+        for file_path in [self.normalized_file_path, self.compact_normalized_file_path, self.facets_file_path, self.change_feed.delta_path]:
+            self.stats.count('normalized_bytes', os.path.getsize(file_path))
+            written = compact_inventory.write_precompressed(file_path)
+            print(f"{self.log_tag} Precompressed {os.path.basename(file_path)}: {', '.join(written)}")
+        return columnar.count
+
+    @property
+    def index_state_file_path(self):
+        """ETag, Last-Modified and crawl counters of the previous index download"""
+        return os.path.join(self.path, 'index_state.json')
+
+    @property
+    def index_diff_file_path(self):
+        """Ids added, removed and repriced by the latest index download"""
+        return os.path.join(self.path, 'index_diff.json')
+
+    def load_cached_index(self):
+        """Previously downloaded index or None if there's no usable one"""
+        try:
+            with open(self.index_file_path, encoding='utf-8') as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError):
+            return None
+
+    def load_index_state(self):
+        try:
+            with open(self.index_state_file_path, encoding='utf-8') as index_state_file:
+                return json.load(index_state_file)
+        except (OSError, ValueError):
+            return {'etag': None, 'last_modified': None, 'total': None, 'runs_since_full_crawl': 0}
+
+    def save_index_state(self, index_state):
+        with atomic_write(self.index_state_file_path, "w", encoding='utf-8') as index_state_file:
+            json.dump(index_state, index_state_file, indent=2)
+
+    @staticmethod
+    def diff_index(old_index, new_index):
+        """Compare two index downloads by product id"""
+        old_items = {item['id']: item for item in old_index}
+        new_items = {item['id']: item for item in new_index}
+        return {
+            'added': [id for id in new_items if id not in old_items],
+            'removed': [id for id in old_items if id not in new_items],
+            'repriced': [
+                {'id': id, 'old_price': old_items[id]['price'], 'new_price': item['price']}
+                for id, item in new_items.items() if id in old_items and old_items[id]['price'] != item['price']
+            ],
+        }
+
+    def write_index_diff(self, old_index, new_index):
+        index_diff = {
+            'timestamp': datetime.now(tz=pytz.timezone('GMT')).strftime(Product.TIMESTAMP_FORMAT),
+            **self.diff_index(old_index, new_index),
+        }
+        print(f"{self.log_tag} Index diff: {len(index_diff['added'])} added, {len(index_diff['removed'])} removed, {len(index_diff['repriced'])} repriced")
+        with atomic_write(self.index_diff_file_path, "w", encoding='utf-8') as index_diff_file:
+            json.dump(index_diff, index_diff_file, indent=2)
+        return index_diff
+
     @property
     def archives_path(self):
         return os.path.join(self.path, 'archives')
 
+    @property
+    def archive_catalogue(self):
+        """Names, sizes and timestamps of archives, loaded on first use, see archive_catalogue.py"""
+        if self._archive_catalogue is None:
+            self._archive_catalogue = ArchiveCatalogue(self.archives_path, self.log_tag)
+            self._archive_catalogue.load()
+        return self._archive_catalogue
+
     @property
     def archive_count(self):
         """The amount of archive files in archives_path
@@ -41,42 +167,182 @@ class Banknote:
         e.g. "archives/2024-03-26_09-35-21.zip",
         and "archives/latest.zip"
         """
-        return len(list(glob.glob(os.path.join(self.archives_path, "[0-9l]*.zip"))))
+        return len(self.archive_catalogue)
 
     @property
     def product_root(self):
         return os.path.join(self.path, Product.FOLDER_NAME)
 
+    @property
+    def storage(self):
+        """Storage of product snapshots and last_seen values, loaded on first use"""
+        if self._storage is None:
+            self._storage = STORAGE_BACKENDS[self.storage_backend](self.path, self.log_tag)
+            self._storage.load()
+        return self._storage
+
+    def update_price_history(self):
+        """Add snapshots written since the previous run to price_history.json"""
+        price_history = PriceHistory(self.path, self.log_tag)
+        price_history.load()
+        snapshots_read = price_history.update(self.storage)
+        price_history.save()
+        print(f"{self.log_tag} Price history of {len(price_history.products)} products updated from {snapshots_read} new snapshots")
+
+    def product_details(self, properties, item_datetime):
+        """snapshot_loader.product_details of freshly downloaded properties
+
+        Full properties are dropped as soon as they are reduced to this.
+        """
+        with self.stats.timer('normalize'):
+            return snapshot_loader.product_details(self.category_name, properties, item_datetime.isoformat())
+
+    def load_latest_details(self, products, workers=1):
+        """product_details of latest snapshots of products as a dict by id
+
+        Snapshots are read from storage only when they changed since the previous run,
+        in a batch over `workers` processes, see snapshot_loader.py.
+        """
+        details = {}
+        entries = []
+        timestamps = {}
+        for product in products:
+            timestamp = product.latest_timestamp
+            cached = self.latest_details.get(product.id)
+            if cached is not None and cached[0] == timestamp:
+                details[product.id] = cached[1]
+            else:
+                timestamps[product.id] = timestamp
+                entries.append((product.id, self.storage.snapshot_source(product.id, timestamp), product.latest_file_datetime.isoformat()))
+
+        with self.stats.timer('load_snapshots'):
+            loaded = snapshot_loader.load_details_many(self.category_name, entries, workers)
+        self.stats.count('snapshots_loaded', len(loaded))
+        for id, product_details in loaded.items():
+            self.latest_details[id] = (timestamps[id], product_details)
+        details.update(loaded)
+        return details
+
+    def retain_latest_details(self, ids):
+        """Forget latest details of products no longer in the index"""
+        ids = set(ids)
+        self.latest_details = {id: cached for id, cached in self.latest_details.items() if id in ids}
+
+    def product(self, id):
+        return Product(self.category_name, id, self.storage)
+
     @property
     def product_cache_count(self):
         """Count product cache folders downloaded"""
-        return len(list(glob.glob(os.path.join(self.product_root, "[0-9]*"))))
+        return len(self.storage)
+
+    LATEST_ARCHIVE_NAME = LATEST_ARCHIVE_NAME
+    DELTA_ARCHIVE_SUFFIX = DELTA_ARCHIVE_SUFFIX
+    ARCHIVE_MANIFEST_NAME = 'archive_manifest.json'
+
+    # A full archive starts a new chain this often,
+    # daily archives in between only hold what changed since the previous one
+    FULL_ARCHIVE_INTERVAL_DAYS = 7
+
+    def archives(self):
+        """Archives sorted by creation time
+
+        Full archives are "latest.zip" and timestamped "<DATE AND TIME>.zip",
+        incremental ones are "<DATE AND TIME>.delta.zip".
+        Returns list of dicts with name, path, size, timestamp and type.
+        """
+        return self.archive_catalogue.archives()
+
+    def archive_chains(self):
+        """Group archives into chains of a full archive followed by its deltas
+
+        Deltas older than any full archive form a chain with no base.
+        """
+        chains = []
+        for archive in self.archives():
+            if archive['type'] == 'full' or len(chains) == 0:
+                chains.append([])
+            chains[-1].append(archive)
+        return chains
+
+    def archive_chain(self, until=None):
+        """Archives needed to rebuild inventory as of `until` timestamp, default is newest"""
+        for chain in reversed(self.archive_chains()):
+            if until is None or chain[0]['timestamp'] <= until:
+                if chain[0]['type'] != 'full':
+                    raise ValueError(f"Archive {chain[0]['name']} has no full archive to start from")
+                return [a for a in chain if until is None or a['timestamp'] <= until]
+        raise ValueError(f"No archive found as of {until}")
+
+    def archive_view(self, archive_path):
+        """Relative paths of every file in the point-in-time view stored by archive
+
+        Archives created before incremental archiving have no manifest,
+        they are full by definition.
+        """
+        with zipfile.ZipFile(archive_path) as archive_zipfile:
+            names = archive_zipfile.namelist()
+            if self.ARCHIVE_MANIFEST_NAME not in names:
+                return names
+            return json.loads(archive_zipfile.read(self.ARCHIVE_MANIFEST_NAME))['files']
+
+    def inventory_files(self):
+        """Relative paths of every file that makes a point-in-time view of inventory"""
+        files = [name for name in [self.index_file_name, self.normalized_file_name] if os.path.isfile(os.path.join(self.path, name))]
+        return files + self.storage.archive_files()
+
+    @staticmethod
+    def is_immutable_file(relative_path):
+        """Product snapshots are never rewritten once created, everything else may change"""
+        return relative_path.startswith(Product.FOLDER_NAME + os.sep) and relative_path.endswith('.json')
 
     def archive_inventory(self):
-        """Create new zip archive with contents of inventory"""
+        """Create new zip archive with contents of inventory
+
+        A full archive is created when the newest one is older than FULL_ARCHIVE_INTERVAL_DAYS
+        or the storage doesn't support delta archives, otherwise a delta archive holds snapshots added since the previous archive
+        and files that change in place.
+        Every archive lists the full point-in-time view in ARCHIVE_MANIFEST_NAME.
+        """
 
         # Don't create new archives too often
         SKIP_ARCHIVING_IF_LATEST_AGE_HOURS_LESS_THAN = 22
 
         current_timestamp = time.time()
 
-        latest_zipfile_name = 'latest.zip'
-        latest_zipfile_path = os.path.join(self.archives_path, latest_zipfile_name)
+        latest_zipfile_path = os.path.join(self.archives_path, self.LATEST_ARCHIVE_NAME)
         latest_zipfile_timestamp = os.path.getmtime(latest_zipfile_path) if os.path.isfile(latest_zipfile_path) else 0
 
-        if latest_zipfile_timestamp == 0:
+        archives = self.archives()
+        newest_archive = archives[-1] if len(archives) > 0 else None
+
+        if newest_archive is None:
             print(f"{self.log_tag} No existing archive found, creating new one")
         else:
-            latest_zipfile_datetime = datetime.fromtimestamp(latest_zipfile_timestamp, tz=pytz.timezone('GMT'))
-            latest_zipfile_age_seconds = current_timestamp - latest_zipfile_timestamp
-            latest_zipfile_age_hours = math.floor(latest_zipfile_age_seconds / 60 / 60)
-            print(f"{self.log_tag} Latest archive file is {latest_zipfile_age_hours} hours old")
+            newest_archive_timestamp = os.path.getmtime(newest_archive['path'])
+            newest_archive_age_seconds = current_timestamp - newest_archive_timestamp
+            newest_archive_age_hours = math.floor(newest_archive_age_seconds / 60 / 60)
+            print(f"{self.log_tag} Newest archive file {newest_archive['name']} is {newest_archive_age_hours} hours old")
 
-            if latest_zipfile_age_hours < SKIP_ARCHIVING_IF_LATEST_AGE_HOURS_LESS_THAN:
+            if newest_archive_age_hours < SKIP_ARCHIVING_IF_LATEST_AGE_HOURS_LESS_THAN:
                 print(f"{self.log_tag} Skipping archiving operation")
                 return
 
-        print(f"{self.log_tag} Creating new archive")
+        latest_zipfile_age_days = (current_timestamp - latest_zipfile_timestamp) / 60 / 60 / 24
+        create_full_archive = (
+            latest_zipfile_timestamp == 0
+            or latest_zipfile_age_days >= self.FULL_ARCHIVE_INTERVAL_DAYS
+            or not self.storage.DELTA_ARCHIVES
+        )
+
+        inventory_files = self.inventory_files()
+        if create_full_archive:
+            print(f"{self.log_tag} Creating new full archive")
+            archived_files = inventory_files
+        else:
+            previous_view = set(self.archive_view(newest_archive['path']))
+            archived_files = [f for f in inventory_files if f not in previous_view or not self.is_immutable_file(f)]
+            print(f"{self.log_tag} Creating new delta archive of {len(archived_files)} out of {len(inventory_files)} files")
 
         new_zipfile_name = 'new.zip'
         new_zipfile_path = os.path.join(self.archives_path, new_zipfile_name)
@@ -86,26 +352,64 @@ class Banknote:
             print(f"{self.log_tag} Found questionable {new_zipfile_path}, deleting")
             os.remove(new_zipfile_path)
 
+        created_timestamp = datetime.now(tz=pytz.timezone('GMT')).strftime(Product.TIMESTAMP_FORMAT)
+        archive_manifest = {
+            'type': 'full' if create_full_archive else 'delta',
+            'created': created_timestamp,
+            'previous': None if create_full_archive else newest_archive['name'],
+            'files': inventory_files,
+        }
+
         # Create new zipfile
-        with zipfile.ZipFile(new_zipfile_path, 'w', zipfile.ZIP_DEFLATED) as new_zipfile:
-            new_zipfile.write(self.index_file_path, self.index_file_name)
-            new_zipfile.write(self.normalized_file_path, self.normalized_file_name)
-            product_paths = list(glob.glob(os.path.join(self.product_root, "[0-9]*")))
-            for product_path in product_paths:
-                product_file_paths = itertools.chain(glob.iglob(os.path.join(product_path, '*.json')), glob.iglob(os.path.join(product_path, Product.LAST_SEEN_FILE_NAME)))
-                for product_file_path in product_file_paths:
-                    new_zipfile.write(product_file_path, os.path.relpath(product_file_path, self.path))
+        started_at = time.perf_counter()
+        with ParallelZipWriter(new_zipfile_path, self.archive_codec, self.archive_level, self.archive_workers) as new_zipfile:
+            for relative_path in archived_files:
+                new_zipfile.add_file(os.path.join(self.path, relative_path), relative_path)
+            new_zipfile.writestr(self.ARCHIVE_MANIFEST_NAME, json.dumps(archive_manifest))
+        archive_seconds = time.perf_counter() - started_at
+        print(f"{self.log_tag} Compressed {new_zipfile.input_bytes / 1024 / 1024:.1f} MB to {new_zipfile.output_bytes / 1024 / 1024:.1f} MB "
+              f"with {self.archive_codec} on {self.archive_workers} threads, {new_zipfile.input_bytes / 1024 / 1024 / max(archive_seconds, 0.001):.1f} MB/s")
+        self.stats.count('archived_files', len(archived_files))
+        self.stats.count('archive_input_bytes', new_zipfile.input_bytes)
+        self.stats.count('archive_bytes', new_zipfile.output_bytes)
+
+        if not create_full_archive:
+            delta_zipfile_path = os.path.join(self.archives_path, f"{created_timestamp}{self.DELTA_ARCHIVE_SUFFIX}")
+            print(f"{self.log_tag} Moving {new_zipfile_path} to {delta_zipfile_path}")
+            shutil.move(new_zipfile_path, delta_zipfile_path)
+            self.archive_catalogue.add(os.path.basename(delta_zipfile_path))
+            return
 
         # Rename latest to timestamped
         if os.path.isfile(latest_zipfile_path):
+            latest_zipfile_datetime = datetime.fromtimestamp(latest_zipfile_timestamp, tz=pytz.timezone('GMT'))
             timestamped_zipfile_name = latest_zipfile_datetime.strftime(f"{Product.TIMESTAMP_FORMAT}.zip")
             timestamped_zipfile_path = os.path.join(self.archives_path, timestamped_zipfile_name)
             print(f"{self.log_tag} Found {latest_zipfile_path}, moving to {timestamped_zipfile_path}")
             shutil.move(latest_zipfile_path, timestamped_zipfile_path)
+            self.archive_catalogue.rename(self.LATEST_ARCHIVE_NAME, timestamped_zipfile_name)
 
         # Rename new to latest
         print(f"{self.log_tag} Moving {new_zipfile_path} to {latest_zipfile_path}")
         shutil.move(new_zipfile_path, latest_zipfile_path)
+        self.archive_catalogue.add(self.LATEST_ARCHIVE_NAME)
+
+    def restore_archive(self, output_path, until=None):
+        """Rebuild point-in-time view of inventory from a chain of archives into output_path"""
+        chain = self.archive_chain(until)
+        extracted_files = set()
+        for archive in chain:
+            print(f"{self.log_tag} Extracting {archive['name']}")
+            with zipfile.ZipFile(archive['path']) as archive_zipfile:
+                members = [name for name in archive_zipfile.namelist() if name != self.ARCHIVE_MANIFEST_NAME]
+                archive_zipfile.extractall(output_path, members)
+                extracted_files.update(members)
+
+        # Files that were archived earlier in the chain, but deleted later
+        view = set(self.archive_view(chain[-1]['path']))
+        for relative_path in extracted_files - view:
+            os.remove(os.path.join(output_path, relative_path))
+        return chain[-1]['timestamp']
 
     def delete_legacy_data(self):
         """Delete legacy files older than 30 days"""
@@ -120,37 +424,95 @@ class Banknote:
                 print(f"{self.log_tag} Deleting legacy file {legacy_file_path} timestamped {legacy_file_datetime}")
                 os.remove(legacy_file_path)
 
+    def delete_archive(self, archive, reason):
+        print(f"{self.log_tag} {reason}, deleting {archive['path']}")
+        os.remove(archive['path'])
+        self.archive_catalogue.remove(archive['name'])
+        self.stats.count('archives_pruned')
+
     def prune_archive_folder(self):
-        """Delete older archives to limit disk space they are taking"""
-        archive_size_cap_mb = 1024 # 1 GB
-        glob_pattern = os.path.join(self.archives_path, "[0-9]*.zip")
-        archive_file_paths = sorted(glob.glob(glob_pattern))
+        """Delete older archives to limit disk space they are taking
+
+        First thins out archives by the keep-daily/weekly/monthly retention policy if one is set,
+        see retained_archives in archive_catalogue.py, then deletes whole chains, oldest first,
+        while archives take more than archive_size_cap_mb.
+        A full archive is never dropped while deltas based on it are kept,
+        and the newest chain is never deleted.
+        """
+        chains = self.archive_chains()
+        kept = retained_archives(
+            chains, datetime.now(tz=pytz.timezone('GMT')),
+            self.archive_keep_daily, self.archive_keep_weekly, self.archive_keep_monthly,
+        )
+        for chain in chains[:-1]:
+            # deltas first, so an interrupted run never leaves deltas without their base
+            for victim in reversed(chain):
+                if victim['name'] not in kept:
+                    self.delete_archive(victim, "Archive is out of retention policy")
+        prunable_chains = [[a for a in chain if a['name'] in kept] for chain in chains[:-1]]
+        prunable_chains = [chain for chain in prunable_chains if len(chain) > 0]
 
-        # https://stackoverflow.com/questions/1392413/calculating-a-directorys-size-using-python
-        while sum(os.path.getsize(f) for f in archive_file_paths) / 1024 / 1024 > archive_size_cap_mb:
-            victim_path = archive_file_paths.pop(0)
-            print(f"{self.log_tag} Total archive size exceeds {archive_size_cap_mb} MB, deleting {victim_path}")
-            os.remove(victim_path)
+        total_size = sum(a['size'] for chain in prunable_chains for a in chain)
+        while total_size / 1024 / 1024 > self.archive_size_cap_mb and len(prunable_chains) > 0:
+            victim_chain = prunable_chains.pop(0)
+            for victim in reversed(victim_chain):
+                total_size -= victim['size']
+                self.delete_archive(victim, f"Total archive size exceeds {self.archive_size_cap_mb} MB")
 
     def prune_products_folder(self):
         """Delete data of products with unknown last_seen value"""
         product_folders_deleted = 0
-        product_paths = list(glob.glob(os.path.join(self.product_root, "[0-9]*")))
-        for product_path in product_paths:
-            last_seen_path = os.path.join(product_path, Product.LAST_SEEN_FILE_NAME)
-            if not os.path.isfile(last_seen_path):
+        for id in self.storage.product_ids():
+            if self.storage.last_seen(id) is None:
+                if not self.storage.remove_product(id):
+                    continue
                 product_folders_deleted += 1
-                print(f"{self.log_tag} Found product data folder {product_path} with no last_seen file, deleting")
-                shutil.rmtree(product_path)
+                print(f"{self.log_tag} Found product {id} with no last_seen value, deleted its data")
         if product_folders_deleted > 0:
-            print(f"{self.log_tag} Total product data folders with no last_seen file deleted: {product_folders_deleted}")
+            print(f"{self.log_tag} Total product data folders with no last_seen value deleted: {product_folders_deleted}")
+
+    def delete_duplicate_snapshots(self):
+        """Delete snapshots identical to an older snapshot of the same product
+
+        Identical snapshots aren't written since content hashes are compared at write time,
+        this cleans up after an old bug that stored the same data repeatedly.
+        """
+        snapshots_deleted = 0
+        for id in self.storage.product_ids():
+            for timestamp in self.storage.delete_duplicate_snapshots(id):
+                print(f"{self.log_tag} Deleted duplicate snapshot {timestamp} of product {id}")
+                snapshots_deleted += 1
+        return snapshots_deleted
 
     def print_stats(self):
         """Print various stats and indicators about inventory"""
         print(f"{self.log_tag} Total items in product cache: {self.product_cache_count}")
         print(f"{self.log_tag} Total archives: {self.archive_count}")
 
-    def __init__(self, path, category_name):
+    def __init__(self, path, category_name, storage_backend=FolderStorage.NAME):
         self.path = os.path.join(path, category_name)
         self.log_tag = '[Banknote/{}]'.format(category_name)
         self.category_name = category_name
+        # see storage.py BACKENDS
+        self.storage_backend = storage_backend
+        self._storage = None
+        # Product id to (timestamp, product_details), kept for the lifetime of the object
+        self.latest_details = {}
+        # Timings and counters of the current run, see run_stats.py
+        self.stats = RunStats(self.path, self.log_tag)
+        # Progress of an unfinished run, see checkpoint.py
+        self.checkpoint = Checkpoint(self.path, self.log_tag)
+        # Archive compression, see archive_writer.py
+        self.archive_codec = 'deflate'
+        self.archive_level = None
+        self.archive_workers = 1
+        # Archive retention, see prune_archive_folder
+        self.archive_size_cap_mb = 1024 # 1 GB
+        self.archive_keep_daily = None
+        self.archive_keep_weekly = None
+        self.archive_keep_monthly = None
+        self._archive_catalogue = None
+        # When product pages were last fetched, see fetch_schedule.py
+        self.fetch_schedule = FetchSchedule(self.path, self.log_tag)
+        # Changes of normalized.json run by run, see change_feed.py
+        self.change_feed = ChangeFeed(self.path, self.log_tag)
@@ -1,16 +1,91 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 
+
+class RateLimiter:
+    """Token bucket shared by every thread issuing requests
+
+    `requests_per_minute` is the budget we agreed to spend on the shop,
+    `burst` is how many requests may go out back to back after an idle period.
+    The effective rate drops when the server pushes back (429/5xx)
+    and slowly recovers towards the configured budget afterwards.
+    """
+
+    # Never slow down below this fraction of the configured budget
+    MIN_RATE_FRACTION = 1 / 16
+
+    def __init__(self, requests_per_minute, burst=1):
+        self.requests_per_minute = requests_per_minute
+        self.burst = max(1, burst)
+        self.current_rate = requests_per_minute / 60 # tokens per second
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    @property
+    def max_rate(self):
+        return self.requests_per_minute / 60
+
+    def acquire(self):
+        """Block until a request may be sent, return seconds spent waiting"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.current_rate)
+            self.updated_at = now
+
+            # Reserve a token even if it's not there yet,
+            # concurrent callers queue up behind us
+            self.tokens -= 1
+            wait = max(0, -self.tokens / self.current_rate, self.paused_until - now)
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def slow_down(self, retry_after=None):
+        """Server is unhappy: halve the rate, optionally pause everyone"""
+        with self.lock:
+            self.current_rate = max(self.max_rate * self.MIN_RATE_FRACTION, self.current_rate / 2)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def speed_up(self):
+        """Request succeeded: recover a tenth of the configured budget"""
+        with self.lock:
+            self.current_rate = min(self.max_rate, self.current_rate + self.max_rate / 10)
+
+
 class BanknoteClient:
-    def __init__(self):
+    SHOP_URL = 'https://veikals.banknote.lv'
+
+    # Statuses that mean "you're going too fast" or "try again later"
+    BACKOFF_STATUS_CODES = [429, 500, 502, 503, 504]
+    BACKOFF_MAX_ATTEMPTS = 5
+    BACKOFF_BASE_SECONDS = 15
+
+    def __init__(self, rate_limiter=None, workers=1, base_url=None, recorder=None, cache=None):
+        self.rate_limiter = rate_limiter
+        self.workers = max(1, workers)
+        # Shop urls are sent to `base_url` instead, e.g. a local replay.ReplayServer
+        self.base_url = base_url.rstrip('/') if base_url else None
+        # replay.FixtureRecorder saving every response, if given
+        self.recorder = recorder
+        # http_cache.HttpCache of shop pages, if given
+        self.cache = cache
+
         # use session to preserve cookies, add some realistic browser headers
         self.session = requests.Session()
 
         # Set up a Retry policy to avoid crashing on monthly DNS resolution failures
         # https://stackoverflow.com/questions/23013220/max-retries-exceeded-with-url-in-requests
         request_retry_config = Retry(total=5, backoff_factor=15)
-        http_adapter = HTTPAdapter(max_retries=request_retry_config)
+        http_adapter = HTTPAdapter(max_retries=request_retry_config, pool_maxsize=max(10, self.workers))
         self.session.mount('http://', http_adapter)
         self.session.mount('https://', http_adapter)
 
@@ -30,9 +105,141 @@ class BanknoteClient:
             'upgrade-insecure-requests': '1',
         })
         # initialize cookies
-        self.get('https://veikals.banknote.lv/lv/')
+        self.get(f"{self.SHOP_URL}/lv/")
+
+    def rewrite_url(self, url):
+        if self.base_url and url.startswith(self.SHOP_URL):
+            return self.base_url + url[len(self.SHOP_URL):]
+        return url
 
     # get page and update cookies
-    def get(self, url, **kwargs):
-        response = self.session.get(url, **kwargs)
+    def get(self, url, stats=None, min_fresh_seconds=0, **kwargs):
+        """`stats`, a RunStats, if given, counts requests, bytes and time spent sleeping vs. waiting for responses
+
+        Shop pages are served from `cache` while fresh, or revalidated when stale.
+        `min_fresh_seconds` lets cached pages be reused for that long whatever their headers say.
+        Requests with conditional headers of their own bypass the cache.
+        """
+        cacheable = self.cache is not None and url.startswith(self.SHOP_URL) and not any(
+            name in (kwargs.get('headers') or {}) for name in ['If-None-Match', 'If-Modified-Since']
+        )
+        url = self.rewrite_url(url)
+        if not cacheable:
+            return self.fetch(url, stats, **kwargs)
+
+        request_url = self.cache.request_url(url, kwargs.get('params'))
+        entry = self.cache.load(request_url)
+        if entry is not None and self.cache.is_fresh(entry, min_fresh_seconds):
+            self.cache.touch(entry)
+            if stats is not None:
+                stats.count('http_cache_hits')
+                stats.count('http_cache_bytes_saved', len(entry['body']))
+            return self.cache.response(entry, request_url)
+
+        if entry is not None:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **self.cache.validators(entry)}
+        response = self.fetch(url, stats, **kwargs)
+        if entry is not None and response.status_code == 304:
+            self.cache.refresh(entry, response)
+            if stats is not None:
+                stats.count('http_cache_revalidated')
+                stats.count('http_cache_bytes_saved', len(entry['body']))
+            return self.cache.response(entry, request_url)
+
+        if stats is not None:
+            stats.count('http_cache_misses')
+        self.cache.store(request_url, response)
         return response
+
+    def fetch(self, url, stats=None, **kwargs):
+        """GET with backoff on 429/5xx within the rate limit, no caching"""
+        for attempt in range(1, self.BACKOFF_MAX_ATTEMPTS + 1):
+            if self.rate_limiter:
+                waited = self.rate_limiter.acquire()
+                if stats is not None:
+                    stats.add_time('sleep', waited)
+
+            started_at = time.perf_counter()
+            response = self.session.get(url, **kwargs)
+            if stats is not None:
+                stats.add_time('request', time.perf_counter() - started_at)
+                stats.count('requests')
+                stats.count('bytes_received', len(response.content))
+                stats.count('bytes_on_wire', self.wire_size(response))
+            if self.recorder is not None:
+                self.recorder.save(response)
+            if response.status_code not in self.BACKOFF_STATUS_CODES or attempt == self.BACKOFF_MAX_ATTEMPTS:
+                break
+
+            retry_after = self.retry_after_seconds(response) or self.BACKOFF_BASE_SECONDS * 2 ** (attempt - 1)
+            print(f"[Client] {url} responded with [{response.status_code}], backing off for {retry_after} seconds")
+            if stats is not None:
+                stats.count('backoffs')
+            if self.rate_limiter:
+                self.rate_limiter.slow_down(retry_after)
+            else:
+                time.sleep(retry_after)
+                if stats is not None:
+                    stats.add_time('sleep', retry_after)
+
+        if self.rate_limiter and response.status_code not in self.BACKOFF_STATUS_CODES:
+            self.rate_limiter.speed_up()
+        return response
+
+    @staticmethod
+    def wire_size(response):
+        """Body size as transferred, before gzip/br decoding"""
+        try:
+            return response.raw.tell()
+        except (AttributeError, OSError):
+            return len(response.content)
+
+    def get_many(self, urls, params_list=None, stats=None, min_fresh_seconds=0, deadline=None, **kwargs):
+        """Fetch urls on a pool of `workers` threads within the rate limit
+
+        `params_list`, if given, holds query params for each url.
+        Returns an iterator of responses in the same order as `urls`,
+        so callers can process results as if they were fetched one by one.
+        Urls whose turn comes after `deadline` (time.monotonic() value) aren't fetched,
+        their responses are None.
+        """
+        if params_list is None:
+            params_list = [None] * len(urls)
+
+        def get_one(url, params):
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            return self.get(url, params=params, stats=stats, min_fresh_seconds=min_fresh_seconds, **kwargs)
+
+        if self.workers == 1:
+            return map(get_one, urls, params_list)
+        return self.fetch_in_order(get_one, urls, params_list)
+
+    # Pages fetched ahead of the consumer per worker, bounds memory held by responses
+    IN_FLIGHT_PER_WORKER = 2
+
+    def fetch_in_order(self, get_one, urls, params_list):
+        """Run get_one on the thread pool, at most workers * IN_FLIGHT_PER_WORKER requests ahead
+
+        Requests not started yet are cancelled once the consumer stops iterating or raises.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='BanknoteClient')
+        pending = deque()
+        arguments = iter(zip(urls, params_list))
+        try:
+            for url, params in arguments:
+                pending.append(executor.submit(get_one, url, params))
+                if len(pending) >= self.workers * self.IN_FLIGHT_PER_WORKER:
+                    yield pending.popleft().result()
+            while len(pending) > 0:
+                yield pending.popleft().result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def retry_after_seconds(response):
+        """Parse Retry-After header, only the delta-seconds form is supported"""
+        try:
+            return int(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import json
+import pathlib
+import tempfile
+
+root = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(root))
+from archive_writer import CODECS, ParallelZipWriter
+from replay import SyntheticCatalogue
+
+# Compression throughput and ratio of archive codecs, levels and thread counts
+# on synthetic snapshot files, like a full archive of a category.
+# usage: python benchmarks/archive.py [--files=20000] [--codecs=deflate,lzma] [--levels=1,6,9] [--workers=1,2,4]
+files = 20000
+codecs = list(CODECS)
+levels = [None]
+worker_counts = sorted({1, 2, os.cpu_count() or 1})
+for arg in sys.argv:
+    if arg.startswith("--files="):
+        files = int(arg.split("=")[1])
+    elif arg.startswith("--codecs="):
+        codecs = arg.split("=")[1].split(",")
+    elif arg.startswith("--levels="):
+        levels = [int(level) for level in arg.split("=")[1].split(",")]
+    elif arg.startswith("--workers="):
+        worker_counts = [int(count) for count in arg.split("=")[1].split(",")]
+
+print(f"{files} files, {os.cpu_count()} cores")
+catalogue = SyntheticCatalogue(files)
+with tempfile.TemporaryDirectory() as path:
+    file_paths = []
+    for number in range(files):
+        product = catalogue.product(SyntheticCatalogue.CATEGORY_IDS[0], number)
+        file_path = os.path.join(path, f"{number}.json")
+        with open(file_path, "w", encoding='utf-8') as snapshot_file:
+            json.dump({**product, 'erp_images': [{'path': f"products/{product['id']}/{i}.jpg"} for i in range(8)]}, snapshot_file)
+        file_paths.append(file_path)
+
+    for codec in codecs:
+        for level in levels:
+            for workers in worker_counts:
+                archive_path = os.path.join(path, "archive.zip")
+                started_at = time.perf_counter()
+                with ParallelZipWriter(archive_path, codec, level, workers) as writer:
+                    for file_path in file_paths:
+                        writer.add_file(file_path, os.path.basename(file_path))
+                seconds = time.perf_counter() - started_at
+                print(f"  {codec:7} level {level if level is not None else 'default':7} {workers:2} threads: "
+                      f"{seconds:6.2f} s, {writer.input_bytes / 1024 / 1024 / seconds:6.1f} MB/s, "
+                      f"ratio {writer.output_bytes / writer.input_bytes:.3f}")
+                os.remove(archive_path)
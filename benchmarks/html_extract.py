@@ -0,0 +1,76 @@
+import os
+import sys
+import glob
+import json
+import time
+import pathlib
+import tracemalloc
+
+root = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(root))
+import html_extract
+
+# Compare parse time and peak memory of product data extraction:
+# full BeautifulSoup parse vs streaming tag scanner (standard library and lxml, if installed)
+# usage: python benchmarks/html_extract.py [--fixtures=folder/with/saved/pages] [--repeat=20]
+# Without fixtures, a synthetic page shaped like a product page is used.
+fixtures_path = None
+repeat = 20
+for arg in sys.argv:
+    if arg.startswith("--fixtures="):
+        fixtures_path = arg.split("=")[1]
+    elif arg.startswith("--repeat="):
+        repeat = int(arg.split("=")[1])
+
+
+def synthetic_page():
+    product = json.dumps({'id': 1, 'price': '199.00', 'description_f': [{'title': "RAM", 'value': "8 GB"}] * 30})
+    filler = "".join(f'<div class="row"><a href="/lv/p/{i}">Product {i}</a><span>{i}.00 &euro;</span></div>' for i in range(3000))
+    return (
+        f'<!doctype html><html><head><script>var x = "<buy-now-btn>";</script></head><body>{filler}'
+        f'<buy-now-btn :product="{product.replace(chr(34), "&quot;")}"></buy-now-btn>{filler}</body></html>'
+    )
+
+
+pages = {}
+if fixtures_path:
+    for file_path in sorted(glob.glob(os.path.join(fixtures_path, "*.html"))):
+        with open(file_path, encoding='utf-8') as page_file:
+            pages[os.path.basename(file_path)] = page_file.read()
+else:
+    pages['synthetic'] = synthetic_page()
+
+lxml_etree = html_extract.etree
+
+
+def fast_stdlib(html):
+    html_extract.etree = None
+    try:
+        return html_extract.extract_product_data(html)
+    finally:
+        html_extract.etree = lxml_etree
+
+
+variants = [('BeautifulSoup', html_extract.extract_product_data_soup), ('tag scanner', fast_stdlib)]
+if lxml_etree is not None:
+    variants.append(('lxml pull parser', html_extract.extract_product_data))
+
+for name, html in pages.items():
+    print(f"{name}: {len(html) / 1024:.0f} KiB")
+    expected = html_extract.extract_product_data_soup(html)
+    for variant_name, function in variants:
+        if function(html) != expected:
+            print(f"  {variant_name:18} MISMATCH")
+            continue
+
+        started_at = time.perf_counter()
+        for _ in range(repeat):
+            function(html)
+        milliseconds = (time.perf_counter() - started_at) / repeat * 1000
+
+        tracemalloc.start()
+        function(html)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"  {variant_name:18} {milliseconds:8.2f} ms  peak {peak / 1024:8.0f} KiB")
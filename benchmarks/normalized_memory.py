@@ -0,0 +1,89 @@
+import os
+import sys
+import gzip
+import json
+import time
+import pathlib
+import tempfile
+import subprocess
+from datetime import datetime
+
+root = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(root))
+import compact_inventory
+from banknote import Banknote
+from run_stats import peak_rss_kb
+from replay import SyntheticCatalogue
+
+# Peak RSS of normalizing and dumping a category of synthetic products, per catalogue size.
+# "streamed" reduces page properties to normalized fields as they're read and streams normalized.json,
+# like the pipeline does, "in memory" keeps full properties and the normalized list
+# before one json.dump and compresses files read whole, as earlier versions did.
+# Every size runs in its own child process, so peak RSS of one doesn't hide the next.
+# usage: python benchmarks/normalized_memory.py [--products=1000,10000,50000]
+product_counts = [1000, 10000, 50000]
+for arg in sys.argv:
+    if arg.startswith("--products="):
+        product_counts = [int(count) for count in arg.split("=")[1].split(",")]
+
+
+def page_properties(catalogue, number):
+    """Properties of a synthetic product page, what a snapshot holds"""
+    product = catalogue.product(SyntheticCatalogue.CATEGORY_IDS[0], number)
+    return {
+        'id': product['id'],
+        'price': product['price'],
+        'description_f': product['specs'],
+        'erp_images': [{'path': f"products/{product['id']}/{i}.jpg", 'width': 1200, 'height': 900} for i in range(8)],
+        'description': "Lorem ipsum dolor sit amet. " * 40,
+    }, product
+
+
+def run_child(mode, product_count):
+    catalogue = SyntheticCatalogue(product_count)
+    snapshot_datetime = datetime.now()
+    with tempfile.TemporaryDirectory() as inventory_path:
+        inventory = Banknote(inventory_path, "laptops")
+        os.makedirs(inventory.path)
+        started_at = time.perf_counter()
+        product_index = []
+        details = {}
+        for number in range(product_count):
+            properties, product = page_properties(catalogue, number)
+            product_index.append({key: value for key, value in product.items() if key != 'specs'})
+            details[product['id']] = properties if mode == "in memory" else inventory.product_details(properties, snapshot_datetime)
+
+        def normalized_items():
+            for item in product_index:
+                product_details = details.pop(item['id'])
+                if mode == "in memory":
+                    product_details = inventory.product_details(product_details, snapshot_datetime)
+                yield {'id': item['id'], 'title': item['title'], 'price': float(item['price']), **product_details['specs'], 'images': product_details['images']}
+
+        if mode == "in memory":
+            items = list(normalized_items())
+            details.clear()
+            inventory_dictionary = {'index_file_modification_timestamp': 0, 'inventory': items}
+            with open(inventory.normalized_file_path, "w", encoding='utf-8') as normalized_file:
+                json.dump(inventory_dictionary, normalized_file, indent=2)
+            with open(inventory.compact_normalized_file_path, "wb") as compact_file:
+                compact_file.write(compact_inventory.dumps_compact(inventory_dictionary))
+            for file_path in [inventory.normalized_file_path, inventory.compact_normalized_file_path]:
+                with open(file_path, 'rb') as source_file:
+                    contents = source_file.read()
+                with open(f"{file_path}.gz", 'wb') as gz_file:
+                    gz_file.write(gzip.compress(contents, compresslevel=9, mtime=0))
+        else:
+            inventory.dump_normalized_inventory(0, normalized_items())
+        print(json.dumps({'seconds': time.perf_counter() - started_at, 'peak_rss_kb': peak_rss_kb()}))
+
+
+if __name__ == '__main__' and sys.argv[1:2] == ["--child"]:
+    run_child(sys.argv[2], int(sys.argv[3]))
+    sys.exit()
+
+for product_count in product_counts:
+    for mode in ["in memory", "streamed"]:
+        output = subprocess.run([sys.executable, __file__, "--child", mode, str(product_count)], capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{product_count:6} products, {mode:9}: {result['seconds']:6.1f} s, peak RSS {result['peak_rss_kb'] / 1024:6.0f} MB")
@@ -0,0 +1,55 @@
+import os
+import sys
+import gzip
+import json
+import time
+import pathlib
+
+root = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(root))
+import compact_inventory
+
+# Compare size of normalized.json with its compact columnar variant, raw and compressed
+# usage: python benchmarks/normalized_size.py [--categories=laptops,monitors] [--file=path/to/normalized.json]
+categories = ["laptops", "desktops", "monitors"]
+file_paths = []
+for arg in sys.argv:
+    if arg.startswith("--categories="):
+        categories = arg.split("=")[1].split(",")
+    elif arg.startswith("--file="):
+        file_paths.append(arg.split("=")[1])
+
+if len(file_paths) == 0:
+    file_paths = [os.path.join(root, "inventory", category, "normalized.json") for category in categories]
+
+
+def sizes(contents):
+    result = {'raw': len(contents), 'gzip': len(gzip.compress(contents, compresslevel=9, mtime=0))}
+    if compact_inventory.brotli is not None:
+        result['br'] = len(compact_inventory.brotli.compress(contents, quality=11))
+    return result
+
+
+for file_path in file_paths:
+    if not os.path.isfile(file_path):
+        print(f"{file_path}: not found, skipping")
+        continue
+
+    with open(file_path, encoding='utf-8') as normalized_file:
+        inventory_dictionary = json.load(normalized_file)
+
+    started_at = time.perf_counter()
+    variants = {
+        'indent=2 (current)': json.dumps(inventory_dictionary, indent=2).encode('utf-8'),
+        'minified': json.dumps(inventory_dictionary, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+    }
+    compact_started_at = time.perf_counter()
+    variants['columnar'] = compact_inventory.dumps_compact(inventory_dictionary)
+    compact_seconds = time.perf_counter() - compact_started_at
+
+    print(f"{file_path}: {len(inventory_dictionary['inventory'])} products, columnar encoding took {compact_seconds * 1000:.1f} ms")
+    baseline = sizes(variants['indent=2 (current)'])
+    for name, contents in variants.items():
+        variant_sizes = sizes(contents)
+        columns = ", ".join(f"{encoding} {size / 1024:9.1f} KiB ({size / baseline[encoding] * 100:5.1f}%)" for encoding, size in variant_sizes.items())
+        print(f"  {name:20} {columns}")
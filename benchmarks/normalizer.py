@@ -0,0 +1,85 @@
+import os
+import re
+import sys
+import glob
+import json
+import time
+import pathlib
+
+root = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(root))
+from normalizer import normalize_product
+from numeric_fields import numeric_fields
+
+# Normalize stored product snapshots with the rule table and the old if/elif chain,
+# check both agree and report throughput
+# usage: python benchmarks/normalizer.py [--categories=laptops,monitors] [--repeat=5]
+categories = ["laptops", "desktops", "monitors"]
+repeat = 5
+for arg in sys.argv:
+    if arg.startswith("--categories="):
+        categories = arg.split("=")[1].split(",")
+    elif arg.startswith("--repeat="):
+        repeat = int(arg.split("=")[1])
+
+
+def legacy_normalize_product(category_name, specs):
+    """normalize_product as it was before the rule table, for comparison"""
+    normalized = {}
+    for entry in specs:
+        entry = {**entry, 'value': entry['value'].replace('\n', '').replace('\t', '').replace('&nbsp;', ' ').strip(' -,|"')}
+        if re.search('(defekts)', entry['title'], re.IGNORECASE):
+            normalized['defect'] = entry['value']
+        elif category_name == 'laptops' or category_name == 'desktops':
+            if re.search('(cpu|proces)', entry['title'], re.IGNORECASE) and (len(entry['value']) > 0):
+                normalized['cpu'] = entry['value']
+            elif re.search('(ram)', entry['title'], re.IGNORECASE):
+                normalized['ram'] = entry['value']
+            elif re.search('(atmi|disk|hdd|ssd)', entry['title'], re.IGNORECASE) and not re.search('(oper|las)', entry['title'], re.IGNORECASE):
+                normalized['storage'] = entry['value']
+            elif re.search('(gpu|video|grafisk)', entry['title'], re.IGNORECASE):
+                if 'gpu' in normalized:
+                    normalized['gpu'] = normalized['gpu'] + " + " + entry['value']
+                else:
+                    normalized['gpu'] = entry['value']
+            elif re.search('(operētājsistēma)', entry['title'], re.IGNORECASE):
+                normalized['os'] = entry['value']
+            elif re.search('(mātes)', entry['title'], re.IGNORECASE):
+                normalized['motherboard'] = entry['value']
+        elif category_name == 'monitors':
+            if re.search('(izšķirtspēja)', entry['title'], re.IGNORECASE) and (len(entry['value']) > 0):
+                normalized['resolution'] = entry['value'].replace(' x ', 'x')
+            elif re.search('(izmērs)', entry['title'], re.IGNORECASE) and (len(entry['value']) > 0):
+                normalized['size'] = entry['value']
+            elif re.search('(frekvence)', entry['title'], re.IGNORECASE) and (len(entry['value']) > 0):
+                normalized['refresh_rate'] = entry['value']
+            elif re.search('(tips)', entry['title'], re.IGNORECASE) and (len(entry['value']) > 0):
+                normalized['panel'] = entry['value']
+    normalized.update(numeric_fields(normalized))
+    return normalized
+
+
+def benchmark(function, category_name, corpus):
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        for specs in corpus:
+            function(category_name, specs)
+    return time.perf_counter() - started_at
+
+
+for category_name in categories:
+    corpus = []
+    for file_path in glob.glob(os.path.join(root, "inventory", category_name, "products", "*", "*.json")):
+        with open(file_path, encoding='utf-8') as snapshot_file:
+            corpus.append(json.load(snapshot_file).get('description_f', []))
+
+    if len(corpus) == 0:
+        print(f"{category_name}: no snapshots found, skipping")
+        continue
+
+    mismatches = sum(1 for specs in corpus if normalize_product(category_name, specs) != legacy_normalize_product(category_name, specs))
+    entries = sum(len(specs) for specs in corpus)
+    print(f"{category_name}: {len(corpus)} snapshots, {entries} spec entries, {mismatches} mismatches")
+    for name, function in [('if/elif chain', legacy_normalize_product), ('rule table', normalize_product)]:
+        seconds = benchmark(function, category_name, corpus)
+        print(f"  {name:15} {len(corpus) * repeat / seconds:10.0f} products/s")
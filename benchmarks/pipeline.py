@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import time
+import pathlib
+import tempfile
+import subprocess
+
+root = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(root))
+from replay import ReplayServer, FixtureCatalogue, SyntheticCatalogue
+
+# Run the whole download-products.py pipeline against a local stand-in of the shop
+# and report wall time, peak RSS and per phase timings and IO syscalls from run_stats.json.
+# Every size runs twice on the same inventory: cold (empty) and warm (a share of products repriced).
+# usage: python benchmarks/pipeline.py [--products=1000,10000,50000] [--fixtures=/path/to/fixtures]
+#        [--categories=laptops] [--workers=4] [--storage=folder]
+product_counts = [1000, 10000, 50000]
+fixtures_path = None
+categories = "laptops"
+workers = 4
+storage_backend = "folder"
+for arg in sys.argv:
+    if arg.startswith("--products="):
+        product_counts = [int(count) for count in arg.split("=")[1].split(",")]
+    elif arg.startswith("--fixtures="):
+        fixtures_path = arg.split("=")[1]
+    elif arg.startswith("--categories="):
+        categories = arg.split("=")[1]
+    elif arg.startswith("--workers="):
+        workers = int(arg.split("=")[1])
+    elif arg.startswith("--storage="):
+        storage_backend = arg.split("=")[1]
+
+
+def run_pipeline(base_url, inventory_path):
+    """Run download-products.py in a child process, return wall seconds and peak RSS in kilobytes"""
+    command = [
+        sys.executable, os.path.join(root, "download-products.py"),
+        f"--base-url={base_url}", f"--inventory={inventory_path}", "--delay=0",
+        f"--workers={workers}", f"--categories={categories}", f"--storage={storage_backend}",
+        f"--http-cache={os.path.join(inventory_path, 'http_cache')}", "--http-cache-ttl=0",
+    ]
+    started_at = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    # https://docs.python.org/3/library/os.html#os.wait4
+    _, status, rusage = os.wait4(process.pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"download-products.py failed with {os.waitstatus_to_exitcode(status)}")
+    return time.perf_counter() - started_at, rusage.ru_maxrss
+
+
+def print_run_stats(inventory_path):
+    for category in categories.split(","):
+        with open(os.path.join(inventory_path, category, "run_stats.json"), encoding='utf-8') as stats_file:
+            run = json.load(stats_file)['runs'][-1]
+        print(f"    {category}: {run['counters'].get('requests', 0)} requests, cache hit rate {run['cache_hit_rate']}")
+        for phase, seconds in run['phases'].items():
+            io = run['io'].get(phase)
+            io_summary = f"  {io['syscr']:8} reads {io['syscw']:8} writes" if io else ""
+            peak_rss_kb = run['peak_rss_kb'].get(phase)
+            rss_summary = f"  peak RSS {peak_rss_kb / 1024:6.0f} MB" if peak_rss_kb else ""
+            print(f"      {phase:14} {seconds:8.2f} s{io_summary}{rss_summary}")
+
+
+def benchmark(label, catalogue):
+    server = ReplayServer(catalogue)
+    base_url = server.start()
+    with tempfile.TemporaryDirectory() as inventory_path:
+        for run in ["cold", "warm"]:
+            if run == "warm":
+                if isinstance(catalogue, SyntheticCatalogue):
+                    catalogue.revision += 1
+                # Index files younger than an hour are reused without a request, age them
+                for category in categories.split(","):
+                    index_file_path = os.path.join(inventory_path, category, "index.json")
+                    os.utime(index_file_path, (time.time() - 2 * 60 * 60, time.time() - 2 * 60 * 60))
+            wall_seconds, peak_rss_kb = run_pipeline(base_url, inventory_path)
+            print(f"{label} {run}: {wall_seconds:.1f} s, peak RSS {peak_rss_kb / 1024:.0f} MB")
+            print_run_stats(inventory_path)
+    server.shutdown()
+
+
+if fixtures_path:
+    benchmark(f"fixtures {fixtures_path}", FixtureCatalogue(fixtures_path))
+else:
+    for product_count in product_counts:
+        benchmark(f"{product_count} products", SyntheticCatalogue(product_count, repriced=0.1))
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import pathlib
+import tempfile
+
+root = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(root))
+import storage
+import snapshot_loader
+from replay import SyntheticCatalogue
+
+# Time loading latest snapshots of unchanged products, as the lookup phase of a warm run does,
+# with json and orjson (if installed) and by amount of worker processes.
+# Files stay in the page cache between passes, so this measures parsing, not the disk.
+# usage: python benchmarks/snapshot_loading.py [--products=20000] [--workers=1,2,4] [--storage=folder]
+products = 20000
+worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+storage_backend = "folder"
+for arg in sys.argv:
+    if arg.startswith("--products="):
+        products = int(arg.split("=")[1])
+    elif arg.startswith("--workers="):
+        worker_counts = [int(count) for count in arg.split("=")[1].split(",")]
+    elif arg.startswith("--storage="):
+        storage_backend = arg.split("=")[1]
+
+# worker processes import this script again, only the parent runs the benchmark
+if __name__ == '__main__':
+    print(f"{products} snapshots, {storage_backend} storage, {os.cpu_count()} cores")
+    catalogue = SyntheticCatalogue(products)
+    timestamp = "2024-01-01_00-00-00"
+    with tempfile.TemporaryDirectory() as inventory_path:
+        store = storage.BACKENDS[storage_backend](os.path.join(inventory_path, "laptops"), "[Benchmark]")
+        os.makedirs(store.inventory_path)
+        store.load()
+        entries = []
+        for number in range(products):
+            product = catalogue.product(SyntheticCatalogue.CATEGORY_IDS[0], number)
+            store.add_snapshot(product['id'], timestamp, {
+                'id': product['id'],
+                'price': product['price'],
+                'description_f': product['specs'],
+                'erp_images': [{'path': f"products/{product['id']}/{i}.jpg"} for i in range(8)],
+                'description': "Lorem ipsum dolor sit amet. " * 40,
+            })
+            entries.append((product['id'], store.snapshot_source(product['id'], timestamp), "2024-01-01T00:00:00+00:00"))
+        store.commit()
+
+        parsers = {'json': None}
+        if snapshot_loader.orjson is not None:
+            parsers['orjson'] = snapshot_loader.orjson
+        baseline = None
+        for parser_name, parser in parsers.items():
+            snapshot_loader.orjson = parser
+            for workers in worker_counts:
+                started_at = time.perf_counter()
+                snapshot_loader.load_details_many("laptops", entries, workers)
+                seconds = time.perf_counter() - started_at
+                baseline = baseline or seconds
+                print(f"  {parser_name:6} {workers:2} workers: {seconds:6.2f} s, {products / seconds:8.0f} snapshots/s, speedup {baseline / seconds:.2f}x")
+        store.close()
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import random
+import pathlib
+import tempfile
+
+root = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(root))
+import storage
+
+# Compare storage backends on a synthetic catalogue:
+# time of writing snapshots, time of a run-like pass (latest lookup + last_seen of every product)
+# and amount of inodes used.
+# usage: python benchmarks/storage.py [--products=2000] [--snapshots=5]
+products = 2000
+snapshots = 5
+for arg in sys.argv:
+    if arg.startswith("--products="):
+        products = int(arg.split("=")[1])
+    elif arg.startswith("--snapshots="):
+        snapshots = int(arg.split("=")[1])
+
+
+def inode_count(path):
+    count = 0
+    for _, folder_names, file_names in os.walk(path):
+        count += len(folder_names) + len(file_names)
+    return count
+
+
+def synthetic_properties(id, version):
+    return {
+        'id': id,
+        'title': f"Laptop {id}",
+        'price': f"{random.randint(100, 2000)}.00",
+        'description_f': [{'title': "RAM", 'value': f"{8 * (version + 1)} GB"}] * 10,
+    }
+
+
+for backend in storage.BACKENDS.values():
+    with tempfile.TemporaryDirectory() as inventory_path:
+        random.seed(0)
+        store = backend(inventory_path, "[Benchmark]")
+        store.load()
+
+        started_at = time.perf_counter()
+        for version in range(snapshots):
+            timestamp = f"2024-01-{version + 1:02}_00-00-00"
+            for id in range(products):
+                store.add_snapshot(id, timestamp, synthetic_properties(id, version))
+                store.set_last_seen(id, timestamp)
+            store.commit()
+        write_seconds = time.perf_counter() - started_at
+        store.close()
+
+        # A fresh instance, as a new run would create
+        started_at = time.perf_counter()
+        store = backend(inventory_path, "[Benchmark]")
+        store.load()
+        for id in store.product_ids():
+            store.load_snapshot(id, store.snapshot_timestamps(id)[-1])
+            store.set_last_seen(id, "2024-02-01_00-00-00")
+        store.commit()
+        run_seconds = time.perf_counter() - started_at
+        store.close()
+
+        print(f"{backend.NAME:8} write {write_seconds:7.2f} s  run {run_seconds:7.2f} s  inodes {inode_count(inventory_path):8}")
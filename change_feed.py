@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import hashlib
+from datetime import datetime
+import pytz
+from atomic_file import atomic_write
+from product import Product
+
+# Fields of a normalized product that change without the product itself changing
+VOLATILE_FIELDS = ['price', 'timestamp']
+
+
+def item_hash(item):
+    """Hash of a normalized product without VOLATILE_FIELDS"""
+    canonical_json = json.dumps({k: v for k, v in item.items() if k not in VOLATILE_FIELDS}, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical_json.encode('utf-8')).hexdigest()[:16]
+
+
+def fold(previous, event):
+    """Single event with the net effect of `previous` followed by `event` of the same product"""
+    if previous is None or event['type'] in ['added', 'removed'] or previous['type'] == 'removed':
+        return event
+    if event['type'] == 'repriced':
+        if previous['type'] == 'repriced':
+            return {**event, 'old_price': previous['old_price']}
+        # price of a whole added or changed product
+        return {**previous, 'seq': event['seq'], 'timestamp': event['timestamp'], 'item': {**previous['item'], 'price': event['price']}}
+    # changed
+    if previous['type'] == 'added':
+        return {**event, 'type': 'added'}
+    if 'old_price' in previous and 'old_price' not in event:
+        return {**event, 'old_price': previous['old_price']}
+    return event
+
+
+class ChangeFeed:
+    """Append-only feed of what changed in normalized.json of a category, run by run
+
+    Events are JSON lines in changes/<first seq>.jsonl segments, every event has an increasing "seq",
+    so clients keep the last seq they processed and read only what follows it:
+      {"seq": 1, "timestamp": ..., "type": "added", "id": ..., "item": {normalized product}}
+      {"seq": 2, "timestamp": ..., "type": "removed", "id": ..., "reason": "sold"}
+      {"seq": 3, "timestamp": ..., "type": "repriced", "id": ..., "old_price": ..., "price": ...}
+      {"seq": 4, "timestamp": ..., "type": "changed", "id": ..., "item": {...}, "old_price": ... if repriced too}
+    Events of a run are also written to changes/delta.json.
+    Segments older than `compact_after_days` are folded into changes/compacted.jsonl,
+    which keeps one event with the net change per product, see fold().
+    Price and a hash of every product of the previous run are kept in changes/state.json.
+    """
+
+    FOLDER_NAME = 'changes'
+    STATE_FILE_NAME = 'state.json'
+    DELTA_FILE_NAME = 'delta.json'
+    COMPACTED_FILE_NAME = 'compacted.jsonl'
+    VERSION = 1
+    # A new segment is started once the current one holds this many events
+    SEGMENT_EVENTS = 10000
+
+    @property
+    def path(self):
+        return os.path.join(self.inventory_path, self.FOLDER_NAME)
+
+    @property
+    def state_path(self):
+        return os.path.join(self.path, self.STATE_FILE_NAME)
+
+    @property
+    def delta_path(self):
+        return os.path.join(self.path, self.DELTA_FILE_NAME)
+
+    @property
+    def compacted_path(self):
+        return os.path.join(self.path, self.COMPACTED_FILE_NAME)
+
+    def segment_names(self):
+        """Names of segments, oldest first"""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name for name in os.listdir(self.path) if name[:1].isdigit() and name.endswith('.jsonl'))
+
+    def load(self):
+        """Load state of the previous run and drop events a crashed run appended after saving it
+
+        Only events numbered after the seq of the saved state are dropped,
+        without a saved state every segment is kept.
+        """
+        self.state = None
+        try:
+            with open(self.state_path, encoding='utf-8') as state_file:
+                data = json.load(state_file)
+            if data.get('version') == self.VERSION:
+                self.state = data
+        except (OSError, ValueError):
+            pass
+        self.current = {}
+        self.events = []
+        self._previous = None
+        if self.state is None:
+            return
+
+        for name in self.segment_names():
+            segment_path = os.path.join(self.path, name)
+            if name == self.state['segment']:
+                if os.path.getsize(segment_path) > self.state['segment_bytes']:
+                    print(f"{self.log_tag} Dropping change feed events of an unfinished run from {name}")
+                    os.truncate(segment_path, self.state['segment_bytes'])
+            elif int(name.removesuffix('.jsonl')) > self.state['seq']:
+                print(f"{self.log_tag} Dropping change feed segment {name} of an unfinished run")
+                os.remove(segment_path)
+
+    def last_seq_on_disk(self):
+        """Seq of the newest event in segments or compacted.jsonl, 0 if there are none"""
+        sources = ([self.compacted_path] if os.path.isfile(self.compacted_path) else []) + [os.path.join(self.path, name) for name in self.segment_names()]
+        for source in reversed(sources):
+            seq = None
+            with open(source, encoding='utf-8') as events_file:
+                for line in events_file:
+                    try:
+                        seq = json.loads(line)['seq']
+                    except (ValueError, KeyError):
+                        pass # cut short by a crash
+            if seq is not None:
+                return seq
+        return 0
+
+    def observe(self, item):
+        """Compare a normalized product of this run with the previous run"""
+        id = item['id']
+        price = item.get('price')
+        hash = item_hash(item)
+        self.current[id] = [price, hash]
+        if self.state is None:
+            return
+        previous = self.previous.get(id)
+        if previous is None:
+            self.events.append({'type': 'added', 'id': id, 'item': item})
+        elif previous[1] != hash:
+            event = {'type': 'changed', 'id': id, 'item': item}
+            if previous[0] != price:
+                event['old_price'] = previous[0]
+            self.events.append(event)
+        elif previous[0] != price:
+            self.events.append({'type': 'repriced', 'id': id, 'old_price': previous[0], 'price': price})
+
+    @property
+    def previous(self):
+        if self._previous is None:
+            self._previous = {id: [price, hash] for id, price, hash in self.state['items']} if self.state is not None else {}
+        return self._previous
+
+    def finish(self, index_file_modification_timestamp, removal_reasons=None):
+        """Append events of this run, write delta.json and state.json
+
+        Products of the previous run that weren't observed are removed,
+        with the reason from `removal_reasons` (id to reason) if they were removed from the index
+        while fetching their page, "delisted" if they left the index.
+        A run without saved state, the first one or one after state.json was lost,
+        only records state, its products are in normalized.json already.
+        Returns events of this run.
+        """
+        removal_reasons = removal_reasons or {}
+        for id in self.previous:
+            if id not in self.current:
+                self.events.append({'type': 'removed', 'id': id, 'reason': removal_reasons.get(id, 'delisted')})
+
+        os.makedirs(self.path, exist_ok=True)
+        timestamp = datetime.now(tz=pytz.timezone('GMT')).strftime(Product.TIMESTAMP_FORMAT)
+        # without a saved state numbering continues after the feed on disk, so client cursors stay valid
+        seq = self.state['seq'] if self.state is not None else self.last_seq_on_disk()
+        segment = self.state['segment'] if self.state is not None else None
+        segment_events = self.state['segment_events'] if self.state is not None else 0
+        first_seq = seq + 1
+        events = []
+        for event in self.events:
+            seq += 1
+            events.append({'seq': seq, 'timestamp': timestamp, **event})
+
+        if len(events) > 0:
+            if segment is None or segment_events >= self.SEGMENT_EVENTS:
+                segment = f"{first_seq:012d}.jsonl"
+                segment_events = 0
+            with open(os.path.join(self.path, segment), "a", encoding='utf-8') as segment_file:
+                for event in events:
+                    segment_file.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + "\n")
+            segment_events += len(events)
+
+        with atomic_write(self.delta_path, "w", encoding='utf-8') as delta_file:
+            json.dump({
+                'version': self.VERSION,
+                'timestamp': timestamp,
+                'index_file_modification_timestamp': index_file_modification_timestamp,
+                'from_seq': first_seq,
+                'to_seq': seq,
+                'events': events,
+            }, delta_file, ensure_ascii=False, separators=(',', ':'))
+
+        self.state = {
+            'version': self.VERSION,
+            'seq': seq,
+            'segment': segment,
+            'segment_events': segment_events,
+            'segment_bytes': os.path.getsize(os.path.join(self.path, segment)) if segment is not None else 0,
+            'items': [[id, price, hash] for id, (price, hash) in self.current.items()],
+        }
+        with atomic_write(self.state_path, "w", encoding='utf-8') as state_file:
+            json.dump(self.state, state_file, separators=(',', ':'))
+
+        counts = {}
+        for event in events:
+            counts[event['type']] = counts.get(event['type'], 0) + 1
+        print(f"{self.log_tag} Change feed: {', '.join(f'{count} {type}' for type, count in counts.items()) or 'no changes'}, up to seq {seq}")
+        self.current = {}
+        self.events = []
+        self._previous = None
+        return events
+
+    def read_events(self, path):
+        with open(path, encoding='utf-8') as events_file:
+            for line in events_file:
+                yield json.loads(line)
+
+    def compact(self):
+        """Fold segments with no event newer than compact_after_days into compacted.jsonl
+
+        The current segment is never compacted. Returns amount of segments compacted.
+        """
+        cutoff = time.time() - self.compact_after_days * 24 * 60 * 60
+        current_segment = self.state['segment'] if self.state is not None else None
+        old_segments = []
+        for name in self.segment_names():
+            # segments are only appended to, so their modification time is that of their newest event
+            if name == current_segment or os.path.getmtime(os.path.join(self.path, name)) >= cutoff:
+                break
+            old_segments.append(name)
+        if len(old_segments) == 0:
+            return 0
+
+        net_events = {}
+        sources = ([self.compacted_path] if os.path.isfile(self.compacted_path) else []) + [os.path.join(self.path, name) for name in old_segments]
+        event_count = 0
+        for source in sources:
+            for event in self.read_events(source):
+                net_events[event['id']] = fold(net_events.get(event['id']), event)
+                event_count += 1
+        with atomic_write(self.compacted_path, "w", encoding='utf-8') as compacted_file:
+            for event in sorted(net_events.values(), key=lambda event: event['seq']):
+                compacted_file.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + "\n")
+        for name in old_segments:
+            os.remove(os.path.join(self.path, name))
+        print(f"{self.log_tag} Compacted {len(old_segments)} change feed segments, {event_count} events to {len(net_events)}")
+        return len(old_segments)
+
+    def events_since(self, seq=0):
+        """Events after `seq`, oldest first, compacted ones included"""
+        sources = ([self.compacted_path] if os.path.isfile(self.compacted_path) else []) + [os.path.join(self.path, name) for name in self.segment_names()]
+        for source in sources:
+            for event in self.read_events(source):
+                if event['seq'] > seq:
+                    yield event
+
+    def __init__(self, inventory_path, log_tag, compact_after_days=30):
+        self.inventory_path = inventory_path
+        self.log_tag = log_tag
+        self.compact_after_days = compact_after_days
+        self.state = None
+        self.current = {}
+        self.events = []
+        self._previous = None
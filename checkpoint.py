@@ -0,0 +1,84 @@
+import os
+import json
+from atomic_file import atomic_write
+
+
+class Checkpoint:
+    """Progress of a category run, so a restarted run continues where the previous one stopped
+
+    Records stages that have finished and products removed from the index
+    (redirected or sold) for the index the run started with.
+    Downloaded product data is persisted by committing storage along with the checkpoint,
+    so a restarted run finds it as unchanged snapshots instead of downloading it again.
+    The file is deleted once every stage of a run has finished.
+    """
+
+    FILE_NAME = 'checkpoint.json'
+    VERSION = 1
+
+    @property
+    def path(self):
+        return os.path.join(self.inventory_path, self.FILE_NAME)
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as checkpoint_file:
+                data = json.load(checkpoint_file)
+            if data.get('version') == self.VERSION:
+                self.data = data
+                return
+        except (OSError, ValueError):
+            pass
+        self.data = None
+
+    def start(self, index_timestamp):
+        """Continue the checkpoint of an unfinished run of the same index, or start over
+
+        Returns True when resuming.
+        """
+        if self.data is not None and self.data['index_timestamp'] == index_timestamp:
+            print(f"{self.log_tag} Resuming unfinished run, finished stages: {', '.join(self.data['stages']) or 'none'}")
+            return True
+        self.data = {'version': self.VERSION, 'index_timestamp': index_timestamp, 'stages': [], 'removed_ids': []}
+        return False
+
+    @property
+    def index_timestamp(self):
+        """Modification timestamp of index.json the unfinished run started with, None without one"""
+        return self.data['index_timestamp'] if self.data is not None else None
+
+    def is_done(self, stage):
+        return stage in self.data['stages']
+
+    def mark_done(self, stage):
+        self.data['stages'].append(stage)
+        self.save()
+
+    @property
+    def removed_ids(self):
+        return set(self.data['removed_ids'])
+
+    def add_removed(self, id, reason=None):
+        self.data['removed_ids'].append(id)
+        if reason is not None:
+            self.data.setdefault('removal_reasons', []).append([id, reason])
+
+    @property
+    def removal_reasons(self):
+        """Why products were removed from the index, by id"""
+        return dict(self.data.get('removal_reasons', []))
+
+    def save(self):
+        with atomic_write(self.path, "w", encoding='utf-8') as checkpoint_file:
+            json.dump(self.data, checkpoint_file)
+
+    def clear(self):
+        """Run finished"""
+        self.data = None
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+
+    def __init__(self, inventory_path, log_tag):
+        self.inventory_path = inventory_path
+        self.log_tag = log_tag
+        self.data = None
@@ -0,0 +1,34 @@
+import os
+import pathlib
+import sys
+from banknote import Banknote
+import storage
+
+# Maintenance that used to run on every download, now run by hand when needed:
+# delete duplicate snapshots of products and blobs no snapshot refers to anymore.
+# Don't run it while download-products.py is running, blobs are shared by all categories.
+# usage: clean-up-inventory.py [--categories=laptops,monitors] [--storage=sqlite]
+categories = ["laptops", "desktops", "monitors"]
+storage_backend = "folder"
+for arg in sys.argv:
+    if arg.startswith("--categories="):
+        categories = arg.split("=")[1].split(",")
+    elif arg.startswith("--storage="):
+        storage_backend = arg.split("=")[1]
+
+if storage_backend not in storage.BACKENDS:
+    print(f"Unknown storage: {storage_backend}")
+    sys.exit(1)
+
+folder = os.path.join(pathlib.Path(__file__).parent.resolve(), "inventory")
+for category in categories:
+    if not os.path.isdir(os.path.join(folder, category)):
+        print(f"No inventory found for {category}")
+        continue
+
+    inventory = Banknote(folder, category, storage_backend)
+    snapshots_deleted = inventory.delete_duplicate_snapshots()
+    blobs_deleted = inventory.storage.prune_blobs()
+    inventory.storage.commit()
+    inventory.storage.close()
+    print(f"{inventory.log_tag} Deleted {snapshots_deleted} duplicate snapshots and {blobs_deleted} unused blobs")
@@ -0,0 +1,126 @@
+import os
+import gzip
+import json
+from atomic_file import atomic_write
+
+# brotli is optional, .br siblings are only written when it's installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class ColumnarBuilder:
+    """Build the columnar layout of to_columnar one product at a time
+
+    Holds only the column values, so normalized products can be streamed through it.
+    """
+
+    def add(self, item):
+        for field, value in item.items():
+            if field not in self.columns:
+                # null for every product added before one with this field
+                self.columns[field] = [None] * self.count
+            self.columns[field].append(value)
+        self.count += 1
+        for values in self.columns.values():
+            if len(values) < self.count:
+                values.append(None)
+
+        for url in item.get('images', []):
+            self.image_prefix = url if self.image_count == 0 else os.path.commonprefix([self.image_prefix, url])
+            self.image_count += 1
+
+    def to_columnar(self, index_file_modification_timestamp):
+        image_prefix = self.image_prefix if self.image_count > 1 else ''
+        # only cut at a path boundary, so a prefix never eats part of a file name
+        image_prefix = image_prefix[:image_prefix.rfind('/') + 1]
+
+        columns = dict(self.columns)
+        if 'images' in columns:
+            columns['images'] = [[url[len(image_prefix):] for url in images] if images is not None else None for images in columns['images']]
+
+        return {
+            'index_file_modification_timestamp': index_file_modification_timestamp,
+            'count': self.count,
+            'image_prefix': image_prefix,
+            'columns': columns,
+        }
+
+    def __init__(self):
+        self.columns = {}
+        self.count = 0
+        self.image_prefix = ''
+        self.image_count = 0
+
+
+def to_columnar(inventory_dictionary):
+    """Convert normalized inventory to a compact columnar layout
+
+    Every field becomes a single array with one value per product
+    (null when a product doesn't have the field),
+    and the prefix shared by all image URLs is stored once.
+    """
+    builder = ColumnarBuilder()
+    for item in inventory_dictionary['inventory']:
+        builder.add(item)
+    return builder.to_columnar(inventory_dictionary['index_file_modification_timestamp'])
+
+
+def from_columnar(compact_dictionary):
+    """Inverse of to_columnar, fields that were missing are left out"""
+    columns = compact_dictionary['columns']
+    items = []
+    for row in range(compact_dictionary['count']):
+        item = {}
+        for field, values in columns.items():
+            value = values[row]
+            if value is None:
+                continue
+            if field == 'images':
+                value = [compact_dictionary['image_prefix'] + path for path in value]
+            item[field] = value
+        items.append(item)
+    return {
+        'index_file_modification_timestamp': compact_dictionary['index_file_modification_timestamp'],
+        'inventory': items,
+    }
+
+
+def dumps_compact(inventory_dictionary):
+    return dumps_columnar(to_columnar(inventory_dictionary))
+
+
+def dumps_columnar(compact_dictionary):
+    return json.dumps(compact_dictionary, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_precompressed(file_path):
+    """Write .gz and, if available, .br siblings of file_path for static serving
+
+    Returns dict of written paths keyed by encoding.
+    The file is compressed in chunks, it's never held in memory at once.
+    """
+    written = {}
+    # mtime=0 and no file name keep output identical for identical input
+    with atomic_write(f"{file_path}.gz", 'wb') as gz_file:
+        with gzip.GzipFile(filename='', mode='wb', compresslevel=9, fileobj=gz_file, mtime=0) as compressor:
+            for chunk in read_chunks(file_path):
+                compressor.write(chunk)
+    written['gzip'] = f"{file_path}.gz"
+
+    if brotli is not None:
+        with atomic_write(f"{file_path}.br", 'wb') as br_file:
+            compressor = brotli.Compressor(quality=11)
+            for chunk in read_chunks(file_path):
+                br_file.write(compressor.process(chunk))
+            br_file.write(compressor.finish())
+        written['br'] = f"{file_path}.br"
+
+    return written
+
+
+def read_chunks(file_path, chunk_size=1024 * 1024):
+    with open(file_path, 'rb') as source_file:
+        while chunk := source_file.read(chunk_size):
+            yield chunk
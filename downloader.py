@@ -0,0 +1,875 @@
+import glob
+import requests
+import json
+import os
+import time
+import math
+import signal
+import threading
+import html_extract
+import pathlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from banknote_client import BanknoteClient, RateLimiter
+from replay import FixtureRecorder
+from http_cache import HttpCache
+from atomic_file import atomic_write
+from product import Product
+from banknote import Banknote
+import storage
+import archive_writer
+import pytz
+import sentry_sdk
+import shutil
+import sys
+
+# Product download pipeline, run by download-products.py.
+# A single run (the default) updates every category once and exits,
+# --daemon keeps the process resident: the HTTP session, loaded storages
+# and latest snapshots stay in memory between cycles,
+# and every category is updated on its own interval.
+
+ROOT = pathlib.Path(__file__).parent.resolve()
+
+known_categories = [
+    {
+        'name': 'laptops',
+        'id': 8,
+    },
+    {
+        'name': 'desktops',
+        'id': 9,
+    },
+    {
+        'name': 'monitors',
+        'id': 11,
+    }
+]
+
+
+def init_sentry():
+    # Init Sentry before doing anything that might raise exception
+    try:
+        sentry_sdk.init(
+            dsn=pathlib.Path(os.path.join(ROOT, "sentry.dsn")).read_text(),
+            # Set traces_sample_rate to 1.0 to capture 100%
+            # of transactions for tracing.
+            traces_sample_rate=1.0,
+            # Set profiles_sample_rate to 1.0 to profile 100%
+            # of sampled transactions.
+            # We recommend adjusting this value in production.
+            profiles_sample_rate=1.0,
+        )
+    except:
+        pass
+
+
+def load_heartbeat_url():
+    """Better Stack heartbeat url, None if there's no token"""
+    try:
+        return pathlib.Path(os.path.join(ROOT, "heartbeat.url")).read_text().strip()
+    except:
+        return None
+
+
+def report_failure(heartbeat_url):
+    if heartbeat_url:
+        print(f"Reporting heartbeat to {heartbeat_url}/fail")
+        response = requests.get(f"{heartbeat_url}/fail")
+        if not response.ok:
+            print(f"Failed!")
+        print(f"Response: [{response.status_code}]")
+
+
+def report_success(heartbeat_url, client):
+    # Report success to Better Stack
+    if heartbeat_url:
+        print(f"Reporting heartbeat to {heartbeat_url}")
+        response = client.get(heartbeat_url)
+        if not response.ok:
+            print(f"Failed!")
+        print(f"Response: [{response.status_code}]")
+
+
+class Options:
+    """Command line options
+
+    --delay=15 in seconds; --categories=laptops,monitors
+    --rate=4 requests per minute, overrides --delay; --workers=2 requests in flight
+    --parallel-categories to run every category pipeline at the same time
+    --full-index-every=4 to stop paging the index at the first page unchanged since the previous crawl,
+      crawling every page only every 4th run; the shop isn't known to list changes first,
+      so changes on later pages go unseen until then. Default 1 crawls every page every run
+    --storage=sqlite to keep snapshots in inventory/<category>/inventory.sqlite3 instead of product folders
+    --inventory=/path/to/folder instead of inventory/ next to this script
+    --base-url=http://127.0.0.1:8765 to send shop requests to replay-server.py instead
+    --record=/path/to/fixtures to save every response for replay-server.py
+    --daemon to stay resident and update categories on their intervals
+    --interval=360,laptops:60 minutes between updates in daemon mode, for all or specific categories
+    --health-port=8081 to serve health status as JSON on localhost in daemon mode
+    --http-cache=/path/to/folder for cached shop pages instead of inventory/http_cache, "off" to disable
+    --http-cache-size=256 megabytes, least recently used pages are evicted above it
+    --http-cache-ttl=3600 seconds a cached product page is reused for, whatever its headers say
+    --time-budget=30 minutes a category run may spend fetching product pages, the rest waits for the next run
+    --revalidate-days=7 to fetch pages of products unchanged in the index for that long again
+    --revalidate-per-run=30 products at most, oldest first
+    --load-workers=4 processes reading stored snapshots of unchanged products, 1 reads them in this process
+    --archive-codec=deflate, bzip2 or lzma compression of zip archives
+    --archive-level=6 compression level of the codec, its default if not set
+    --archive-workers=4 threads compressing archive entries, 2 by default, up to 128 MB of memory each
+    --archive-size-cap=1024 megabytes of archives per category, oldest chains are deleted above it
+    --archive-keep-daily=14 days of daily archives to keep, with
+    --archive-keep-weekly=8 and --archive-keep-monthly=12 weeks and months of full archives
+    --change-feed-compact-days=30 after which change feed segments are folded into one event per product
+    """
+
+    DEFAULT_INTERVAL_MINUTES = 6 * 60
+
+    def __init__(self):
+        self.delay = 15
+        self.rate = None
+        self.workers = 1
+        self.parallel_categories = False
+        self.full_index_every = 1
+        self.storage_backend = "folder"
+        self.folder = os.path.join(ROOT, "inventory")
+        self.base_url = None
+        self.record_path = None
+        self.categories = ["laptops", "desktops", "monitors"]
+        self.daemon = False
+        self.interval_minutes = {}
+        self.default_interval_minutes = self.DEFAULT_INTERVAL_MINUTES
+        self.health_port = None
+        self.http_cache_path = None
+        self.http_cache_megabytes = 256
+        self.http_cache_ttl = 3600
+        self.time_budget_minutes = None
+        self.revalidate_days = 7
+        self.revalidate_per_run = 30
+        # a process pool hasn't been measured faster than reading in this process yet, see benchmarks/snapshot_loading.py
+        self.load_workers = 1
+        self.archive_codec = "deflate"
+        self.archive_level = None
+        self.archive_workers = 2
+        self.archive_size_cap_mb = 1024
+        self.archive_keep_daily = None
+        self.archive_keep_weekly = None
+        self.archive_keep_monthly = None
+        self.change_feed_compact_days = 30
+
+    @classmethod
+    def parse(cls, argv):
+        options = cls()
+        for arg in argv:
+            if arg.startswith("--delay="):
+                options.delay = int(arg.split("=")[1])
+            elif arg.startswith("--rate="):
+                options.rate = float(arg.split("=")[1])
+            elif arg.startswith("--workers="):
+                options.workers = int(arg.split("=")[1])
+            elif arg.startswith("--categories="):
+                options.categories = arg.split("=")[1].split(",")
+            elif arg == "--parallel-categories":
+                options.parallel_categories = True
+            elif arg.startswith("--storage="):
+                options.storage_backend = arg.split("=")[1]
+            elif arg.startswith("--full-index-every="):
+                options.full_index_every = int(arg.split("=")[1])
+            elif arg.startswith("--inventory="):
+                options.folder = os.path.abspath(arg.split("=", 1)[1])
+            elif arg.startswith("--base-url="):
+                options.base_url = arg.split("=", 1)[1]
+            elif arg.startswith("--record="):
+                options.record_path = arg.split("=", 1)[1]
+            elif arg == "--daemon":
+                options.daemon = True
+            elif arg.startswith("--interval="):
+                for interval in arg.split("=")[1].split(","):
+                    if ":" in interval:
+                        category_name, minutes = interval.split(":")
+                        options.interval_minutes[category_name] = float(minutes)
+                    else:
+                        options.default_interval_minutes = float(interval)
+            elif arg.startswith("--health-port="):
+                options.health_port = int(arg.split("=")[1])
+            elif arg.startswith("--http-cache="):
+                options.http_cache_path = arg.split("=", 1)[1]
+            elif arg.startswith("--http-cache-size="):
+                options.http_cache_megabytes = float(arg.split("=")[1])
+            elif arg.startswith("--http-cache-ttl="):
+                options.http_cache_ttl = int(arg.split("=")[1])
+            elif arg.startswith("--time-budget="):
+                options.time_budget_minutes = float(arg.split("=")[1])
+            elif arg.startswith("--revalidate-days="):
+                options.revalidate_days = float(arg.split("=")[1])
+            elif arg.startswith("--revalidate-per-run="):
+                options.revalidate_per_run = int(arg.split("=")[1])
+            elif arg.startswith("--load-workers="):
+                options.load_workers = int(arg.split("=")[1])
+            elif arg.startswith("--archive-codec="):
+                options.archive_codec = arg.split("=")[1]
+            elif arg.startswith("--archive-level="):
+                options.archive_level = int(arg.split("=")[1])
+            elif arg.startswith("--archive-workers="):
+                options.archive_workers = int(arg.split("=")[1])
+            elif arg.startswith("--archive-size-cap="):
+                options.archive_size_cap_mb = float(arg.split("=")[1])
+            elif arg.startswith("--archive-keep-daily="):
+                options.archive_keep_daily = int(arg.split("=")[1])
+            elif arg.startswith("--archive-keep-weekly="):
+                options.archive_keep_weekly = int(arg.split("=")[1])
+            elif arg.startswith("--archive-keep-monthly="):
+                options.archive_keep_monthly = int(arg.split("=")[1])
+            elif arg.startswith("--change-feed-compact-days="):
+                options.change_feed_compact_days = float(arg.split("=")[1])
+
+        # --delay is the legacy way of setting the request budget,
+        # one request every `delay` seconds
+        if options.rate is None and options.delay > 0:
+            options.rate = 60 / options.delay
+        if options.http_cache_path is None:
+            options.http_cache_path = os.path.join(options.folder, "http_cache")
+        return options
+
+    def validate(self):
+        """Error message about the first invalid option, None if all are fine"""
+        for category in self.categories + list(self.interval_minutes):
+            if not any(c['name'] == category for c in known_categories):
+                return f"Unknown category: {category}"
+        if self.storage_backend not in storage.BACKENDS:
+            return f"Unknown storage: {self.storage_backend}"
+        if self.archive_codec not in archive_writer.CODECS:
+            return f"Unknown archive codec: {self.archive_codec}"
+        return None
+
+    def interval_seconds(self, category_name):
+        return self.interval_minutes.get(category_name, self.default_interval_minutes) * 60
+
+
+# prevent multiple instances of the script from processing the same category at the same time,
+# locks live in the inventory folder, so runs against another --inventory don't block each other
+def lock_file_path(folder, category_name):
+    return os.path.join(folder, f"download-products_{category_name}.lock")
+
+def lock_holder_is_gone(path):
+    """True if the lock file names a process that no longer runs"""
+    try:
+        with open(path) as lock_file:
+            pid = int(lock_file.read().strip())
+    except (OSError, ValueError):
+        return False # written by an older version, without pid
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass # running under another user
+    return False
+
+def acquire_lock(folder, category_name):
+    """Create lock file of a category, return False if another instance holds it"""
+    path = lock_file_path(folder, category_name)
+    if os.path.isfile(path):
+        # if the instance holding it crashed or lockfile is older than 24h, recreate it
+        if lock_holder_is_gone(path):
+            print(f"[Lock/{category_name}] Instance holding the lock file is gone, taking over")
+            os.remove(path)
+        elif os.path.getmtime(path) < time.time() - 60 * 60 * 24:
+            os.remove(path)
+        else:
+            if sys.gettrace(): # https://stackoverflow.com/a/72977762/5337349
+                print(f"[Lock/{category_name}] Lock file ignored due to debugging")
+            else:
+                print(f"[Lock/{category_name}] Another instance of the script is processing this category")
+                return False
+    with open(path, "w") as lock_file:
+        lock_file.write(str(os.getpid()))
+    return True
+
+def release_lock(folder, category_name):
+    os.remove(lock_file_path(folder, category_name))
+
+
+def prepare_inventory_folder(folder):
+    for category in known_categories:
+        os.makedirs(os.path.join(folder, category['name'], "archives"), exist_ok=True)
+        os.makedirs(os.path.join(folder, category['name'], "products"), exist_ok=True)
+
+    # TODO: Remove this migration code after the first prod deployment
+    # If there's no inventory/laptops/index.json dir, migrate from the legacy structure, assuming the old data is only about laptops
+    first_category_name = known_categories[0]['name']
+    if not os.path.isfile(os.path.join(folder, first_category_name, "index.json")):
+        print("Migrating legacy data, if any, to the new structure")
+        for archive_file in glob.glob(os.path.join(folder, "archives", "*.zip")):
+            new_file_name = os.path.join(folder, first_category_name, "archives", os.path.basename(archive_file))
+            print(f"Moving {archive_file} to {new_file_name}")
+            shutil.move(archive_file, os.path.join(folder, first_category_name, "archives", os.path.basename(archive_file)))
+        for product_dir in glob.glob(os.path.join(folder, Product.FOLDER_NAME, "*")):
+            if os.path.isdir(product_dir):
+                new_dir_name = os.path.join(folder, first_category_name, Product.FOLDER_NAME, os.path.basename(product_dir))
+                print(f"Moving {product_dir} to {new_dir_name}")
+                shutil.move(product_dir, new_dir_name)
+        print("Migration done")
+
+
+class Downloader:
+    """Category pipelines sharing one client and request budget
+
+    Banknote inventories, with their loaded storage and latest snapshots,
+    are created once and reused by every run of the same Downloader.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        rate_limiter = RateLimiter(options.rate, burst=options.workers) if options.rate else None
+        if rate_limiter:
+            print(f"Rate limit: {options.rate:g} requests per minute, {options.workers} in flight")
+        recorder = FixtureRecorder(options.record_path) if options.record_path else None
+        if options.base_url:
+            print(f"Sending shop requests to {options.base_url}")
+        # Restarted and overlapping runs reuse pages fetched by earlier ones
+        cache = None
+        if options.http_cache_path != "off":
+            cache = HttpCache(options.http_cache_path, int(options.http_cache_megabytes * 1024 * 1024))
+        self.client = BanknoteClient(rate_limiter=rate_limiter, workers=options.workers, base_url=options.base_url, recorder=recorder, cache=cache)
+        self.product_categories = None
+        self.inventories = {}
+        self.started_at = self.now()
+        self.status = {category_name: self.initial_status() for category_name in options.categories}
+        self.status_lock = threading.Lock()
+        self.stopping = threading.Event()
+
+    @staticmethod
+    def now():
+        return datetime.now(tz=pytz.timezone('GMT')).isoformat()
+
+    @staticmethod
+    def initial_status():
+        return {
+            'running': False,
+            'last_started_at': None,
+            'last_succeeded_at': None,
+            'last_failed_at': None,
+            'last_error': None,
+            'consecutive_failures': 0,
+            'next_run_at': None,
+        }
+
+    def update_status(self, category_name, **values):
+        with self.status_lock:
+            self.status[category_name].update(values)
+
+    def record_failure(self, category_name, error):
+        with self.status_lock:
+            self.status[category_name].update(last_failed_at=self.now(), last_error=error)
+            self.status[category_name]['consecutive_failures'] += 1
+
+    def health(self):
+        """Status of every category, healthy unless the latest run of some category failed"""
+        with self.status_lock:
+            categories = {name: dict(status) for name, status in self.status.items()}
+        healthy = all(status['consecutive_failures'] == 0 for status in categories.values())
+        return {'healthy': healthy, 'started_at': self.started_at, 'categories': categories}
+
+    def inventory(self, category_name):
+        if category_name not in self.inventories:
+            inventory = Banknote(self.options.folder, category_name, self.options.storage_backend)
+            inventory.fetch_schedule.revalidate_days = self.options.revalidate_days
+            inventory.fetch_schedule.revalidate_per_run = self.options.revalidate_per_run
+            inventory.archive_codec = self.options.archive_codec
+            inventory.archive_level = self.options.archive_level
+            inventory.archive_workers = self.options.archive_workers
+            inventory.archive_size_cap_mb = self.options.archive_size_cap_mb
+            inventory.archive_keep_daily = self.options.archive_keep_daily
+            inventory.archive_keep_weekly = self.options.archive_keep_weekly
+            inventory.archive_keep_monthly = self.options.archive_keep_monthly
+            inventory.change_feed.compact_after_days = self.options.change_feed_compact_days
+            self.inventories[category_name] = inventory
+        return self.inventories[category_name]
+
+    def fetch_product_categories(self):
+        # On February 27th 2026 i discovered that laptop category (8)
+        # now requires childrenCategories IDs passed to filter-products endpoint,
+        # otherwise it only returns 3 products.
+        # Desktops and monitors categories are unaffected.
+        print(f"Fetching category structure")
+        r = self.client.get('https://veikals.banknote.lv/')
+        index_contents = r.text
+        product_categories_data = html_extract.extract_attribute(index_contents, 'product-categories', ':categories')
+        self.product_categories = json.loads(product_categories_data)
+
+    def download_index(self, inventory):
+        log_tag = "[DL/{}]".format(inventory.category_name)
+        product_index = []
+
+        print(f"{log_tag} Downloading first page...")
+        index_url = 'https://veikals.banknote.lv/lv/filter-products'
+        category_id = next(c['id'] for c in known_categories if c['name'] == inventory.category_name)
+        index_params = {'categories_id': category_id, 'per_page': 120}
+
+        # helper to walk the category tree and return the node matching `id`
+        def find_category_node(nodes, target_id):
+            for node in nodes:
+                if node.get('id') == target_id:
+                    return node
+                child = find_category_node(node.get('childrenCategories', []), target_id)
+                if child:
+                    return child
+            return None
+
+        # Since Late February 2026,
+        # if a category contains childrenCategories
+        # replace categories_id value with a comma separated list of children category ids
+        node = find_category_node(self.product_categories, category_id)
+        if node:
+            children = node.get('childrenCategories', [])
+            if children:
+                index_params['categories_id'] = ",".join(str(c['id']) for c in children)
+
+        # Previous crawl is the baseline for conditional requests, early stopping and the diff
+        cached_index = inventory.load_cached_index()
+        index_state = inventory.load_index_state()
+        full_crawl = cached_index is None or index_state['runs_since_full_crawl'] + 1 >= self.options.full_index_every
+        conditional_headers = {}
+        if not full_crawl:
+            if index_state.get('etag'):
+                conditional_headers['If-None-Match'] = index_state['etag']
+            if index_state.get('last_modified'):
+                conditional_headers['If-Modified-Since'] = index_state['last_modified']
+
+        # https://requests.readthedocs.io/en/latest/user/quickstart/#passing-parameters-in-urls
+        first_page_response = self.client.get(index_url, params={**index_params, 'page': 1}, headers=conditional_headers, stats=inventory.stats)
+        if first_page_response.status_code == 304:
+            print(f"{log_tag} Index not modified since previous crawl, reusing {inventory.index_file_path}")
+            index_state['runs_since_full_crawl'] += 1
+            inventory.save_index_state(index_state)
+            inventory.write_index_diff(cached_index, cached_index)
+            os.utime(inventory.index_file_path)
+            return cached_index, os.path.getmtime(inventory.index_file_path)
+
+        first_page = first_page_response.json()
+        product_index.extend(first_page['data'])
+
+        last_page_number = first_page['last_page']
+        per_page = index_params['per_page']
+        print(f"{log_tag} Total amount of pages: {last_page_number}{' (full crawl)' if full_crawl else ''}")
+
+        def matches_cached_page(page_number, page_data):
+            """Page is identical to the same page of previous crawl and total count didn't change"""
+            if full_crawl or first_page.get('total') != index_state.get('total'):
+                return False
+            return page_data == cached_index[(page_number - 1) * per_page:page_number * per_page]
+
+        stopped_at_page_number = 1 if matches_cached_page(1, first_page['data']) else None
+
+        print(f"{log_tag} Downloading page:", end='', flush=True)
+        page_numbers = list(range(2, last_page_number+1))
+        # Fetch as many pages at once as the client keeps in flight,
+        # but check them in order to stop at the first unchanged one
+        while stopped_at_page_number is None and len(page_numbers) > 0:
+            batch, page_numbers = page_numbers[:self.client.workers], page_numbers[self.client.workers:]
+            page_responses = self.client.get_many([index_url] * len(batch), params_list=[{**index_params, 'page': page_number} for page_number in batch], stats=inventory.stats)
+            for page_number, r in zip(batch, page_responses):
+                print(f" #{page_number}", end='', flush=True)
+                extra_page = r.json()
+                product_index.extend(extra_page['data'])
+                if matches_cached_page(page_number, extra_page['data']):
+                    stopped_at_page_number = page_number
+                    break
+        print(f" DONE!", flush=True)
+
+        if stopped_at_page_number is not None:
+            print(f"{log_tag} Page #{stopped_at_page_number} matches previous crawl, reusing the rest of {inventory.index_file_path}")
+            product_index = product_index[:stopped_at_page_number * per_page] + cached_index[stopped_at_page_number * per_page:]
+
+        index_state = {
+            'etag': first_page_response.headers.get('ETag'),
+            'last_modified': first_page_response.headers.get('Last-Modified'),
+            'total': first_page.get('total'),
+            'runs_since_full_crawl': 0 if full_crawl else index_state['runs_since_full_crawl'] + 1,
+        }
+        inventory.save_index_state(index_state)
+        inventory.write_index_diff(cached_index or [], product_index)
+
+        # https://www.geeksforgeeks.org/reading-and-writing-json-to-a-file-in-python/
+        print(f"{log_tag} Dumping {len(product_index)} products to {inventory.index_file_path}")
+        with atomic_write(inventory.index_file_path, "w") as index_file:
+            json.dump(product_index, index_file, indent=2)
+        return product_index, os.path.getmtime(inventory.index_file_path)
+
+    def load_index(self, inventory, resumed_index_timestamp=None):
+        """Index of a category and its modification timestamp, downloaded when older than an hour
+
+        The index an unfinished run started with, identified by `resumed_index_timestamp`,
+        is reused whatever its age.
+        """
+        # Keep cache of entire category inventory in RAM
+        product_index = []
+        log_tag = "[Load/{}]".format(inventory.category_name)
+
+        if resumed_index_timestamp is not None and os.path.isfile(inventory.index_file_path):
+            if os.path.getmtime(inventory.index_file_path) == resumed_index_timestamp:
+                product_index = inventory.load_cached_index()
+                if product_index is not None:
+                    print(f"{log_tag} Reusing {inventory.index_file_name} of the unfinished run")
+                    return product_index, resumed_index_timestamp
+
+        # Update inventory index if necessary
+        if not os.path.isfile(inventory.index_file_path):
+            product_index, index_file_modification_timestamp = self.download_index(inventory)
+        else:
+            try:
+                # Check index file age
+                INDEX_FILE_MAX_AGE_MINUTES = 55
+                index_file_modification_timestamp = os.path.getmtime(inventory.index_file_path)
+                current_timestamp = time.time()
+                index_file_age_seconds = current_timestamp - index_file_modification_timestamp
+                index_file_age_minutes = math.floor(index_file_age_seconds / 60)
+                print(f"{log_tag} Index file is {index_file_age_minutes} minutes old")
+
+                if index_file_age_minutes < INDEX_FILE_MAX_AGE_MINUTES:
+                    print(f"{log_tag} Loading inventory from {inventory.index_file_name}")
+                    index_file = open(inventory.index_file_path)
+                    product_index = json.load(index_file)
+                    print(f"{log_tag} Loaded {len(product_index)} products from {inventory.index_file_path}")
+                else:
+                    product_index, index_file_modification_timestamp = self.download_index(inventory)
+            except:
+                print(f"{log_tag} Failed to parse index file, redownloading")
+                product_index, index_file_modification_timestamp = self.download_index(inventory)
+
+        return product_index, index_file_modification_timestamp
+
+    # Downloaded product data is committed to storage this often, for restarted runs
+    CHECKPOINT_EVERY_ITEMS = 25
+
+    def save_progress(self, inventory):
+        inventory.storage.commit()
+        inventory.checkpoint.save()
+
+    def remove_from_index(self, inventory, product_index, item, reason):
+        product_index.remove(item)
+        inventory.checkpoint.add_removed(item['id'], reason)
+
+    def collect_details(self, inventory, product_index, deadline=None):
+        """Banknote.product_details of every product in the index, downloading changed ones
+
+        Page properties are reduced to what normalized.json needs as soon as they are read,
+        so full properties of every product are never held at once.
+
+        Pages are fetched in the order of FetchSchedule, until `deadline` (time.monotonic() value).
+        Products that turn out to be gone are removed from product_index,
+        new products whose page wasn't fetched before the deadline are left out of this run.
+        """
+        log_tag = "[Load/{}]".format(inventory.category_name)
+        schedule = inventory.fetch_schedule
+        schedule.load()
+
+        # Load additional properties absent in index
+        details = {}
+        with inventory.stats.phase('lookup'):
+            new_items = []
+            stored_items = []
+            for item in product_index:
+                product = inventory.product(item['id'])
+                if not product.has_snapshots:
+                    new_items.append((item, product))
+                    continue
+                product.update_last_seen_value()
+                stored_items.append((item, product))
+
+            # Used as is unless the page is fetched again
+            details.update(inventory.load_latest_details([product for _, product in stored_items], self.options.load_workers))
+            repriced_items = [(item, product) for item, product in stored_items if item['price'] != details[item['id']]['price']]
+            unchanged_items = [(item, product) for item, product in stored_items if item['price'] == details[item['id']]['price']]
+            inventory.retain_latest_details(item['id'] for item in product_index)
+            schedule.retain(item['id'] for item in product_index)
+
+            # If multiple items are added to inventory between downloader executions,
+            # download item files in the order of "article",
+            # to avoid listing these items in order reverse of item addition to inventory.
+            # Unless we sort index before downloading item files,
+            # order of every batch will be overridden by file modification date.
+            items_to_download = schedule.order(new_items, repriced_items, unchanged_items)
+            revalidated_count = len(items_to_download) - len(new_items) - len(repriced_items)
+            inventory.stats.count('products_unchanged', len(unchanged_items) - revalidated_count)
+            inventory.stats.count('products_to_download', len(items_to_download))
+            inventory.stats.count('products_new', len(new_items))
+            inventory.stats.count('products_repriced', len(repriced_items))
+            inventory.stats.count('products_revalidated', revalidated_count)
+
+        def fetch_pages():
+            # Revalidation must not be answered by pages cached within --http-cache-ttl
+            for min_fresh_seconds, batch in [
+                (self.options.http_cache_ttl, [entry for entry in items_to_download if entry[0] != schedule.REVALIDATE]),
+                (0, [entry for entry in items_to_download if entry[0] == schedule.REVALIDATE]),
+            ]:
+                yield from zip(batch, self.client.get_many([item['url'] for _, item, _ in batch], allow_redirects=False, stats=inventory.stats, min_fresh_seconds=min_fresh_seconds, deadline=deadline))
+
+        # Pages are fetched ahead by the client's worker pool within the rate limit,
+        # but handed back in the scheduled order
+        print(f"{log_tag} Details to download: {len(new_items)} new, {len(repriced_items)} repriced, "
+              f"{revalidated_count} to revalidate")
+        deferred_count = 0
+        with inventory.stats.phase('details'):
+            for position, ((reason, item, product), r) in enumerate(fetch_pages()):
+                if position > 0 and position % self.CHECKPOINT_EVERY_ITEMS == 0:
+                    schedule.save()
+                    self.save_progress(inventory)
+                if r is None:
+                    # Out of time budget, stored snapshots are used until the next run
+                    deferred_count += 1
+                    if reason == schedule.NEW:
+                        product_index.remove(item)
+                    continue
+                print(f"{log_tag} Downloading details of {item['id']} ({reason}): {item['title']}")
+                print(f"{log_tag} Fetched {item['url']}")
+
+                if r.status_code == 301:
+                    print(f"{log_tag} Redirected to {r.headers['Location']}, removing from index")
+                    self.remove_from_index(inventory, product_index, item, 'redirected')
+                    continue
+                html_contents = r.text
+                # Old frontend template (before Oct 9 2024) keeps data in product-item-leasing,
+                # new frontend template (since Oct 9 2024) in buy-now-btn
+                with inventory.stats.timer('parse'):
+                    product_data = html_extract.extract_product_data(html_contents)
+                if getattr(r, 'from_cache', False) and product_data and json.loads(product_data).get('price') != item['price']:
+                    print(f"{log_tag} Cached page of {item['id']} predates its price in the index, fetching again")
+                    r = self.client.get(item['url'], allow_redirects=False, stats=inventory.stats)
+                    if r.status_code == 301:
+                        print(f"{log_tag} Redirected to {r.headers['Location']}, removing from index")
+                        self.remove_from_index(inventory, product_index, item, 'redirected')
+                        continue
+                    with inventory.stats.timer('parse'):
+                        product_data = html_extract.extract_product_data(r.text)
+                if product_data is None:
+                    print(f"{log_tag} Page for {item['id']} has no info, probably sold, removing from index")
+                    self.remove_from_index(inventory, product_index, item, 'sold')
+                    continue
+
+                if product_data:
+                    product_properties = json.loads(product_data)
+                    if reason == schedule.REVALIDATE and inventory.storage.snapshot_hash(product.id, product.latest_timestamp) != product.content_hash(product_properties):
+                        print(f"{log_tag} Page of {item['id']} changed without a price change")
+                        inventory.stats.count('revalidation_changes')
+                    with inventory.stats.timer('save_snapshots'):
+                        product.save_snapshot(product_properties)
+                    details[item['id']] = inventory.product_details(product_properties, product.latest_file_datetime)
+                    product.update_last_seen_value()
+                    schedule.mark_fetched(item['id'])
+                else:
+                    print(f"{log_tag} Page of item {item['id']} does not contain item information, removing from index")
+                    self.remove_from_index(inventory, product_index, item, 'no_information')
+
+        if deferred_count > 0:
+            print(f"{log_tag} Time budget ran out, {deferred_count} pages left for the next run")
+            inventory.stats.count('products_deferred', deferred_count)
+        schedule.save()
+        return details
+
+    @staticmethod
+    def unique_items(product_index):
+        """Index without repeated products, first occurrence wins
+
+        Pages shifting while a slow crawl is running list some products twice.
+        """
+        seen_ids = set()
+        for item in product_index:
+            if item['id'] not in seen_ids:
+                seen_ids.add(item['id'])
+                yield item
+
+    def normalized_items(self, product_index, details):
+        """Normalize data for use in frontend, one product at a time
+
+        Details of a product are dropped once it's normalized.
+        """
+        for item in product_index:
+            n_item = { 'article': item['article'] }
+            n_item['id'] = item['id']
+            n_item['title'] = item['title']
+            n_item['price'] = float(item['price'])
+
+            product_details = details.pop(item['id'])
+            n_item = {**n_item, **product_details['specs']}
+
+            address_components = item['branche']['address'].split('<br>')
+            if len(address_components) < 2:
+                address_components = item['branche']['address'].split(',')
+
+            n_item['city'] = address_components[0].strip(' ,')
+            n_item['local_address'] = address_components[1].strip(' ,')
+
+            n_item['url'] = item['url']
+
+            n_item['images'] = product_details['images']
+            n_item['timestamp'] = product_details['timestamp']
+
+            yield n_item
+
+    def update_inventory(self, inventory):
+        """Run every stage of a category pipeline, skipping stages an interrupted run has finished"""
+        checkpoint = inventory.checkpoint
+        checkpoint.load()
+        deadline = time.monotonic() + self.options.time_budget_minutes * 60 if self.options.time_budget_minutes else None
+        with inventory.stats.phase('index'):
+            product_index, index_file_modification_timestamp = self.load_index(inventory, checkpoint.index_timestamp)
+        checkpoint.start(index_file_modification_timestamp)
+
+        if not checkpoint.is_done('dump'):
+            removed_ids = checkpoint.removed_ids
+            product_index = [item for item in self.unique_items(product_index) if item['id'] not in removed_ids]
+            details = self.collect_details(inventory, product_index, deadline)
+            self.save_progress(inventory)
+
+            with inventory.stats.phase('dump'):
+                inventory.dump_normalized_inventory(index_file_modification_timestamp, self.normalized_items(product_index, details), checkpoint.removal_reasons)
+            checkpoint.mark_done('dump')
+
+        if not checkpoint.is_done('prune'):
+            with inventory.stats.phase('prune'):
+                inventory.delete_legacy_data()
+                inventory.prune_products_folder()
+                inventory.storage.commit()
+            checkpoint.mark_done('prune')
+        if not checkpoint.is_done('price_history'):
+            with inventory.stats.phase('price_history'):
+                inventory.update_price_history()
+            checkpoint.mark_done('price_history')
+        if not checkpoint.is_done('archive'):
+            with inventory.stats.phase('archive'):
+                inventory.prune_archive_folder()
+                inventory.archive_inventory()
+        checkpoint.clear()
+
+        inventory.print_stats()
+
+    def run_category(self, category_name):
+        """Update a category under its lock, return True on success
+
+        Failures are reported to Sentry and logged,
+        but don't abort pipelines of other categories.
+        """
+        if not acquire_lock(self.options.folder, category_name):
+            self.record_failure(category_name, "Locked by another instance")
+            return False
+
+        inventory = self.inventory(category_name)
+        self.update_status(category_name, running=True, last_started_at=self.now())
+        try:
+            with inventory.stats.run(f"update_inventory {category_name}"):
+                self.update_inventory(inventory)
+            self.update_status(category_name, last_succeeded_at=self.now(), last_error=None, consecutive_failures=0)
+            return True
+        except Exception as e:
+            sentry_sdk.capture_exception(e)
+            print(f"[Load/{category_name}] Failed: {e!r}")
+            self.record_failure(category_name, repr(e))
+            return False
+        finally:
+            self.update_status(category_name, running=False)
+            release_lock(self.options.folder, category_name)
+
+    def run_once(self, category_names):
+        """Update categories once, return names of failed ones"""
+        try:
+            self.fetch_product_categories()
+        except Exception as e:
+            sentry_sdk.capture_exception(e)
+            print(f"Failed to fetch category structure: {e!r}")
+            for category_name in category_names:
+                self.record_failure(category_name, repr(e))
+            return list(category_names)
+
+        if self.options.parallel_categories:
+            # Network waits of one category overlap with parsing, dumping and archiving of others,
+            # the shared client keeps the request budget global
+            with ThreadPoolExecutor(max_workers=max(1, len(category_names)), thread_name_prefix='Category') as executor:
+                results = list(executor.map(self.run_category, category_names))
+        else:
+            results = [self.run_category(category_name) for category_name in category_names]
+        return [category_name for category_name, succeeded in zip(category_names, results) if not succeeded]
+
+    def run_daemon(self, heartbeat_url=None):
+        """Update every category on its interval until stop() is called"""
+        next_run_at = {category_name: time.time() for category_name in self.options.categories}
+        while not self.stopping.is_set():
+            due = [category_name for category_name, at in next_run_at.items() if at <= time.time()]
+            if len(due) == 0:
+                self.stopping.wait(min(next_run_at.values()) - time.time())
+                continue
+
+            failed_categories = self.run_once(due)
+            for category_name in due:
+                next_run_at[category_name] = time.time() + self.options.interval_seconds(category_name)
+                next_run = datetime.fromtimestamp(next_run_at[category_name], tz=pytz.timezone('GMT'))
+                self.update_status(category_name, next_run_at=next_run.isoformat())
+            if failed_categories:
+                print(f"Failed categories: {', '.join(failed_categories)}")
+                report_failure(heartbeat_url)
+            else:
+                report_success(heartbeat_url, self.client)
+        print("Daemon stopped")
+
+    def stop(self):
+        """Stop the daemon once the categories being updated are done"""
+        self.stopping.set()
+
+
+class HealthRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        health = self.server.downloader.health()
+        contents = json.dumps(health, indent=2).encode('utf-8')
+        self.send_response(200 if health['healthy'] else 503)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(contents)))
+        self.end_headers()
+        self.wfile.write(contents)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_health(downloader, port):
+    """Serve Downloader.health() on localhost from a background thread"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), HealthRequestHandler)
+    server.daemon_threads = True
+    server.downloader = downloader
+    threading.Thread(target=server.serve_forever, name='Health', daemon=True).start()
+    print(f"Serving health status on http://127.0.0.1:{port}/")
+    return server
+
+
+def main(argv):
+    init_sentry()
+    heartbeat_url = load_heartbeat_url()
+
+    options = Options.parse(argv)
+    error = options.validate()
+    if error:
+        print(error)
+        report_failure(heartbeat_url)
+        sys.exit(1)
+
+    prepare_inventory_folder(options.folder)
+    downloader = Downloader(options)
+
+    if options.daemon:
+        if options.health_port:
+            serve_health(downloader, options.health_port)
+        # systemd stops services with SIGTERM
+        signal.signal(signal.SIGTERM, lambda signum, frame: downloader.stop())
+        try:
+            downloader.run_daemon(heartbeat_url)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    failed_categories = downloader.run_once(options.categories)
+    if failed_categories:
+        print(f"Failed categories: {', '.join(failed_categories)}")
+        report_failure(heartbeat_url)
+        sys.exit(1)
+    report_success(heartbeat_url, downloader.client)
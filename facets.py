@@ -0,0 +1,67 @@
+import math
+
+# Fields the frontend filters on by picking a value
+VALUE_FIELDS = ['city', 'defect', 'cpu', 'gpu', 'os', 'motherboard', 'resolution', 'panel']
+# Numeric fields the frontend filters on by range, see numeric_fields.py
+RANGE_FIELDS = ['price', 'ram_gb', 'storage_gb', 'size_in', 'refresh_hz', 'resolution_width', 'resolution_height']
+# Equal-width histogram buckets per range field
+BUCKET_COUNT = 10
+
+
+class FacetBuilder:
+    """Build facets.json of a category one normalized product at a time
+
+    For every field of VALUE_FIELDS: distinct values with product count and sorted product ids,
+    most common first. For every field of RANGE_FIELDS: min, max and a histogram
+    of BUCKET_COUNT equal-width buckets with product ids.
+    Fields no product has are left out, so every category only gets its own.
+    """
+
+    VERSION = 1
+
+    def add(self, item):
+        id = item['id']
+        for field in VALUE_FIELDS:
+            value = item.get(field)
+            if value is not None and value != "":
+                self.values.setdefault(field, {}).setdefault(value, []).append(id)
+        for field in RANGE_FIELDS:
+            value = item.get(field)
+            if isinstance(value, (int, float)) and not math.isnan(value):
+                self.numbers.setdefault(field, []).append((value, id))
+        self.count += 1
+
+    @staticmethod
+    def histogram(numbers):
+        minimum = min(value for value, _ in numbers)
+        maximum = max(value for value, _ in numbers)
+        bucket_count = BUCKET_COUNT if maximum > minimum else 1
+        width = (maximum - minimum) / bucket_count
+        buckets = [{'start': minimum + width * i, 'end': minimum + width * (i + 1), 'count': 0, 'ids': []} for i in range(bucket_count)]
+        buckets[-1]['end'] = maximum
+        for value, id in numbers:
+            # maximum belongs to the last bucket, every other bucket includes its start only
+            bucket = buckets[min(int((value - minimum) / width), bucket_count - 1) if width > 0 else 0]
+            bucket['count'] += 1
+            bucket['ids'].append(id)
+        for bucket in buckets:
+            bucket['ids'].sort()
+        return {'min': minimum, 'max': maximum, 'buckets': buckets}
+
+    def to_facets(self, index_file_modification_timestamp):
+        values = {}
+        for field, ids_by_value in self.values.items():
+            entries = [{'value': value, 'count': len(ids), 'ids': sorted(ids)} for value, ids in ids_by_value.items()]
+            values[field] = sorted(entries, key=lambda entry: (-entry['count'], str(entry['value'])))
+        return {
+            'version': self.VERSION,
+            'index_file_modification_timestamp': index_file_modification_timestamp,
+            'count': self.count,
+            'values': values,
+            'ranges': {field: self.histogram(numbers) for field, numbers in self.numbers.items()},
+        }
+
+    def __init__(self):
+        self.count = 0
+        self.values = {}
+        self.numbers = {}
@@ -0,0 +1,80 @@
+import os
+import json
+import time
+from operator import itemgetter
+from atomic_file import atomic_write
+
+
+class FetchSchedule:
+    """Order in which product pages of a category are fetched
+
+    New products come first, then products whose index price changed,
+    then products whose page wasn't fetched for `revalidate_days`,
+    oldest first and at most `revalidate_per_run` of them,
+    to catch spec edits that don't change the price.
+    Keeps the time every product page was last fetched,
+    products without one count as fetched when their latest snapshot was taken.
+    """
+
+    FILE_NAME = 'fetch_schedule.json'
+    VERSION = 1
+
+    NEW = 'new'
+    REPRICED = 'repriced'
+    REVALIDATE = 'revalidate'
+
+    @property
+    def path(self):
+        return os.path.join(self.inventory_path, self.FILE_NAME)
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as schedule_file:
+                data = json.load(schedule_file)
+            if data.get('version') == self.VERSION:
+                self.fetched_at = {int(id): timestamp for id, timestamp in data['fetched_at'].items()}
+                return
+        except (OSError, ValueError):
+            pass
+        self.fetched_at = {}
+
+    def save(self):
+        with atomic_write(self.path, "w", encoding='utf-8') as schedule_file:
+            json.dump({'version': self.VERSION, 'fetched_at': self.fetched_at}, schedule_file, separators=(',', ':'))
+
+    def last_fetched(self, product):
+        """Epoch seconds the page of a product was last fetched"""
+        if product.id in self.fetched_at:
+            return self.fetched_at[product.id]
+        return product.latest_file_datetime.timestamp()
+
+    def mark_fetched(self, id):
+        self.fetched_at[id] = time.time()
+
+    def retain(self, ids):
+        """Forget products that left the index"""
+        ids = set(ids)
+        self.fetched_at = {id: timestamp for id, timestamp in self.fetched_at.items() if id in ids}
+
+    def order(self, new, repriced, unchanged):
+        """Items to fetch as (reason, item, product) tuples, most valuable first
+
+        `new` and `repriced` are (item, product) pairs, fetched in the order of "article",
+        `unchanged` ones are only fetched when due for revalidation.
+        """
+        by_article = lambda pair: pair[0]['article']
+        due_before = time.time() - self.revalidate_days * 24 * 60 * 60
+        due = [(self.last_fetched(product), item, product) for item, product in unchanged]
+        due = sorted((entry for entry in due if entry[0] < due_before), key=itemgetter(0))
+        return (
+            [(self.NEW, item, product) for item, product in sorted(new, key=by_article)]
+            + [(self.REPRICED, item, product) for item, product in sorted(repriced, key=by_article)]
+            + [(self.REVALIDATE, item, product) for _, item, product in due[:self.revalidate_per_run]]
+        )
+
+    def __init__(self, inventory_path, log_tag, revalidate_days=7, revalidate_per_run=30):
+        self.inventory_path = inventory_path
+        self.log_tag = log_tag
+        self.revalidate_days = revalidate_days
+        self.revalidate_per_run = revalidate_per_run
+        self.fetched_at = {}
@@ -0,0 +1,139 @@
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+
+# lxml is optional, the standard library scanner is used without it
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Product pages are parsed only to read a single attribute.
+# Instead of building a whole BeautifulSoup tree,
+# scan start tags and stop as soon as the answer is known.
+# BeautifulSoup is kept as the fallback when the fast path finds nothing.
+
+LXML_CHUNK_SIZE = 64 * 1024
+
+
+class StopScanning(Exception):
+    pass
+
+
+class TagScanner(HTMLParser):
+    """Collect attributes of the first occurrence of each tag in `tag_names`
+
+    `is_done(found)` is called after each hit, parsing stops once it returns True.
+    """
+
+    def __init__(self, tag_names, is_done):
+        super().__init__(convert_charrefs=True)
+        self.tag_names = set(tag_names)
+        self.is_done = is_done
+        self.found = {}
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.tag_names and tag not in self.found:
+            self.found[tag] = dict(attrs)
+            if self.is_done(self.found):
+                raise StopScanning()
+
+
+def present_tag_names(html, tag_names):
+    """Tags that may be in the document: a tag can't be there if its name isn't"""
+    lower_html = html.lower()
+    return [name for name in tag_names if f"<{name}" in lower_html]
+
+
+def scan_tags(html, tag_names, is_done=None):
+    """Attributes of the first occurrence of each of tag_names, dict keyed by tag name"""
+    if is_done is None:
+        is_done = lambda found: len(found) == len(tag_names)
+
+    if etree is not None:
+        return scan_tags_lxml(html, tag_names, is_done)
+
+    scanner = TagScanner(tag_names, is_done)
+    try:
+        scanner.feed(html)
+        scanner.close()
+    except StopScanning:
+        pass
+    return scanner.found
+
+
+def scan_tags_lxml(html, tag_names, is_done):
+    # https://lxml.de/parsing.html#incremental-event-parsing
+    parser = etree.HTMLPullParser(events=('start',), tag=tag_names)
+    found = {}
+    for offset in range(0, len(html), LXML_CHUNK_SIZE):
+        parser.feed(html[offset:offset + LXML_CHUNK_SIZE])
+        for _, element in parser.read_events():
+            if element.tag not in found:
+                found[element.tag] = dict(element.attrib)
+                if is_done(found):
+                    return found
+    parser.close()
+    for _, element in parser.read_events():
+        if element.tag not in found:
+            found[element.tag] = dict(element.attrib)
+    return found
+
+
+def extract_product_data(html):
+    """Value of `:product` attribute of a product page, None if the page has no product
+
+    Old frontend template (before Oct 9 2024) keeps it on product-item-leasing,
+    new one (since Oct 9 2024) on buy-now-btn. The old one wins if both are present.
+    """
+    tag_names = present_tag_names(html, ['product-item-leasing', 'buy-now-btn'])
+    if len(tag_names) == 0:
+        return None
+
+    def is_done(found):
+        if ':product' in found.get('product-item-leasing', {}):
+            return True
+        # buy-now-btn is only the answer once no product-item-leasing can follow
+        return 'buy-now-btn' in found and ('product-item-leasing' in found or 'product-item-leasing' not in tag_names)
+
+    try:
+        found = scan_tags(html, tag_names, is_done)
+    except Exception:
+        found = {}
+
+    if ':product' in found.get('product-item-leasing', {}):
+        return found['product-item-leasing'][':product']
+    if ':product' in found.get('buy-now-btn', {}):
+        return found['buy-now-btn'][':product']
+
+    # Tags are there, but the scanner didn't make sense of them
+    return extract_product_data_soup(html)
+
+
+def extract_product_data_soup(html):
+    """Full BeautifulSoup parse, the original and slow path"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    leasing_item = soup.find('product-item-leasing')
+    if leasing_item != None and leasing_item.has_attr(':product'):
+        return leasing_item[':product']
+
+    buy_now_btn = soup.find('buy-now-btn')
+    if buy_now_btn == None:
+        return None
+    return buy_now_btn.get(':product', '')
+
+
+def extract_attribute(html, tag_name, attribute):
+    """Value of `attribute` of the first `tag_name` element, None if absent"""
+    if len(present_tag_names(html, [tag_name])) == 0:
+        return None
+
+    try:
+        found = scan_tags(html, [tag_name])
+        if attribute in found.get(tag_name, {}):
+            return found[tag_name][attribute]
+    except Exception:
+        pass
+
+    element = BeautifulSoup(html, 'html.parser').find(tag_name)
+    return element.get(attribute) if element != None else None
@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import glob
+import hashlib
+import threading
+import requests
+from email.utils import parsedate_to_datetime
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from atomic_file import atomic_write
+
+# Headers kept with cached bodies
+CACHED_HEADERS = ['Content-Type', 'Cache-Control', 'Expires', 'Date', 'ETag', 'Last-Modified']
+
+
+def parse_cache_control(value):
+    """Cache-Control directives as a dict, directives without a value map to True"""
+    directives = {}
+    for directive in (value or "").split(","):
+        name, _, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else True
+    return directives
+
+
+def freshness_lifetime(headers):
+    """Seconds a response may be used without revalidation, None if headers don't say
+
+    https://www.rfc-editor.org/rfc/rfc9111#section-4.2.1
+    """
+    directives = parse_cache_control(headers.get('Cache-Control'))
+    if 'no-cache' in directives:
+        return 0
+    for name in ['s-maxage', 'max-age']:
+        if name in directives:
+            try:
+                return max(0, int(directives[name]))
+            except ValueError:
+                return 0
+    if 'Expires' in headers:
+        try:
+            expires = parsedate_to_datetime(headers['Expires']).timestamp()
+            date = parsedate_to_datetime(headers['Date']).timestamp() if 'Date' in headers else time.time()
+            return max(0, expires - date)
+        except (TypeError, ValueError):
+            return 0
+    return None
+
+
+class HttpCache:
+    """On-disk cache of GET responses, keyed by full URL including query params
+
+    Honours Cache-Control (no-store, no-cache, max-age) and Expires,
+    stale entries with ETag/Last-Modified are revalidated with conditional requests.
+    `min_fresh_seconds` passed to lookups treats entries as fresh for at least that long,
+    so a restarted run reuses pages fetched shortly before, even if the server says no-cache.
+    Entries are written atomically, so several processes may share the folder.
+    Least recently used entries are evicted once the folder exceeds `max_bytes`.
+    """
+
+    SUFFIX = '.cache'
+
+    @staticmethod
+    def request_url(url, params=None):
+        """URL as requests sends it, params included"""
+        return requests.Request('GET', url, params=params).prepare().url
+
+    def entry_path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, key[:2], f"{key}{self.SUFFIX}")
+
+    def load(self, url):
+        """Cached entry of a url: metadata with body under 'body', None if there's none"""
+        try:
+            with open(self.entry_path(url), 'rb') as entry_file:
+                metadata = json.loads(entry_file.readline())
+                metadata['body'] = entry_file.read()
+        except (OSError, ValueError):
+            return None
+        if metadata.get('url') != url:
+            return None
+        return metadata
+
+    def is_fresh(self, entry, min_fresh_seconds=0):
+        age = time.time() - entry['stored_at']
+        return age < max(entry['lifetime'], min_fresh_seconds)
+
+    @staticmethod
+    def validators(entry):
+        """Conditional request headers revalidating an entry"""
+        headers = {}
+        if 'ETag' in entry['headers']:
+            headers['If-None-Match'] = entry['headers']['ETag']
+        if 'Last-Modified' in entry['headers']:
+            headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    def store(self, url, response):
+        """Cache a 200 response unless told not to, return True if stored"""
+        if response.status_code != 200:
+            return False
+        directives = parse_cache_control(response.headers.get('Cache-Control'))
+        if 'no-store' in directives:
+            return False
+        self.write(url, {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}, response.content)
+        return True
+
+    def refresh(self, entry, response):
+        """Server confirmed an entry with 304 Not Modified, update its headers and age"""
+        headers = {**entry['headers'], **{name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}}
+        self.write(entry['url'], headers, entry['body'])
+
+    def write(self, url, headers, body):
+        lifetime = freshness_lifetime(headers)
+        metadata = {'url': url, 'stored_at': time.time(), 'lifetime': lifetime or 0, 'headers': headers}
+        entry_path = self.entry_path(url)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        previous_size = os.path.getsize(entry_path) if os.path.isfile(entry_path) else 0
+
+        with atomic_write(entry_path, 'wb') as entry_file:
+            entry_file.write(json.dumps(metadata).encode('utf-8') + b"\n")
+            entry_file.write(body)
+            size = entry_file.tell()
+
+        with self.lock:
+            self.size += size - previous_size
+            over_cap = self.size > self.max_bytes
+        if over_cap:
+            self.evict()
+
+    def response(self, entry, request_url):
+        """requests.Response built from a cached entry"""
+        response = requests.Response()
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['body']
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request_url
+        response.request = requests.Request('GET', request_url).prepare()
+        response.from_cache = True
+        return response
+
+    def touch(self, entry):
+        """Mark an entry as recently used, for eviction"""
+        try:
+            os.utime(self.entry_path(entry['url']))
+        except OSError:
+            pass
+
+    def evict(self):
+        """Delete least recently used entries until the cache takes 90% of max_bytes"""
+        with self.lock:
+            entries = []
+            for entry_path in glob.glob(os.path.join(self.path, "*", f"*{self.SUFFIX}")):
+                try:
+                    entry_stat = os.stat(entry_path)
+                except FileNotFoundError:
+                    continue # evicted by another process
+                entries.append((entry_stat.st_mtime, entry_stat.st_size, entry_path))
+            self.size = sum(size for _, size, _ in entries)
+            entries.sort()
+            evicted = 0
+            while self.size > self.max_bytes * 0.9 and len(entries) > 0:
+                _, size, entry_path = entries.pop(0)
+                try:
+                    os.remove(entry_path)
+                except FileNotFoundError:
+                    pass
+                self.size -= size
+                evicted += 1
+        print(f"[HttpCache] Evicted {evicted} entries, {self.size / 1024 / 1024:.1f} MB left")
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self.size = sum(os.path.getsize(entry_path) for entry_path in glob.glob(os.path.join(path, "*", f"*{self.SUFFIX}")))
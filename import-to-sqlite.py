@@ -0,0 +1,31 @@
+import os
+import pathlib
+import sys
+from storage import SqliteStorage, import_folder_storage
+
+# Copy product folders and manifest.json of categories into inventory/<category>/inventory.sqlite3,
+# after which download-products.py can run with --storage=sqlite.
+# Product folders are left in place, delete them once the import is verified.
+# usage: import-to-sqlite.py --categories=laptops,monitors
+categories = []
+for arg in sys.argv:
+    if arg.startswith("--categories="):
+        categories = arg.split("=")[1].split(",")
+
+if len(categories) == 0:
+    print("Usage: import-to-sqlite.py --categories=<CATEGORY NAME>[,<CATEGORY NAME>...]")
+    sys.exit(1)
+
+folder = os.path.join(pathlib.Path(__file__).parent.resolve(), "inventory")
+for category in categories:
+    inventory_path = os.path.join(folder, category)
+    if not os.path.isdir(inventory_path):
+        print(f"No inventory found for {category}")
+        sys.exit(1)
+
+    log_tag = f"[{category}]"
+    target = SqliteStorage(inventory_path, log_tag)
+    target.load()
+    products, snapshots = import_folder_storage(inventory_path, target, log_tag)
+    target.close()
+    print(f"{log_tag} Imported {products} products and {snapshots} snapshots into {target.path}")
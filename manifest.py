@@ -0,0 +1,175 @@
+import os
+import json
+import glob
+import hashlib
+from product import Product
+from atomic_file import atomic_write
+
+
+class Manifest:
+    """Per-category index of product snapshots kept in a single file
+
+    Maps product id to its snapshot files (name, size, MD5, content hash) and last_seen value,
+    the latter is stored nowhere else and committed in one atomic write per run,
+    so a run loads it once instead of globbing, stat-ing and hashing
+    every product folder for every item of the index.
+
+    The manifest is built from the product folders on first use
+    and updated incrementally afterwards.
+    Delete the manifest file to force a rebuild.
+    """
+
+    FILE_NAME = 'manifest.json'
+    # Version 2 is the only store of last_seen values,
+    # version 1 mirrored them in per-folder last_seen files
+    VERSION = 2
+
+    @property
+    def path(self):
+        return os.path.join(self.inventory_path, self.FILE_NAME)
+
+    def product_path(self, id):
+        return os.path.join(self.products_path, f"{id}")
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as manifest_file:
+                data = json.load(manifest_file)
+            if data.get('version') == self.VERSION:
+                self.products = data['products']
+                return
+            if data.get('version') == 1:
+                print(f"{self.log_tag} Migrating manifest to version {self.VERSION}")
+                self.products = data['products']
+                self.migrate_last_seen_files()
+                return
+            print(f"{self.log_tag} Unsupported manifest version, rebuilding")
+        except FileNotFoundError:
+            print(f"{self.log_tag} No manifest found, building one from {self.products_path}")
+        except ValueError:
+            print(f"{self.log_tag} Failed to parse manifest, rebuilding")
+        self.rebuild()
+
+    def save(self):
+        """Write manifest atomically, a crash never leaves a truncated file behind"""
+        if not self.dirty:
+            return
+        with atomic_write(self.path, "w", encoding='utf-8') as manifest_file:
+            json.dump({'version': self.VERSION, 'products': self.products}, manifest_file, separators=(',', ':'))
+        self.dirty = False
+
+        # Only delete legacy files once their values are safely on disk
+        if self.last_seen_files_to_delete:
+            for last_seen_path in self.last_seen_files_to_delete:
+                if os.path.isfile(last_seen_path):
+                    os.remove(last_seen_path)
+            print(f"{self.log_tag} Migrated {len(self.last_seen_files_to_delete)} last_seen files to manifest")
+            self.last_seen_files_to_delete = []
+
+    def migrate_last_seen_files(self):
+        """Schedule per-folder last_seen files for deletion on next save"""
+        for product_path in glob.glob(os.path.join(self.products_path, "[0-9]*", Product.LAST_SEEN_FILE_NAME)):
+            self.last_seen_files_to_delete.append(product_path)
+        self.dirty = True
+
+    def rebuild(self):
+        self.products = {}
+        for product_path in glob.glob(os.path.join(self.products_path, "[0-9]*")):
+            if os.path.isdir(product_path):
+                self.scan_product(os.path.basename(product_path))
+        self.dirty = True
+        print(f"{self.log_tag} Manifest built for {len(self.products)} products")
+
+    def scan_product(self, id):
+        """Read product folder from disk, the slow path"""
+        entry = {'snapshots': [], 'last_seen': None}
+        product_path = self.product_path(id)
+        for file_path in sorted(glob.glob(os.path.join(product_path, "*.json"))):
+            entry['snapshots'].append(self.describe_file(file_path))
+        # Folders written before the manifest existed, or restored from old archives
+        last_seen_path = os.path.join(product_path, Product.LAST_SEEN_FILE_NAME)
+        if os.path.isfile(last_seen_path):
+            with open(last_seen_path) as last_seen_file:
+                entry['last_seen'] = last_seen_file.read().strip()
+            self.last_seen_files_to_delete.append(last_seen_path)
+        self.products[f"{id}"] = entry
+        self.dirty = True
+        return entry
+
+    @staticmethod
+    def describe_file(file_path, content_hash=None):
+        with open(file_path, 'rb') as snapshot_file:
+            contents = snapshot_file.read()
+        description = {
+            'name': os.path.basename(file_path),
+            'size': len(contents),
+            'md5': hashlib.md5(contents).hexdigest(),
+        }
+        if content_hash is None:
+            try:
+                content_hash = Product.content_hash(json.loads(contents))
+            except ValueError:
+                pass
+        if content_hash is not None:
+            description['hash'] = content_hash
+        return description
+
+    def product(self, id, create=False):
+        """Manifest entry of a product, products never seen before get an empty one
+
+        The empty entry is only added to the manifest with `create`, so looking a product up doesn't list it.
+        """
+        entry = self.products.get(f"{id}")
+        if entry is None:
+            if os.path.isdir(self.product_path(id)):
+                entry = self.scan_product(id)
+            else:
+                entry = {'snapshots': [], 'last_seen': None}
+                if create:
+                    self.products[f"{id}"] = entry
+                    self.dirty = True
+        return entry
+
+    def snapshots(self, id):
+        return self.product(id)['snapshots']
+
+    def add_snapshot(self, id, file_path, content_hash=None):
+        snapshots = self.product(id, create=True)['snapshots']
+        snapshots[:] = [s for s in snapshots if s['name'] != os.path.basename(file_path)]
+        snapshots.append(self.describe_file(file_path, content_hash))
+        snapshots.sort(key=lambda s: s['name'])
+        self.dirty = True
+
+    def set_snapshot_hash(self, id, name, content_hash):
+        """Content hash of a snapshot described before hashes were recorded"""
+        for snapshot in self.snapshots(id):
+            if snapshot['name'] == name:
+                snapshot['hash'] = content_hash
+                self.dirty = True
+
+    def remove_snapshot(self, id, name):
+        snapshots = self.snapshots(id)
+        snapshots[:] = [s for s in snapshots if s['name'] != name]
+        self.dirty = True
+
+    def remove_product(self, id):
+        self.products.pop(f"{id}", None)
+        self.dirty = True
+
+    def set_last_seen(self, id, value):
+        self.product(id, create=True)['last_seen'] = value
+        self.dirty = True
+
+    def product_ids(self):
+        return list(self.products.keys())
+
+    def __len__(self):
+        return len(self.products)
+
+    def __init__(self, inventory_path, log_tag):
+        self.inventory_path = inventory_path
+        self.products_path = os.path.join(inventory_path, Product.FOLDER_NAME)
+        self.log_tag = log_tag
+        self.products = {}
+        self.dirty = False
+        self.last_seen_files_to_delete = []
@@ -0,0 +1,90 @@
+import re
+from numeric_fields import numeric_fields
+
+
+def rule(field, title_pattern, exclude_pattern=None, require_value=False, transform='set'):
+    """Map spec entries with title matching `title_pattern` to `field`
+
+    `exclude_pattern` rejects titles that match both,
+    `require_value` skips entries with empty value,
+    `transform` is one of TRANSFORMS.
+    A rejected or skipped entry falls through to the next rule.
+    """
+    return {
+        'field': field,
+        'title': re.compile(title_pattern, re.IGNORECASE),
+        'exclude': re.compile(exclude_pattern, re.IGNORECASE) if exclude_pattern else None,
+        'require_value': require_value,
+        'transform': transform,
+    }
+
+
+TRANSFORMS = {
+    'set': lambda old_value, value: value,
+    # Some laptops like ASUS Zephyrus G14 have _two_ GPU entries - for iGPU and dGPU, separately
+    'join': lambda old_value, value: value if old_value is None else old_value + " + " + value,
+    'resolution': lambda old_value, value: value.replace(' x ', 'x'),
+}
+
+# Rules applying to every category, checked first
+COMMON_RULES = [
+    rule('defect', 'defekts'),
+]
+
+COMPUTER_RULES = [
+    rule('cpu', '(cpu|proces)', require_value=True),
+    rule('ram', 'ram'),
+    # avoid "Diska lasītājs" key
+    rule('storage', '(atmi|disk|hdd|ssd)', exclude_pattern='(oper|las)'),
+    rule('gpu', '(gpu|video|grafisk)', transform='join'),
+    # desktop-only here
+    rule('os', 'operētājsistēma'),
+    rule('motherboard', 'mātes'),
+]
+
+# Category name → rules, in order of priority: the first applicable rule wins
+CATEGORY_RULES = {
+    'laptops': COMPUTER_RULES,
+    'desktops': COMPUTER_RULES,
+    'monitors': [
+        rule('resolution', 'izšķirtspēja', require_value=True, transform='resolution'),
+        rule('size', 'izmērs', require_value=True),
+        rule('refresh_rate', 'frekvence', require_value=True),
+        rule('panel', 'tips', require_value=True),
+    ],
+}
+
+# (category name, spec title) → rules whose title patterns accept it.
+# Spec titles repeat across products, so each title is matched against patterns only once.
+_rules_by_title = {}
+
+
+def rules_for_title(category_name, title):
+    key = (category_name, title)
+    rules = _rules_by_title.get(key)
+    if rules is None:
+        rules = [
+            r for r in COMMON_RULES + CATEGORY_RULES.get(category_name, [])
+            if r['title'].search(title) and not (r['exclude'] and r['exclude'].search(title))
+        ]
+        _rules_by_title[key] = rules
+    return rules
+
+
+def clean_value(value):
+    return value.replace('\n', '').replace('\t', '').replace('&nbsp;', ' ').strip(' -,|"')
+
+
+def normalize_product(category_name, specs):
+    """Map `description_f` spec entries of a product to frontend fields"""
+    normalized = {}
+    for entry in specs:
+        value = clean_value(entry['value'])
+        for r in rules_for_title(category_name, entry['title']):
+            if r['require_value'] and len(value) == 0:
+                continue
+            normalized[r['field']] = TRANSFORMS[r['transform']](normalized.get(r['field']), value)
+            break
+    # parse numbers once here instead of on every filter keystroke in the frontend
+    normalized.update(numeric_fields(normalized))
+    return normalized
@@ -0,0 +1,77 @@
+import re
+
+# Python port of the numeric parsing in banknote-tabulator.js,
+# so the frontend gets numbers instead of running regexes on every filter keystroke.
+# Keep both in sync, tests/test_numeric_fields.py mirrors tests/numeric-filters.js
+
+CAPACITY_PATTERN = re.compile(r'([+-]?[0-9]+(?:[.,][0-9]+)?)\s*(gb|gб|tb|mb|гб|тб|tб|tr|[gt](?=\s|$|[^a-zа-яё]))', re.IGNORECASE)
+PLAIN_NUMBER_PATTERN = re.compile(r'^\s*[+-]?[0-9]+(?:[.,][0-9]+)?\s*$')
+STORAGE_NUMBER_PATTERN = re.compile(r'(?:([+-]?[0-9]+(?:[.,][0-9]+)?)\s*(?:ssd|hdd)\b|(?:ssd|hdd)\D+([+-]?[0-9]+(?:[.,][0-9]+)?))', re.IGNORECASE)
+# what JavaScript parseFloat() accepts at the start of a string
+LEADING_NUMBER_PATTERN = re.compile(r'\s*([+-]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)')
+RESOLUTION_PATTERN = re.compile(r'([0-9]{3,5})\s*[x×]\s*([0-9]{3,5})', re.IGNORECASE)
+
+
+def parse_numeric_value(value):
+    """Leading number of a string with decimal comma support, like parseNumericValue() in JS"""
+    match = LEADING_NUMBER_PATTERN.match(str(value).replace(',', '.', 1))
+    return float(match.group(1)) if match else None
+
+
+def normalize_capacity_to_gb(value, unit):
+    number_value = parse_numeric_value(value)
+    unit_name = (unit or '').lower()
+
+    if unit_name in ['gb', 'g', 'гб', 'gб']:
+        return number_value
+
+    if unit_name in ['tb', 't', 'tб', 'тб', 'tr']:
+        return number_value * 1024
+
+    # only mb left
+    return number_value / 1024
+
+
+def parse_capacity_value(value):
+    """Largest capacity mentioned in a RAM/storage description, in GB"""
+    raw_value = str(value)
+    capacities = [normalize_capacity_to_gb(number, unit) for number, unit in CAPACITY_PATTERN.findall(raw_value)]
+
+    if len(capacities) > 0:
+        return max(capacities)
+
+    # plain number, nothing else
+    if PLAIN_NUMBER_PATTERN.match(raw_value):
+        return parse_numeric_value(raw_value)
+
+    # mid trash like "512 SSD", no GB
+    storage_match = STORAGE_NUMBER_PATTERN.search(raw_value)
+    if storage_match:
+        return parse_numeric_value(storage_match.group(1) or storage_match.group(2))
+
+    # deliberately not handling complete trash like "asdf512ghjkl"
+    return None
+
+
+def parse_resolution(value):
+    """Width and height from strings like "2560x1440 (QHD)", or (None, None)"""
+    match = RESOLUTION_PATTERN.search(str(value))
+    if match is None:
+        return None, None
+    return int(match.group(1)), int(match.group(2))
+
+
+def numeric_fields(normalized):
+    """Canonical numeric fields for string fields present in a normalized product"""
+    fields = {}
+    if 'ram' in normalized:
+        fields['ram_gb'] = parse_capacity_value(normalized['ram'])
+    if 'storage' in normalized:
+        fields['storage_gb'] = parse_capacity_value(normalized['storage'])
+    if 'size' in normalized:
+        fields['size_in'] = parse_numeric_value(normalized['size'])
+    if 'refresh_rate' in normalized:
+        fields['refresh_hz'] = parse_numeric_value(normalized['refresh_rate'])
+    if 'resolution' in normalized:
+        fields['resolution_width'], fields['resolution_height'] = parse_resolution(normalized['resolution'])
+    return fields
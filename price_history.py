@@ -0,0 +1,68 @@
+import os
+import json
+from atomic_file import atomic_write
+
+
+class PriceHistory:
+    """Per-category price history built from product snapshots
+
+    Maps product id to first_seen, last_seen and a list of [timestamp, price] pairs,
+    where a pair is only added when the price differs from the previous one.
+    Each product remembers the newest snapshot already processed,
+    so later runs only read snapshots added since.
+    """
+
+    FILE_NAME = 'price_history.json'
+    VERSION = 1
+
+    @property
+    def path(self):
+        return os.path.join(self.inventory_path, self.FILE_NAME)
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as history_file:
+                data = json.load(history_file)
+            if data.get('version') == self.VERSION:
+                self.products = data['products']
+        except (OSError, ValueError):
+            print(f"{self.log_tag} No usable price history found, building from snapshots")
+            self.products = {}
+
+    def save(self):
+        with atomic_write(self.path, "w", encoding='utf-8') as history_file:
+            json.dump({'version': self.VERSION, 'products': self.products}, history_file, separators=(',', ':'))
+
+    def update(self, storage):
+        """Process snapshots in storage that weren't processed before
+
+        Returns amount of snapshots read.
+        """
+        snapshots_read = 0
+        for id in storage.product_ids():
+            entry = self.products.setdefault(id, {'first_seen': None, 'last_seen': None, 'prices': [], 'processed': None})
+
+            for timestamp in storage.snapshot_timestamps(id):
+                if entry['processed'] is not None and timestamp <= entry['processed']:
+                    continue
+
+                try:
+                    price = float(storage.load_snapshot(id, timestamp)['price'])
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    print(f"{self.log_tag} Skipping unreadable snapshot {id}/{timestamp}: {e!r}")
+                    continue
+                snapshots_read += 1
+
+                if entry['first_seen'] is None:
+                    entry['first_seen'] = timestamp
+                if len(entry['prices']) == 0 or entry['prices'][-1][1] != price:
+                    entry['prices'].append([timestamp, price])
+                entry['processed'] = timestamp
+
+            entry['last_seen'] = storage.last_seen(id) or entry['last_seen']
+        return snapshots_read
+
+    def __init__(self, inventory_path, log_tag):
+        self.inventory_path = inventory_path
+        self.log_tag = log_tag
+        self.products = {}
@@ -1,10 +1,8 @@
 import os
-import pathlib
+import json
+import hashlib
 from datetime import datetime
-import shutil
-import glob
 import pytz
-import hashlib
 
 
 class Product:
@@ -18,38 +16,59 @@ class Product:
         """
         Path of an inventory
         that is a root for specific product data directories
-        and index files
+        and index files, the category folder of --inventory
         """
-        return os.path.join(pathlib.Path(__file__).parent.resolve(), "inventory", self.category_name)
+        return self.storage.inventory_path
 
     @property
     def path(self):
         """Path of a specific product data directory"""
         return os.path.join(self.inventory_path, self.FOLDER_NAME, f"{self.id}", '')
 
-    def ensure_path_exists(self):
-        if not os.path.isdir(self.path):
-            os.mkdir(self.path)
+    @property
+    def snapshot_timestamps(self):
+        """Timestamps of snapshots in storage for a particular Product, oldest first"""
+        return self.storage.snapshot_timestamps(self.id)
+
+    @property
+    def has_snapshots(self):
+        return len(self.snapshot_timestamps) > 0
 
     @property
-    def files_downloaded(self):
-        """Files in storage for a particular Product. Returns array of absolute paths"""
-        def is_not_empty_file(path):
-            return os.path.getsize(path) > 0
+    def latest_timestamp(self):
+        return self.snapshot_timestamps[-1]
 
-        return list(sorted(filter(is_not_empty_file, glob.glob(os.path.join(self.path, "*.json")))))
+    @property
+    def latest_location(self):
+        """Where the latest snapshot is stored: file path or database row"""
+        return self.storage.snapshot_location(self.id, self.latest_timestamp)
 
     @property
     def latest_file_datetime(self):
-        latest_file_path = self.files_downloaded[-1]
-        latest_file_name = os.path.basename(latest_file_path)
-        return datetime.strptime(f"{latest_file_name}Z", f"{self.FILENAME_FORMAT}%z")
+        return datetime.strptime(f"{self.latest_timestamp}Z", f"{self.TIMESTAMP_FORMAT}%z")
+
+    def load_latest_snapshot(self):
+        return self.storage.load_snapshot(self.id, self.latest_timestamp)
+
+    @staticmethod
+    def content_hash(properties):
+        """SHA-256 of canonical JSON of properties, independent of key order and formatting"""
+        canonical_json = json.dumps(properties, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(canonical_json.encode('utf-8')).hexdigest()
 
-    def create_new_filename(self):
-        """Create filename to dump created/updated product JSON"""
-        new_filename = datetime.now().strftime(self.FILENAME_FORMAT)
-        print(f"[Product {self.id}]: creating file {new_filename}")
-        return os.path.join(self.path, new_filename)
+    def save_snapshot(self, properties):
+        """Store created/updated product properties, return their location
+
+        Properties identical to the latest snapshot aren't stored again,
+        the location of the latest snapshot is returned instead.
+        """
+        if self.has_snapshots and self.storage.snapshot_hash(self.id, self.latest_timestamp) == self.content_hash(properties):
+            print(f"[Product {self.id}]: unchanged since snapshot {self.latest_timestamp}")
+            return self.latest_location
+
+        timestamp = datetime.now().strftime(self.TIMESTAMP_FORMAT)
+        print(f"[Product {self.id}]: creating snapshot {timestamp}")
+        return self.storage.add_snapshot(self.id, timestamp, properties)
 
     @property
     def legacy_filename(self):
@@ -66,48 +85,24 @@ class Product:
         # So we migrate the existing files to store timestamp in a filename.
         legacy_file_timestamp = os.path.getmtime(self.legacy_path)
         legacy_file_datetime = datetime.fromtimestamp(legacy_file_timestamp, tz=pytz.timezone('GMT'))
-        migrated_filename = legacy_file_datetime.strftime(self.FILENAME_FORMAT)
-        print(f"[Product {self.id}]: migrating legacy file {self.legacy_filename} timestamped {legacy_file_timestamp} to {migrated_filename}")
-        migrated_path = os.path.join(self.path, migrated_filename)
-        self.ensure_path_exists()
-        shutil.move(self.legacy_path, migrated_path)
-
-    def delete_duplicate_data(self):
-        """There was a bug earlier that resulted in some product folders
-        containing multiple json files with identical data.
-
-        This function deletes duplicate json files keeping only the oldest one.
-        """
-        checksums = []
-        for file_path in self.files_downloaded:
-            file_md5 = hashlib.md5(open(file_path,'rb').read()).hexdigest()
-            if file_md5 in checksums:
-                print(f"[Product {self.id}]: Deleting duplicate data file: {file_path} with MD5 {file_md5}")
-                os.remove(file_path)
-            else:
-                checksums.append(file_md5)
+        migrated_timestamp = legacy_file_datetime.strftime(self.TIMESTAMP_FORMAT)
+        print(f"[Product {self.id}]: migrating legacy file {self.legacy_filename} timestamped {legacy_file_timestamp} to {migrated_timestamp}")
+        with open(self.legacy_path, encoding='utf-8') as legacy_file:
+            self.storage.add_snapshot(self.id, migrated_timestamp, json.load(legacy_file))
+        os.remove(self.legacy_path)
 
     LAST_SEEN_FILE_NAME = "last_seen"
 
-    @property
-    def last_seen_file_path(self):
-        """Absolute path of file holding last_seen_value"""
-        return os.path.join(self.path, __class__.LAST_SEEN_FILE_NAME)
-
     def update_last_seen_value(self):
-        """Update last seen date value in product data folder"""
+        """Update last seen date value in storage"""
         value_string = datetime.now().strftime(self.TIMESTAMP_FORMAT)
-        # print(f"[Product {self.id}]: Writing value string {value_string} to path {self.last_seen_file_path}")
-        with open(self.last_seen_file_path, "w") as last_seen_file:
-            last_seen_file.write(value_string)
+        self.storage.set_last_seen(self.id, value_string)
 
-    def __init__(self, category_name, id):
+    def __init__(self, category_name, id, storage):
         self.id = id
         self.category_name = category_name
+        # FolderStorage or SqliteStorage of the category, see storage.py
+        self.storage = storage
 
         if (os.path.isfile(self.legacy_path)) and (os.path.getsize(self.legacy_path) > 0):
             self.migrate_legacy_data()
-
-        self.delete_duplicate_data()
-
-
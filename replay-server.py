@@ -0,0 +1,39 @@
+import sys
+from replay import ReplayServer, FixtureCatalogue, SyntheticCatalogue
+
+# Local stand-in for veikals.banknote.lv, for runs that don't touch the real shop
+# usage: replay-server.py --fixtures=/path/to/fixtures [--port=8765]
+#        replay-server.py --synthetic=10000 [--repriced=0.1 --revision=1] [--port=8765]
+# then: download-products.py --base-url=http://127.0.0.1:8765 --delay=0 --inventory=/tmp/inventory
+# Record fixtures with download-products.py --record=/path/to/fixtures
+fixtures_path = None
+synthetic_products = None
+repriced = 0.0
+revision = 0
+port = 8765
+for arg in sys.argv:
+    if arg.startswith("--fixtures="):
+        fixtures_path = arg.split("=")[1]
+    elif arg.startswith("--synthetic="):
+        synthetic_products = int(arg.split("=")[1])
+    elif arg.startswith("--repriced="):
+        repriced = float(arg.split("=")[1])
+    elif arg.startswith("--revision="):
+        revision = int(arg.split("=")[1])
+    elif arg.startswith("--port="):
+        port = int(arg.split("=")[1])
+
+if fixtures_path:
+    catalogue = FixtureCatalogue(fixtures_path)
+elif synthetic_products:
+    catalogue = SyntheticCatalogue(synthetic_products, repriced=repriced, revision=revision)
+else:
+    print("Usage: replay-server.py --fixtures=<FOLDER> | --synthetic=<PRODUCTS PER CATEGORY> [--port=8765]")
+    sys.exit(1)
+
+server = ReplayServer(catalogue, port)
+print(f"Serving {'fixtures from ' + fixtures_path if fixtures_path else f'{synthetic_products} synthetic products per category'} on {server.base_url}")
+try:
+    server.serve_forever()
+except KeyboardInterrupt:
+    pass
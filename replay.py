@@ -0,0 +1,184 @@
+import os
+import json
+import html
+import random
+import hashlib
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from banknote_client import BanknoteClient
+
+# Offline stand-in for veikals.banknote.lv:
+# BanknoteClient(recorder=FixtureRecorder(...)) saves responses as fixtures,
+# ReplayServer serves them back, or a synthetic catalogue of any size,
+# to BanknoteClient(base_url=...) pointed at it.
+
+# Response headers the pipeline looks at
+RECORDED_HEADERS = ['Content-Type', 'Location', 'ETag', 'Last-Modified', 'Retry-After']
+
+
+def request_target(url):
+    """Path and query of a url, what the server sees in the request line"""
+    parts = urlsplit(url)
+    return f"{parts.path or '/'}?{parts.query}" if parts.query else (parts.path or '/')
+
+
+def fixture_name(target):
+    return f"{hashlib.sha1(target.encode('utf-8')).hexdigest()}.json"
+
+
+class FixtureRecorder:
+    """Save responses to a fixture folder, one JSON file per request target"""
+
+    def save(self, response):
+        for recorded in response.history + [response]:
+            target = request_target(recorded.request.url)
+            fixture = {
+                'target': target,
+                'status': recorded.status_code,
+                'headers': {name: recorded.headers[name] for name in RECORDED_HEADERS if name in recorded.headers},
+                'body': recorded.text,
+            }
+            with open(os.path.join(self.path, fixture_name(target)), "w", encoding='utf-8') as fixture_file:
+                json.dump(fixture, fixture_file)
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+
+class FixtureCatalogue:
+    """Responses recorded by FixtureRecorder"""
+
+    def respond(self, target):
+        try:
+            with open(os.path.join(self.path, fixture_name(target)), encoding='utf-8') as fixture_file:
+                fixture = json.load(fixture_file)
+        except FileNotFoundError:
+            return 404, {'Content-Type': 'text/plain'}, f"No fixture recorded for {target}"
+        return fixture['status'], fixture['headers'], fixture['body']
+
+    def __init__(self, path):
+        self.path = path
+
+
+class SyntheticCatalogue:
+    """Shop of `products` generated products per category, shaped like the real one
+
+    Pages are generated on request from the product number,
+    so large catalogues don't need fixtures on disk.
+    `repriced` is the share of products whose price differs by `revision`,
+    bump the revision between runs to simulate price changes.
+    """
+
+    CATEGORY_IDS = [8, 9, 11]
+    PER_PAGE_DEFAULT = 120
+
+    def product(self, category_id, number):
+        rng = random.Random(category_id * 1_000_003 + number)
+        price = rng.randint(50, 2000)
+        if rng.random() < self.repriced:
+            price += self.revision
+        id = category_id * 10_000_000 + number
+        return {
+            'id': id,
+            'article': f"A{id}",
+            'title': f"Product {number} of category {category_id}",
+            'price': f"{price}.00",
+            # absolute shop urls like the real index, BanknoteClient(base_url=...) rewrites them
+            'url': f"{BanknoteClient.SHOP_URL}/lv/p/{id}",
+            'branche': {'address': f"Rīga<br>Brīvības iela {number % 200 + 1}"},
+            'specs': [
+                {'title': "Procesors", 'value': f"Intel Core i{rng.choice([3, 5, 7])}-{rng.randint(4000, 13999)}"},
+                {'title': "RAM", 'value': f"{rng.choice([4, 8, 16, 32])} GB"},
+                {'title': "Cietais disks", 'value': f"{rng.choice([128, 256, 512, 1024])} GB SSD"},
+                {'title': "Izšķirtspēja", 'value': rng.choice(["1920 x 1080", "2560 x 1440"])},
+                {'title': "Ekrāna izmērs", 'value': f"{rng.choice([14, 15.6, 24, 27])}\""},
+            ],
+        }
+
+    def home_page(self):
+        categories = [{'id': id, 'childrenCategories': []} for id in self.CATEGORY_IDS]
+        return f'<html><body><product-categories :categories="{html.escape(json.dumps(categories))}"></product-categories></body></html>'
+
+    def index_page(self, category_id, page, per_page):
+        last_page = max(1, -(-self.products // per_page))
+        numbers = range((page - 1) * per_page, min(page * per_page, self.products))
+        items = []
+        for number in numbers:
+            product = self.product(category_id, number)
+            items.append({key: value for key, value in product.items() if key != 'specs'})
+        return json.dumps({'data': items, 'last_page': last_page, 'total': self.products})
+
+    def product_page(self, id):
+        category_id, number = divmod(id, 10_000_000)
+        if category_id not in self.CATEGORY_IDS or number >= self.products:
+            return None
+        product = self.product(category_id, number)
+        properties = {
+            'id': id,
+            'price': product['price'],
+            'description_f': product['specs'],
+            'erp_images': [{'path': f"products/{id}/{i}.jpg"} for i in range(3)],
+        }
+        filler = "".join(f'<div class="related"><a href="/lv/p/{i}">Related {i}</a></div>' for i in range(200))
+        return f'<html><body>{filler}<buy-now-btn :product="{html.escape(json.dumps(properties))}"></buy-now-btn>{filler}</body></html>'
+
+    def respond(self, target):
+        parts = urlsplit(target)
+        if parts.path in ['/', '/lv/']:
+            return 200, {'Content-Type': 'text/html; charset=utf-8'}, self.home_page()
+        if parts.path == '/lv/filter-products':
+            query = parse_qs(parts.query)
+            category_id = int(query['categories_id'][0].split(',')[0])
+            page = int(query.get('page', ['1'])[0])
+            per_page = int(query.get('per_page', [self.PER_PAGE_DEFAULT])[0])
+            return 200, {'Content-Type': 'application/json'}, self.index_page(category_id, page, per_page)
+        if parts.path.startswith('/lv/p/'):
+            page = self.product_page(int(parts.path.removeprefix('/lv/p/')))
+            if page is not None:
+                return 200, {'Content-Type': 'text/html; charset=utf-8'}, page
+        return 404, {'Content-Type': 'text/plain'}, f"No synthetic page for {target}"
+
+    def __init__(self, products, repriced=0.0, revision=0):
+        self.products = products
+        self.repriced = repriced
+        self.revision = revision
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, headers, body = self.server.catalogue.respond(self.path)
+        # Conditional requests of the index crawl
+        etag = headers.get('ETag')
+        if etag is not None and self.headers.get('If-None-Match') == etag:
+            status, body = 304, ""
+        contents = body.encode('utf-8')
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(contents)))
+        self.end_headers()
+        self.wfile.write(contents)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Serve a FixtureCatalogue or SyntheticCatalogue on localhost"""
+
+    daemon_threads = True
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self):
+        """Serve on a background thread, return base url"""
+        threading.Thread(target=self.serve_forever, name='ReplayServer', daemon=True).start()
+        return self.base_url
+
+    def __init__(self, catalogue, port=0):
+        super().__init__(('127.0.0.1', port), ReplayRequestHandler)
+        self.catalogue = catalogue
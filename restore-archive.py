@@ -0,0 +1,35 @@
+import os
+import pathlib
+import sys
+from banknote import Banknote
+
+# Rebuild a point-in-time view of a category from a chain of full and delta archives
+# usage: restore-archive.py --category=laptops --output=/tmp/laptops [--until=2024-03-26_09-35-21]
+category_name = None
+output_path = None
+until = None
+for arg in sys.argv:
+    if arg.startswith("--category="):
+        category_name = arg.split("=")[1]
+    elif arg.startswith("--output="):
+        output_path = arg.split("=")[1]
+    elif arg.startswith("--until="):
+        until = arg.split("=")[1]
+
+if category_name is None or output_path is None:
+    print("Usage: restore-archive.py --category=<CATEGORY NAME> --output=<FOLDER> [--until=<DATE AND TIME>]")
+    sys.exit(1)
+
+folder = os.path.join(pathlib.Path(__file__).parent.resolve(), "inventory")
+inventory = Banknote(folder, category_name)
+
+try:
+    chain = inventory.archive_chain(until)
+except ValueError as e:
+    print(e)
+    sys.exit(1)
+
+print(f"Restoring {category_name} from {len(chain)} archive(s): {', '.join(a['name'] for a in chain)}")
+os.makedirs(output_path, exist_ok=True)
+restored_timestamp = inventory.restore_archive(output_path, until)
+print(f"Restored {category_name} as of {restored_timestamp} to {output_path}")
@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import pytz
+import sentry_sdk
+from atomic_file import atomic_write
+
+# Peak memory is only reported where the resource module exists (not on Windows)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Fields of /proc/self/io, Linux only: read/write syscalls and bytes, including sockets
+IO_FIELDS = ['syscr', 'syscw', 'rchar', 'wchar']
+
+
+def io_counters():
+    """IO_FIELDS of this process so far, None where /proc isn't available"""
+    try:
+        with open('/proc/self/io') as io_file:
+            values = dict(line.split(': ') for line in io_file.read().splitlines())
+        return {field: int(values[field]) for field in IO_FIELDS}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class RunStats:
+    """Timings and counters of a category pipeline run
+
+    Phases are timed and sent to Sentry as spans of a per-run transaction,
+    with IO syscalls and peak memory of the process at the end of each phase,
+    counters are incremented from any thread, e.g. by BanknoteClient workers.
+    Every run is appended to run_stats.json of the category,
+    so regressions show up when comparing runs.
+    """
+
+    FILE_NAME = 'run_stats.json'
+    VERSION = 1
+    # Runs kept in the file, oldest are dropped
+    MAX_RUNS = 200
+
+    @property
+    def path(self):
+        return os.path.join(self.inventory_path, self.FILE_NAME)
+
+    def reset(self):
+        self.started_at = None
+        self.phases = {}
+        self.counters = {}
+        self.io = {}
+        self.peak_rss_kb = {}
+
+    def add_time(self, name, seconds):
+        with self.lock:
+            self.phases[name] = self.phases.get(name, 0) + seconds
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def timer(self, name):
+        """Time a block without a Sentry span, for hot loops"""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started_at)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a pipeline phase, reported as a Sentry span"""
+        # https://docs.sentry.io/platforms/python/tracing/instrumentation/custom-instrumentation/
+        io_before = io_counters()
+        with sentry_sdk.start_span(op=f"banknote.{name}", name=f"{self.log_tag} {name}") as span:
+            with self.timer(name):
+                yield
+            io_after = io_counters()
+            with self.lock:
+                if io_before is not None and io_after is not None:
+                    phase_io = self.io.setdefault(name, {field: 0 for field in IO_FIELDS})
+                    for field in IO_FIELDS:
+                        phase_io[field] += io_after[field] - io_before[field]
+                    span.set_data('io', phase_io)
+                self.peak_rss_kb[name] = peak_rss_kb()
+
+    @contextmanager
+    def run(self, name):
+        """Sentry transaction of a whole run, saves run_stats.json when it ends, even on failure"""
+        self.reset()
+        self.started_at = datetime.now(tz=pytz.timezone('GMT'))
+        started_at = time.perf_counter()
+        succeeded = False
+        with sentry_sdk.start_transaction(op="banknote.run", name=name) as transaction:
+            try:
+                yield self
+                succeeded = True
+            finally:
+                report = self.report(time.perf_counter() - started_at, succeeded)
+                for key, value in report['counters'].items():
+                    transaction.set_data(key, value)
+                transaction.set_data('cache_hit_rate', report['cache_hit_rate'])
+                self.print_report(report)
+                self.save(report)
+
+    def report(self, duration_seconds, succeeded=True):
+        with self.lock:
+            phases = {name: round(seconds, 3) for name, seconds in self.phases.items()}
+            counters = dict(self.counters)
+            io = {name: dict(phase_io) for name, phase_io in self.io.items()}
+            phase_peak_rss_kb = dict(self.peak_rss_kb)
+        # Products whose latest snapshot was reused instead of downloading the page again
+        lookups = counters.get('products_unchanged', 0) + counters.get('products_to_download', 0)
+        return {
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'succeeded': succeeded,
+            'duration_seconds': round(duration_seconds, 3),
+            'phases': phases,
+            'counters': counters,
+            'io': io,
+            'peak_rss_kb': phase_peak_rss_kb,
+            'cache_hit_rate': round(counters.get('products_unchanged', 0) / lookups, 4) if lookups else None,
+        }
+
+    def print_report(self, report):
+        phases = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in report['phases'].items())
+        print(f"{self.log_tag} Run took {report['duration_seconds']:.1f}s: {phases}")
+        print(f"{self.log_tag} Requests: {report['counters'].get('requests', 0)}, "
+              f"received {report['counters'].get('bytes_received', 0) / 1024 / 1024:.1f} MB, "
+              f"cache hit rate: {report['cache_hit_rate']}")
+
+    def load_runs(self):
+        try:
+            with open(self.path, encoding='utf-8') as stats_file:
+                data = json.load(stats_file)
+            if data.get('version') == self.VERSION:
+                return data['runs']
+        except (OSError, ValueError):
+            pass
+        return []
+
+    def save(self, report):
+        runs = (self.load_runs() + [report])[-self.MAX_RUNS:]
+        os.makedirs(self.inventory_path, exist_ok=True)
+        with atomic_write(self.path, "w", encoding='utf-8') as stats_file:
+            json.dump({'version': self.VERSION, 'runs': runs}, stats_file, indent=2)
+
+    def __init__(self, inventory_path, log_tag):
+        self.inventory_path = inventory_path
+        self.log_tag = log_tag
+        self.lock = threading.Lock()
+        self.reset()
@@ -0,0 +1,103 @@
+import json
+import sqlite3
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from normalizer import normalize_product
+
+# orjson is optional, it parses snapshots several times faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Latest snapshots of unchanged products are read in batches:
+# in this process for small batches, on a pool of processes for large ones,
+# each returning only what normalized.json needs instead of full properties.
+
+# Batches smaller than this aren't worth starting a process pool for
+MIN_PARALLEL_BATCH = 1000
+
+# Connections of a worker process to sqlite storages, by database path
+_connections = {}
+
+
+def start_method():
+    """Start method of worker processes
+
+    The downloader always has other threads running (http client pool, Sentry, health server),
+    and forking a process with threads may deadlock the child, so workers are started fresh.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return 'forkserver'
+    return 'spawn'
+
+
+def init_worker(use_orjson):
+    """Parse with the same library as the parent process, which may have disabled orjson"""
+    global orjson
+    if not use_orjson:
+        orjson = None
+
+
+def loads(contents):
+    if orjson is not None:
+        return orjson.loads(contents)
+    return json.loads(contents)
+
+
+def product_details(category_name, properties, timestamp):
+    """What normalized.json needs of product page properties: price, normalized specs, image urls and timestamp"""
+    return {
+        'price': properties['price'],
+        'specs': normalize_product(category_name, properties['description_f']),
+        'images': [f"https://veikals.banknote.lv/storage/{image_data['path']}" for image_data in properties['erp_images']],
+        'timestamp': timestamp,
+    }
+
+
+def read_snapshot(source):
+    """Raw contents of a snapshot described by storage's snapshot_source()"""
+    if source[0] == 'file':
+        with open(source[1], 'rb') as snapshot_file:
+            return snapshot_file.read()
+    if source[0] == 'sqlite':
+        _, database_path, id, timestamp = source
+        if database_path not in _connections:
+            # https://www.sqlite.org/uri.html, read-only next to the writing pipeline
+            _connections[database_path] = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+        row = _connections[database_path].execute(
+            "SELECT data FROM snapshots JOIN blobs USING (hash) WHERE product_id = ? AND timestamp = ?",
+            (f"{id}", timestamp),
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"No snapshot {timestamp} of product {id}")
+        return row[0]
+    raise ValueError(f"Unknown snapshot source {source[0]}")
+
+
+def load_details(category_name, entries):
+    """product_details of (id, source, timestamp) entries as (id, details) pairs"""
+    return [(id, product_details(category_name, loads(read_snapshot(source)), timestamp)) for id, source, timestamp in entries]
+
+
+def load_details_many(category_name, entries, workers=1):
+    """product_details of (id, source, timestamp) entries as a dict by id
+
+    With more than one worker and at least MIN_PARALLEL_BATCH entries,
+    entries are split into chunks loaded by a pool of `workers` processes.
+    """
+    if workers <= 1 or len(entries) < MIN_PARALLEL_BATCH:
+        return dict(load_details(category_name, entries))
+
+    # a few chunks per worker even out slow disks and uneven snapshots
+    chunk_size = -(-len(entries) // (workers * 4))
+    chunks = [entries[start:start + chunk_size] for start in range(0, len(entries), chunk_size)]
+    details = {}
+    # https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context(start_method()),
+        initializer=init_worker, initargs=(orjson is not None,),
+    ) as executor:
+        for pairs in executor.map(load_details, [category_name] * len(chunks), chunks):
+            details.update(pairs)
+    return details
@@ -0,0 +1,335 @@
+import os
+import json
+import glob
+import shutil
+import sqlite3
+from atomic_file import atomic_write
+from manifest import Manifest
+from product import Product
+
+# Storage backends of product snapshots and last_seen values.
+# Both implement the same operations, Banknote picks one by name:
+# snapshot insert, latest lookup, last_seen, pruning and listing files to archive.
+# Snapshots are identified by product id and timestamp string (Product.TIMESTAMP_FORMAT).
+# Contents are stored once per content hash (Product.content_hash) and shared by snapshots,
+# blobs no snapshot refers to anymore are deleted by prune_blobs(), see clean-up-inventory.py.
+
+
+class FolderStorage:
+    """Snapshots as JSON files in product folders, indexed by manifest.json
+
+    inventory/<CATEGORY NAME>/products/<ID>/<DATE AND TIME>.json
+    are hard links to content-addressed files shared by all categories:
+    inventory/blobs/<FIRST 2 CHARACTERS OF HASH>/<HASH>.json
+    """
+
+    NAME = 'folder'
+    BLOBS_FOLDER_NAME = 'blobs'
+    # Snapshot files are never rewritten, so a delta archive only holds those added since the previous archive
+    DELTA_ARCHIVES = True
+
+    @property
+    def blobs_path(self):
+        return os.path.join(os.path.dirname(self.inventory_path), self.BLOBS_FOLDER_NAME)
+
+    def blob_path(self, content_hash):
+        return os.path.join(self.blobs_path, content_hash[:2], f"{content_hash}.json")
+
+    def product_path(self, id):
+        return self.manifest.product_path(id)
+
+    def snapshot_location(self, id, timestamp):
+        """Absolute path of snapshot file"""
+        return os.path.join(self.product_path(id), f"{timestamp}.json")
+
+    def snapshot_source(self, id, timestamp):
+        """Picklable description of a snapshot, read by snapshot_loader.py in other processes"""
+        return ('file', self.snapshot_location(id, timestamp))
+
+    def load(self):
+        self.manifest.load()
+
+    def commit(self):
+        self.manifest.save()
+
+    def close(self):
+        pass
+
+    def product_ids(self):
+        return self.manifest.product_ids()
+
+    def __len__(self):
+        return len(self.manifest)
+
+    def snapshot_timestamps(self, id):
+        """Timestamps of non-empty snapshots of a product, oldest first"""
+        return [s['name'].removesuffix('.json') for s in self.manifest.snapshots(id) if s['size'] > 0]
+
+    def load_snapshot(self, id, timestamp):
+        with open(self.snapshot_location(id, timestamp), encoding='utf-8') as snapshot_file:
+            return json.load(snapshot_file)
+
+    def write_blob(self, content_hash, properties):
+        blob_path = self.blob_path(content_hash)
+        if os.path.isfile(blob_path):
+            return blob_path
+        # Category pipelines may write the same blob at the same time
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        with atomic_write(blob_path, "w", encoding='utf-8') as blob_file:
+            json.dump(properties, blob_file, indent=2, sort_keys=True)
+        return blob_path
+
+    def add_snapshot(self, id, timestamp, properties):
+        content_hash = Product.content_hash(properties)
+        blob_path = self.write_blob(content_hash, properties)
+        os.makedirs(self.product_path(id), exist_ok=True)
+        file_path = self.snapshot_location(id, timestamp)
+        if os.path.lexists(file_path):
+            os.remove(file_path)
+        try:
+            os.link(blob_path, file_path)
+        except OSError:
+            # Filesystem without hard links, or inventory spread across filesystems
+            with open(blob_path, 'rb') as blob_file, atomic_write(file_path, 'wb') as snapshot_file:
+                shutil.copyfileobj(blob_file, snapshot_file)
+        self.manifest.add_snapshot(id, file_path, content_hash)
+        return file_path
+
+    def snapshot_hash(self, id, timestamp):
+        """Content hash of a snapshot, None if there's no such readable snapshot"""
+        name = f"{timestamp}.json"
+        for snapshot in self.manifest.snapshots(id):
+            if snapshot['name'] != name:
+                continue
+            if 'hash' not in snapshot:
+                # Described before hashes were recorded, hashed once and remembered
+                try:
+                    self.manifest.set_snapshot_hash(id, name, Product.content_hash(self.load_snapshot(id, timestamp)))
+                except (OSError, ValueError):
+                    return None
+            return snapshot['hash']
+        return None
+
+    def delete_duplicate_snapshots(self, id):
+        """Delete snapshots identical to an older one, return their timestamps"""
+        checksums = []
+        deleted = []
+        for snapshot in list(self.manifest.snapshots(id)):
+            if snapshot['size'] == 0:
+                continue
+            timestamp = snapshot['name'].removesuffix('.json')
+            content_hash = self.snapshot_hash(id, timestamp)
+            if content_hash is not None and content_hash in checksums:
+                os.remove(os.path.join(self.product_path(id), snapshot['name']))
+                self.manifest.remove_snapshot(id, snapshot['name'])
+                deleted.append(timestamp)
+            else:
+                checksums.append(content_hash)
+        return deleted
+
+    def last_seen(self, id):
+        return self.manifest.product(id)['last_seen']
+
+    def set_last_seen(self, id, value):
+        self.manifest.set_last_seen(id, value)
+
+    def remove_product(self, id):
+        """Delete all data of a product, return True if there was anything on disk"""
+        product_path = self.product_path(id)
+        self.manifest.remove_product(id)
+        if not os.path.isdir(product_path):
+            return False
+        shutil.rmtree(product_path)
+        return True
+
+    def prune_blobs(self):
+        """Delete blobs no snapshot file links to anymore, return amount deleted
+
+        Blobs are shared by all categories, so it must not run
+        while another category is being downloaded.
+        """
+        deleted = 0
+        for blob_path in glob.glob(os.path.join(self.blobs_path, "*", "*.json")):
+            if os.stat(blob_path).st_nlink == 1:
+                os.remove(blob_path)
+                deleted += 1
+        return deleted
+
+    def archive_files(self):
+        """Paths relative to inventory path that make a point-in-time copy of storage"""
+        files = [Manifest.FILE_NAME] if os.path.isfile(self.manifest.path) else []
+        for id in self.product_ids():
+            product_folder = os.path.join(Product.FOLDER_NAME, id)
+            files += [os.path.join(product_folder, s['name']) for s in self.manifest.snapshots(id)]
+        return files
+
+    def __init__(self, inventory_path, log_tag):
+        self.inventory_path = inventory_path
+        self.log_tag = log_tag
+        self.manifest = Manifest(inventory_path, log_tag)
+
+
+class SqliteStorage:
+    """Snapshots and last_seen values in a single SQLite database per category
+
+    inventory/<CATEGORY NAME>/inventory.sqlite3, in WAL mode.
+    Snapshot rows refer to contents in the blobs table by content hash.
+    Changes of a run are committed in one transaction by commit().
+    """
+
+    NAME = 'sqlite'
+    FILE_NAME = 'inventory.sqlite3'
+    # The database file changes in place every run, a delta archive would hold all of it again
+    DELTA_ARCHIVES = False
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS products (id TEXT PRIMARY KEY, last_seen TEXT)",
+        "CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, data TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS snapshots (product_id TEXT NOT NULL, timestamp TEXT NOT NULL, hash TEXT NOT NULL, PRIMARY KEY (product_id, timestamp))",
+        "CREATE INDEX IF NOT EXISTS snapshots_timestamp ON snapshots (timestamp)",
+        "CREATE INDEX IF NOT EXISTS snapshots_hash ON snapshots (hash)",
+    ]
+
+    @property
+    def path(self):
+        return os.path.join(self.inventory_path, self.FILE_NAME)
+
+    def snapshot_location(self, id, timestamp):
+        """Pseudo path of a snapshot row, for logs"""
+        return f"{self.path}#{id}/{timestamp}"
+
+    def snapshot_source(self, id, timestamp):
+        """Picklable description of a snapshot, read by snapshot_loader.py in other processes"""
+        return ('sqlite', self.path, id, timestamp)
+
+    def load(self):
+        # https://www.sqlite.org/wal.html
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        snapshot_columns = [row[1] for row in self.connection.execute("PRAGMA table_info(snapshots)")]
+        if 'data' in snapshot_columns:
+            self.migrate_inline_snapshots()
+        for statement in self.SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+
+    def migrate_inline_snapshots(self):
+        """Databases created before blobs kept snapshot data in the snapshots table"""
+        print(f"{self.log_tag} Moving snapshot data of {self.path} to blobs")
+        self.connection.execute("DROP INDEX IF EXISTS snapshots_timestamp")
+        self.connection.execute("ALTER TABLE snapshots RENAME TO inline_snapshots")
+        for statement in self.SCHEMA:
+            self.connection.execute(statement)
+        for id, timestamp, data in self.connection.execute("SELECT product_id, timestamp, data FROM inline_snapshots").fetchall():
+            self.insert_snapshot(id, timestamp, json.loads(data))
+        self.connection.execute("DROP TABLE inline_snapshots")
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
+
+    def product_ids(self):
+        return [row[0] for row in self.connection.execute("SELECT id FROM products ORDER BY id")]
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def ensure_product(self, id):
+        self.connection.execute("INSERT OR IGNORE INTO products (id, last_seen) VALUES (?, NULL)", (f"{id}",))
+
+    def snapshot_timestamps(self, id):
+        rows = self.connection.execute("SELECT timestamp FROM snapshots WHERE product_id = ? ORDER BY timestamp", (f"{id}",))
+        return [row[0] for row in rows]
+
+    def load_snapshot(self, id, timestamp):
+        row = self.connection.execute(
+            "SELECT data FROM snapshots JOIN blobs USING (hash) WHERE product_id = ? AND timestamp = ?",
+            (f"{id}", timestamp),
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"No snapshot {timestamp} of product {id}")
+        return json.loads(row[0])
+
+    def insert_snapshot(self, id, timestamp, properties):
+        content_hash = Product.content_hash(properties)
+        self.connection.execute(
+            "INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)",
+            (content_hash, json.dumps(properties, ensure_ascii=False, sort_keys=True)),
+        )
+        self.connection.execute(
+            "INSERT OR REPLACE INTO snapshots (product_id, timestamp, hash) VALUES (?, ?, ?)",
+            (f"{id}", timestamp, content_hash),
+        )
+
+    def add_snapshot(self, id, timestamp, properties):
+        self.ensure_product(id)
+        self.insert_snapshot(id, timestamp, properties)
+        return self.snapshot_location(id, timestamp)
+
+    def snapshot_hash(self, id, timestamp):
+        row = self.connection.execute("SELECT hash FROM snapshots WHERE product_id = ? AND timestamp = ?", (f"{id}", timestamp)).fetchone()
+        return row[0] if row else None
+
+    def delete_duplicate_snapshots(self, id):
+        checksums = []
+        deleted = []
+        rows = self.connection.execute("SELECT timestamp, hash FROM snapshots WHERE product_id = ? ORDER BY timestamp", (f"{id}",)).fetchall()
+        for timestamp, content_hash in rows:
+            if content_hash in checksums:
+                self.connection.execute("DELETE FROM snapshots WHERE product_id = ? AND timestamp = ?", (f"{id}", timestamp))
+                deleted.append(timestamp)
+            else:
+                checksums.append(content_hash)
+        return deleted
+
+    def last_seen(self, id):
+        row = self.connection.execute("SELECT last_seen FROM products WHERE id = ?", (f"{id}",)).fetchone()
+        return row[0] if row else None
+
+    def set_last_seen(self, id, value):
+        self.connection.execute("INSERT INTO products (id, last_seen) VALUES (?, ?) ON CONFLICT (id) DO UPDATE SET last_seen = excluded.last_seen", (f"{id}", value))
+
+    def remove_product(self, id):
+        deleted = self.connection.execute("DELETE FROM snapshots WHERE product_id = ?", (f"{id}",)).rowcount
+        self.connection.execute("DELETE FROM products WHERE id = ?", (f"{id}",))
+        return deleted > 0
+
+    def prune_blobs(self):
+        """Delete blobs no snapshot refers to anymore, return amount deleted"""
+        return self.connection.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM snapshots)").rowcount
+
+    def archive_files(self):
+        # Move everything from the WAL into the database file, so a copy of it is complete
+        self.connection.commit()
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return [self.FILE_NAME]
+
+    def __init__(self, inventory_path, log_tag):
+        self.inventory_path = inventory_path
+        self.log_tag = log_tag
+        self.connection = None
+
+
+BACKENDS = {backend.NAME: backend for backend in [FolderStorage, SqliteStorage]}
+
+
+def import_folder_storage(inventory_path, target, log_tag):
+    """Copy snapshots and last_seen values from folder layout into another storage"""
+    source = FolderStorage(inventory_path, log_tag)
+    source.load()
+    snapshots_imported = 0
+    for id in source.product_ids():
+        for timestamp in source.snapshot_timestamps(id):
+            target.add_snapshot(id, timestamp, source.load_snapshot(id, timestamp))
+            snapshots_imported += 1
+        last_seen = source.last_seen(id)
+        if last_seen is not None:
+            target.set_last_seen(id, last_seen)
+    target.commit()
+    return len(source), snapshots_imported
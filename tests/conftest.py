@@ -0,0 +1,27 @@
+import pytest
+import downloader
+from replay import ReplayServer, SyntheticCatalogue
+
+
+@pytest.fixture
+def synthetic_server(request):
+    """SyntheticCatalogue served on localhost, of SYNTHETIC_PRODUCTS products per category if the test module sets it"""
+    server = ReplayServer(SyntheticCatalogue(getattr(request.module, 'SYNTHETIC_PRODUCTS', 30)))
+    server.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_downloader(synthetic_server, tmp_path):
+    """Downloader of laptops and monitors from synthetic_server into tmp_path, extra command line options override these"""
+    def make(*args):
+        options = downloader.Options.parse([
+            "--delay=0", "--categories=laptops,monitors", f"--inventory={tmp_path}",
+            f"--base-url={synthetic_server.base_url}", *args,
+        ])
+        assert options.validate() is None
+        downloader.prepare_inventory_folder(options.folder)
+        return downloader.Downloader(options)
+    return make
@@ -84,4 +84,20 @@ assertEqual("plain 8 uses text fallback", context.numericTextFilterFunc("8", "18
 assertEqual("unit query is not numeric syntax", context.numericTextFilterFunc(">1tb", "1536 GB", null, storageParams), false);
 assertEqual("decimal query is not numeric syntax", context.numericTextFilterFunc(">1.5", "2 GB", null, capacityParams), false);
 
+const precomputedParams = {parseCapacity: true, numericField: "ram_gb"};
+assertEqual("precomputed number wins over string", context.numericTextFilterFunc(">8", "8 GB", {ram_gb: 16}, precomputedParams), true);
+assertEqual("precomputed null never matches", context.numericTextFilterFunc(">8", "16 GB", {ram_gb: null}, precomputedParams), false);
+assertEqual("missing precomputed field falls back to parsing", context.numericTextFilterFunc(">8", "16 GB", {}, precomputedParams), true);
+
+context.currentFacets = context.indexFacets({
+    values: {cpu: [{value: "Intel Core i5-8250U", count: 2, ids: [3, 7]}]},
+    ranges: {},
+});
+const cpuParams = {field: "cpu"};
+assertEqual("picked facet value matches its ids", context.facetFilterFunc("Intel Core i5-8250U", "Intel Core i5-8250U", {id: 7}, cpuParams), true);
+assertEqual("picked facet value skips other ids", context.facetFilterFunc("Intel Core i5-8250U", "Intel Core i5-8250U", {id: 4}, cpuParams), false);
+assertEqual("typed text uses like", context.facetFilterFunc("i5", "Intel Core i5-10210U", {id: 4}, cpuParams), true);
+context.currentFacets = null;
+assertEqual("without facets uses like", context.facetFilterFunc("Intel Core i5-8250U", "Intel Core i5-8250U", {id: 4}, cpuParams), true);
+
 console.log("ok");
@@ -0,0 +1,59 @@
+import os
+import sys
+import zipfile
+import pytest
+import archive_writer
+from archive_writer import ParallelZipWriter
+
+
+@pytest.mark.parametrize("codec", list(archive_writer.CODECS))
+def test_parallel_entries_read_back_in_order(tmp_path, monkeypatch, codec):
+    monkeypatch.setattr(archive_writer, 'MAX_PARALLEL_FILE_BYTES', 5000)
+    files = {}
+    for i in range(30):
+        # every 10th file is too large for workers and is streamed instead
+        contents = (f"snapshot {i} " * (1000 if i % 10 == 0 else 50)).encode()
+        (tmp_path / f"{i}.json").write_bytes(contents)
+        files[f"products/{i}/{i}.json"] = contents
+
+    archive_path = tmp_path / "new.zip"
+    with ParallelZipWriter(str(archive_path), codec, 5, workers=3) as writer:
+        for i, arcname in enumerate(files):
+            writer.add_file(str(tmp_path / f"{i}.json"), arcname)
+        writer.writestr("archive_manifest.json", "{}")
+
+    assert writer.input_bytes == sum(len(contents) for contents in files.values())
+    with zipfile.ZipFile(archive_path) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == list(files) + ["archive_manifest.json"]
+        assert {info.compress_type for info in archive.infolist()} == {archive_writer.CODECS[codec]}
+        for arcname, contents in files.items():
+            assert archive.read(arcname) == contents
+
+
+@pytest.mark.parametrize("codec", list(archive_writer.CODECS))
+@pytest.mark.parametrize("parallel", [True, False])
+def test_archive_matches_zipfile_write_byte_for_byte(tmp_path, monkeypatch, codec, parallel):
+    # guards the zipfile internals append_compressed() relies on, on the Python version running the tests
+    monkeypatch.setattr(archive_writer, 'PARALLEL_SUPPORTED', parallel and archive_writer.PARALLEL_SUPPORTED)
+    file_paths = []
+    for i in range(10):
+        file_path = tmp_path / f"{i}.json"
+        file_path.write_bytes((f"snapshot {i} " * 200).encode())
+        file_paths.append(str(file_path))
+
+    with ParallelZipWriter(str(tmp_path / "parallel.zip"), codec, workers=2) as writer:
+        for file_path in file_paths:
+            writer.add_file(file_path, os.path.basename(file_path))
+    with zipfile.ZipFile(tmp_path / "serial.zip", 'w', archive_writer.CODECS[codec]) as serial:
+        for file_path in file_paths:
+            serial.write(file_path, os.path.basename(file_path))
+
+    assert (tmp_path / "parallel.zip").read_bytes() == (tmp_path / "serial.zip").read_bytes()
+
+
+def test_python_version_was_checked():
+    # entries are compressed on one thread elsewhere, which is slower but not wrong
+    if not archive_writer.PARALLEL_SUPPORTED:
+        pytest.skip(f"zipfile internals not checked on {sys.version_info[:2]}, add it to CHECKED_PYTHON_VERSIONS "
+                    "once the byte-for-byte tests pass with PARALLEL_SUPPORTED forced on")
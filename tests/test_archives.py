@@ -0,0 +1,131 @@
+import os
+import time
+import json
+import zipfile
+from banknote import Banknote
+from storage import SqliteStorage
+
+
+def age_file(path, hours):
+    timestamp = time.time() - hours * 60 * 60
+    os.utime(path, (timestamp, timestamp))
+
+
+def add_snapshot(inventory, id, name, price):
+    timestamp = name.removesuffix('.json')
+    inventory.storage.add_snapshot(id, timestamp, {'price': price})
+    inventory.storage.set_last_seen(id, timestamp)
+    inventory.storage.commit()
+
+
+def make_inventory(tmp_path):
+    inventory = Banknote(os.fspath(tmp_path), "laptops")
+    os.makedirs(inventory.archives_path)
+    os.makedirs(inventory.product_root)
+    for file_path in [inventory.index_file_path, inventory.normalized_file_path]:
+        with open(file_path, "w") as f:
+            f.write("[]")
+    return inventory
+
+
+def test_delta_archive_holds_only_new_snapshots_and_restores(tmp_path):
+    inventory = make_inventory(tmp_path)
+    add_snapshot(inventory, 1, "2024-01-01_00-00-00.json", "100")
+    inventory.archive_inventory()
+    assert [a['type'] for a in inventory.archives()] == ['full']
+
+    age_file(os.path.join(inventory.archives_path, "latest.zip"), 48)
+    add_snapshot(inventory, 1, "2024-01-02_00-00-00.json", "90")
+    add_snapshot(inventory, 2, "2024-01-02_00-00-00.json", "50")
+    inventory.archive_inventory()
+
+    archives = inventory.archives()
+    assert [a['type'] for a in archives] == ['full', 'delta']
+    with zipfile.ZipFile(archives[-1]['path']) as delta:
+        names = delta.namelist()
+    assert os.path.join("products", "1", "2024-01-01_00-00-00.json") not in names
+    assert os.path.join("products", "1", "2024-01-02_00-00-00.json") in names
+
+    output_path = tmp_path / "restored"
+    inventory.restore_archive(os.fspath(output_path))
+    assert (output_path / "products" / "1" / "2024-01-01_00-00-00.json").is_file()
+    assert (output_path / "products" / "2" / "2024-01-02_00-00-00.json").is_file()
+    assert (output_path / "index.json").is_file()
+
+
+def test_sqlite_storage_archives_are_always_full(tmp_path):
+    inventory = Banknote(os.fspath(tmp_path), "laptops", SqliteStorage.NAME)
+    os.makedirs(inventory.archives_path)
+    add_snapshot(inventory, 1, "2024-01-01_00-00-00.json", "100")
+    inventory.archive_inventory()
+
+    age_file(os.path.join(inventory.archives_path, "latest.zip"), 48)
+    add_snapshot(inventory, 2, "2024-01-02_00-00-00.json", "50")
+    inventory.archive_inventory()
+    assert [a['type'] for a in inventory.archives()] == ['full', 'full']
+
+def test_prune_drops_whole_chains_and_keeps_newest(tmp_path):
+    inventory = make_inventory(tmp_path)
+    sizes_mb = {
+        "2024-01-01_00-00-00.zip": 600,
+        "2024-01-02_00-00-00.delta.zip": 600,
+        "2024-01-08_00-00-00.zip": 100,
+        "2024-01-09_00-00-00.delta.zip": 100,
+    }
+    for name, size_mb in sizes_mb.items():
+        with open(os.path.join(inventory.archives_path, name), "wb") as f:
+            f.truncate(size_mb * 1024 * 1024)
+    with open(os.path.join(inventory.archives_path, "latest.zip"), "wb") as f:
+        f.truncate(1)
+
+    inventory.prune_archive_folder()
+
+    remaining = [a['name'] for a in inventory.archives()]
+    assert remaining == ["2024-01-08_00-00-00.zip", "2024-01-09_00-00-00.delta.zip", "latest.zip"]
+
+
+def test_catalogue_follows_created_and_pruned_archives(tmp_path):
+    inventory = make_inventory(tmp_path)
+    add_snapshot(inventory, 1, "2024-01-01_00-00-00.json", "100")
+    inventory.archive_inventory()
+    age_file(os.path.join(inventory.archives_path, "latest.zip"), 24 * 8)
+    inventory.archive_inventory()
+
+    with open(inventory.archive_catalogue.path) as f:
+        catalogue = json.load(f)
+    names = sorted(os.listdir(inventory.archives_path))
+    assert sorted(a['name'] for a in catalogue['archives']) == [n for n in names if n.endswith(".zip")]
+    for entry in catalogue['archives']:
+        assert entry['size'] == os.path.getsize(os.path.join(inventory.archives_path, entry['name']))
+    assert inventory.archive_count == 2
+
+    # a fresh object reads the catalogue and notices files deleted behind its back
+    os.remove(os.path.join(inventory.archives_path, "latest.zip"))
+    assert Banknote(os.fspath(tmp_path), "laptops").archive_count == 1
+
+
+def test_retention_keeps_recent_days_and_newest_full_of_each_week(tmp_path):
+    inventory = make_inventory(tmp_path)
+    now = time.time()
+    names = []
+    for days_ago in range(40, 0, -1):
+        timestamp = time.strftime("%Y-%m-%d_%H-%M-%S", time.gmtime(now - days_ago * 24 * 60 * 60))
+        # a full archive every 7 days, deltas in between
+        names.append(f"{timestamp}.zip" if days_ago % 7 == 5 else f"{timestamp}.delta.zip")
+    for name in names:
+        with open(os.path.join(inventory.archives_path, name), "wb") as f:
+            f.truncate(1)
+    inventory.archive_keep_daily = 3
+    inventory.archive_keep_weekly = 2
+
+    inventory.prune_archive_folder()
+
+    remaining = [a['name'] for a in inventory.archives()]
+    fulls = [name for name in names if not name.endswith(".delta.zip")]
+    newest_chain = names[names.index(fulls[-1]):]
+    assert set(fulls[-2:]) <= set(remaining)
+    assert set(newest_chain) <= set(remaining)
+    assert fulls[0] not in remaining
+    # deltas of older chains are gone, deltas before the first full archive have no base
+    assert all(name in newest_chain for name in remaining if name.endswith(".delta.zip"))
+    assert len(remaining) == inventory.archive_count
@@ -0,0 +1,20 @@
+import os
+import stat
+from atomic_file import atomic_write, UMASK
+
+
+def test_new_file_gets_mode_of_open(tmp_path):
+    path = tmp_path / "normalized.json"
+    with atomic_write(str(path), "w", encoding='utf-8') as file:
+        file.write("{}")
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~UMASK
+
+
+def test_replaced_file_keeps_its_mode(tmp_path):
+    path = tmp_path / "normalized.json"
+    path.write_text("[]")
+    os.chmod(path, 0o644)
+    with atomic_write(str(path), "w", encoding='utf-8') as file:
+        file.write("{}")
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    assert path.read_text() == "{}"
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+from change_feed import ChangeFeed, fold
+
+
+def item(id, price, cpu="i5"):
+    return {'id': id, 'title': f"Product {id}", 'price': price, 'cpu': cpu, 'timestamp': "2024-01-01T00:00:00+00:00"}
+
+
+def run(feed, items, removal_reasons=None):
+    feed.load()
+    for i in items:
+        feed.observe(i)
+    return feed.finish(0, removal_reasons)
+
+
+def test_runs_append_added_removed_repriced_and_changed_events(tmp_path):
+    feed = ChangeFeed(os.fspath(tmp_path), "[Test]")
+    assert run(feed, [item(1, 100.0), item(2, 50.0), item(3, 10.0)]) == []
+
+    events = run(feed, [item(1, 90.0), item(2, 50.0, cpu="i7"), item(4, 5.0)], {3: 'sold'})
+    by_type = {event['type']: event for event in events}
+    assert by_type['repriced']['id'] == 1 and by_type['repriced']['old_price'] == 100.0 and by_type['repriced']['price'] == 90.0
+    assert by_type['changed']['item']['cpu'] == "i7"
+    assert by_type['added']['item'] == item(4, 5.0)
+    assert by_type['removed'] == {**by_type['removed'], 'id': 3, 'reason': 'sold'}
+    assert [event['seq'] for event in events] == [1, 2, 3, 4]
+
+    assert [(event['type'], event['id']) for event in run(feed, [item(1, 90.0), item(2, 50.0, cpu="i7")])] == [('removed', 4)]
+    assert [event['seq'] for event in feed.events_since(3)] == [4, 5]
+    with open(feed.delta_path) as delta_file:
+        delta = json.load(delta_file)
+    assert (delta['from_seq'], delta['to_seq']) == (5, 5)
+    assert delta['events'][0]['reason'] == 'delisted'
+
+
+def test_events_of_an_unfinished_run_are_dropped(tmp_path):
+    feed = ChangeFeed(os.fspath(tmp_path), "[Test]")
+    run(feed, [item(1, 100.0)])
+    run(feed, [item(1, 90.0)])
+    feed.load()
+    feed.observe(item(1, 80.0))
+    feed.finish(0)
+    segment_path = os.path.join(feed.path, feed.segment_names()[0])
+
+    # crash after appending events, before saving state
+    with open(feed.state_path) as state_file:
+        state = json.load(state_file)
+    run(feed, [item(1, 70.0)])
+    with open(feed.state_path, "w") as state_file:
+        json.dump(state, state_file)
+
+    events = run(feed, [item(1, 70.0)])
+    assert [(event['seq'], event['old_price']) for event in events] == [(3, 80.0)]
+    with open(segment_path) as segment_file:
+        assert [json.loads(line)['seq'] for line in segment_file] == [1, 2, 3]
+
+
+def test_compaction_folds_old_segments_into_net_events(tmp_path):
+    feed = ChangeFeed(os.fspath(tmp_path), "[Test]")
+    feed.SEGMENT_EVENTS = 1
+    run(feed, [item(1, 100.0)])
+    run(feed, [item(1, 100.0), item(2, 20.0)])
+    run(feed, [item(1, 90.0), item(2, 20.0)])
+    run(feed, [item(1, 80.0), item(2, 25.0, cpu="i7")])
+    run(feed, [item(1, 80.0), item(2, 30.0, cpu="i7")])
+    old = time.time() - 40 * 24 * 60 * 60
+    for name in feed.segment_names():
+        os.utime(os.path.join(feed.path, name), (old, old))
+
+    # the current segment is kept as is
+    assert feed.compact() == 3
+    assert len(feed.segment_names()) == 1
+    events = list(feed.events_since(0))
+    assert [(event['type'], event['id'], event['seq']) for event in events] == [('repriced', 1, 3), ('added', 2, 4), ('repriced', 2, 5)]
+    assert (events[0]['old_price'], events[0]['price']) == (100.0, 80.0)
+    assert events[1]['item']['cpu'] == "i7" and events[1]['item']['price'] == 25.0
+    assert [event['seq'] for event in feed.events_since(4)] == [5]
+
+
+def test_fold_keeps_removal_and_readdition():
+    added = {'seq': 1, 'timestamp': "t1", 'type': 'added', 'id': 1, 'item': item(1, 10.0)}
+    removed = {'seq': 2, 'timestamp': "t2", 'type': 'removed', 'id': 1, 'reason': 'sold'}
+    readded = {'seq': 3, 'timestamp': "t3", 'type': 'added', 'id': 1, 'item': item(1, 12.0)}
+    repriced = {'seq': 4, 'timestamp': "t4", 'type': 'repriced', 'id': 1, 'old_price': 12.0, 'price': 9.0}
+    assert fold(added, removed) == removed
+    assert fold(fold(added, removed), readded) == readded
+    assert fold(readded, repriced) == {**readded, 'seq': 4, 'timestamp': "t4", 'item': item(1, 9.0)}
+
+
+def test_lost_state_keeps_history_and_continues_numbering(tmp_path):
+    feed = ChangeFeed(os.fspath(tmp_path), "[Test]")
+    run(feed, [item(1, 100.0)])
+    run(feed, [item(1, 90.0)])
+    run(feed, [item(1, 80.0)])
+    segments = feed.segment_names()
+    os.remove(feed.state_path)
+
+    # the run after losing state records a new baseline, without a saved segment
+    assert run(feed, [item(1, 80.0)]) == []
+    assert feed.segment_names() == segments
+    events = run(feed, [item(1, 70.0)])
+    assert [event['seq'] for event in events] == [3]
+    assert [event['seq'] for event in feed.events_since(0)] == [1, 2, 3]
+    assert feed.segment_names() == segments + ["000000000003.jsonl"]
@@ -0,0 +1,56 @@
+import os
+import json
+import pytest
+import downloader
+from checkpoint import Checkpoint
+
+
+def test_checkpoint_resumes_only_the_same_index(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path), "[Test]")
+    checkpoint.load()
+    assert checkpoint.start(100.0) is False
+    checkpoint.add_removed(5, 'sold')
+    checkpoint.mark_done('dump')
+
+    resumed = Checkpoint(str(tmp_path), "[Test]")
+    resumed.load()
+    assert resumed.index_timestamp == 100.0
+    assert resumed.start(100.0) is True
+    assert resumed.is_done('dump')
+    assert resumed.removed_ids == {5}
+    assert resumed.removal_reasons == {5: 'sold'}
+
+    restarted = Checkpoint(str(tmp_path), "[Test]")
+    restarted.load()
+    assert restarted.start(200.0) is False
+    assert not restarted.is_done('dump')
+
+    restarted.clear()
+    assert not os.path.isfile(restarted.path)
+
+
+def test_interrupted_run_resumes_after_finished_stages(make_downloader, monkeypatch):
+    instance = make_downloader("--categories=laptops", "--http-cache=off")
+    laptops = instance.inventory('laptops')
+
+    def crash():
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(laptops, 'archive_inventory', crash)
+    assert instance.run_once(['laptops']) == ['laptops']
+    with open(laptops.checkpoint.path, encoding='utf-8') as checkpoint_file:
+        data = json.load(checkpoint_file)
+    assert data['stages'] == ['dump', 'prune', 'price_history']
+
+    # restarted a day later: the index of the unfinished run is reused and finished stages are skipped
+    monkeypatch.undo()
+    day_ago = data['index_timestamp'] - 60 * 60 * 24
+    os.utime(laptops.index_file_path, (day_ago, day_ago))
+    with open(laptops.checkpoint.path, "w", encoding='utf-8') as checkpoint_file:
+        json.dump({**data, 'index_timestamp': day_ago}, checkpoint_file)
+    restarted = downloader.Downloader(instance.options)
+    dumped = restarted.inventory('laptops')
+    monkeypatch.setattr(dumped, 'dump_normalized_inventory', lambda *args: pytest.fail("dumped again"))
+    assert restarted.run_once(['laptops']) == []
+    assert dumped.stats.counters.get('requests', 0) == 0
+    assert dumped.archive_count == 1
+    assert not os.path.isfile(dumped.checkpoint.path)
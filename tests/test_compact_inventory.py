@@ -0,0 +1,48 @@
+import os
+import json
+import gzip
+import compact_inventory
+
+
+def test_columnar_roundtrip_and_image_prefix():
+    inventory_dictionary = {
+        'index_file_modification_timestamp': 1700000000.0,
+        'inventory': [
+            {'id': 1, 'price': 100.0, 'ram': '8 GB', 'images': ["https://veikals.banknote.lv/storage/erp/a.jpg", "https://veikals.banknote.lv/storage/erp/b.jpg"]},
+            {'id': 2, 'price': 50.0, 'defect': 'Scratch', 'images': ["https://veikals.banknote.lv/storage/erp2/c.jpg"]},
+        ],
+    }
+
+    compact = compact_inventory.to_columnar(inventory_dictionary)
+
+    assert compact['image_prefix'] == "https://veikals.banknote.lv/storage/"
+    assert compact['columns']['ram'] == ['8 GB', None]
+    assert compact['columns']['images'][0] == ["erp/a.jpg", "erp/b.jpg"]
+    assert compact_inventory.from_columnar(compact) == inventory_dictionary
+
+
+def test_write_precompressed(tmp_path):
+    file_path = tmp_path / "normalized.json"
+    file_path.write_bytes(b'{"inventory": []}')
+
+    written = compact_inventory.write_precompressed(str(file_path))
+
+    assert gzip.decompress(open(written['gzip'], 'rb').read()) == b'{"inventory": []}'
+
+
+def test_streamed_dump_matches_json_dump(tmp_path):
+    from banknote import Banknote
+    inventory = Banknote(str(tmp_path), "laptops")
+    os.makedirs(inventory.path)
+    items = [
+        {'id': 1, 'title': "Dell \"Latitude\"\nE7470", 'images': ["https://veikals.banknote.lv/storage/erp/a.jpg"]},
+        {'id': 2, 'title': "Lenovo", 'defect': 'Scratch', 'images': []},
+    ]
+
+    for expected_items in [items, []]:
+        assert inventory.dump_normalized_inventory(1700000000.5, iter(expected_items)) == len(expected_items)
+        expected = {'index_file_modification_timestamp': 1700000000.5, 'inventory': expected_items}
+        with open(inventory.normalized_file_path, encoding='utf-8') as normalized_file:
+            assert normalized_file.read() == json.dumps(expected, indent=2)
+        with open(inventory.compact_normalized_file_path, encoding='utf-8') as compact_file:
+            assert compact_inventory.from_columnar(json.load(compact_file)) == expected
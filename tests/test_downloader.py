@@ -0,0 +1,84 @@
+import os
+import json
+import threading
+import downloader
+
+
+def test_options_parse_intervals_and_validate():
+    options = downloader.Options.parse(["--interval=120,laptops:30", "--rate=2"])
+    assert options.interval_seconds('laptops') == 30 * 60
+    assert options.interval_seconds('monitors') == 120 * 60
+    assert options.rate == 2
+
+    assert downloader.Options.parse(["--categories=tablets"]).validate() == "Unknown category: tablets"
+    assert downloader.Options.parse(["--storage=csv"]).validate() == "Unknown storage: csv"
+
+
+def test_run_once_updates_categories_and_reuses_inventories(make_downloader, tmp_path):
+    instance = make_downloader()
+    assert instance.run_once(['laptops', 'monitors']) == []
+
+    with open(tmp_path / "laptops" / "normalized.json", encoding='utf-8') as normalized_file:
+        assert len(json.load(normalized_file)['inventory']) == 30
+    with open(tmp_path / "laptops" / "facets.json", encoding='utf-8') as facets_file:
+        assert json.load(facets_file)['count'] == 30
+    laptops = instance.inventory('laptops')
+    assert len(laptops.latest_details) == 0 # nothing was read back yet
+
+    # index is fresh, second run reuses it and the snapshots in memory
+    assert instance.run_once(['laptops']) == []
+    assert instance.inventory('laptops') is laptops
+    assert len(laptops.latest_details) == 30
+
+    health = instance.health()
+    assert health['healthy']
+    assert health['categories']['laptops']['last_succeeded_at'] is not None
+
+
+def test_failures_are_reported_in_health(make_downloader, tmp_path):
+    instance = make_downloader()
+    open(downloader.lock_file_path(os.fspath(tmp_path), 'monitors'), "w").close()
+    try:
+        assert instance.run_once(['monitors']) == ['monitors']
+    finally:
+        downloader.release_lock(os.fspath(tmp_path), 'monitors')
+
+    health = instance.health()
+    assert not health['healthy']
+    assert health['categories']['monitors']['consecutive_failures'] == 1
+
+
+def test_daemon_schedules_categories_until_stopped(make_downloader, tmp_path):
+    instance = make_downloader("--daemon", "--interval=60")
+    thread = threading.Thread(target=instance.run_daemon)
+    thread.start()
+    try:
+        for _ in range(100):
+            if all(status['next_run_at'] for status in instance.health()['categories'].values()):
+                break
+            thread.join(0.1)
+    finally:
+        instance.stop()
+        thread.join(10)
+
+    assert not thread.is_alive()
+    assert os.path.isfile(tmp_path / "monitors" / "normalized.json")
+    assert all(status['last_succeeded_at'] for status in instance.health()['categories'].values())
+
+
+def test_change_feed_records_repriced_and_delisted_products(make_downloader, synthetic_server, tmp_path):
+    instance = make_downloader()
+    assert instance.run_once(['laptops']) == []
+
+    synthetic_server.catalogue.products = 28
+    synthetic_server.catalogue.repriced = 1.0
+    synthetic_server.catalogue.revision = 7
+    hour_ago = os.path.getmtime(tmp_path / "laptops" / "index.json") - 60 * 60
+    os.utime(tmp_path / "laptops" / "index.json", (hour_ago, hour_ago))
+    assert instance.run_once(['laptops']) == []
+
+    with open(tmp_path / "laptops" / "changes" / "delta.json", encoding='utf-8') as delta_file:
+        events = json.load(delta_file)['events']
+    assert sorted(event['type'] for event in events) == ['removed'] * 2 + ['repriced'] * 28
+    assert all(event['reason'] == 'delisted' for event in events if event['type'] == 'removed')
+    assert os.path.isfile(tmp_path / "laptops" / "changes" / "delta.json.gz")
@@ -0,0 +1,31 @@
+from facets import FacetBuilder
+
+
+def test_facets_count_values_and_bucket_ranges():
+    builder = FacetBuilder()
+    for item in [
+        {'id': 5, 'city': "Rīga", 'cpu': "Intel Core i5", 'price': 100.0, 'ram_gb': 8.0},
+        {'id': 2, 'city': "Rīga", 'cpu': "", 'price': 300.0, 'ram_gb': None},
+        {'id': 9, 'city': "Liepāja", 'price': 1100.0, 'ram_gb': 8.0},
+    ]:
+        builder.add(item)
+
+    facets = builder.to_facets(1700000000.0)
+
+    assert facets['count'] == 3
+    assert facets['values']['city'] == [
+        {'value': "Rīga", 'count': 2, 'ids': [2, 5]},
+        {'value': "Liepāja", 'count': 1, 'ids': [9]},
+    ]
+    # empty values aren't offered, fields no product has are left out
+    assert facets['values']['cpu'] == [{'value': "Intel Core i5", 'count': 1, 'ids': [5]}]
+    assert 'panel' not in facets['values']
+
+    price = facets['ranges']['price']
+    assert (price['min'], price['max'], len(price['buckets'])) == (100.0, 1100.0, 10)
+    assert price['buckets'][0] == {'start': 100.0, 'end': 200.0, 'count': 1, 'ids': [5]}
+    assert price['buckets'][2]['ids'] == [2]
+    assert price['buckets'][-1]['ids'] == [9]
+
+    # a single value makes a single bucket
+    assert facets['ranges']['ram_gb']['buckets'] == [{'start': 8.0, 'end': 8.0, 'count': 2, 'ids': [5, 9]}]
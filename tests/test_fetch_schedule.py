@@ -0,0 +1,80 @@
+import json
+import time
+from fetch_schedule import FetchSchedule
+
+SYNTHETIC_PRODUCTS = 20
+
+
+class FakeProduct:
+    def __init__(self, id):
+        self.id = id
+
+
+def item(id):
+    return {'id': id, 'article': f"A{id}"}
+
+
+def test_order_puts_new_before_repriced_before_due_revalidation(tmp_path):
+    schedule = FetchSchedule(str(tmp_path), "[Test]", revalidate_days=7, revalidate_per_run=2)
+    day = 24 * 60 * 60
+    schedule.fetched_at = {3: time.time() - 30 * day, 4: time.time() - 10 * day, 5: time.time() - day, 6: time.time() - 20 * day}
+    pairs = {id: (item(id), FakeProduct(id)) for id in range(1, 7)}
+
+    order = schedule.order([pairs[2], pairs[1]], [pairs[4]], [pairs[3], pairs[5], pairs[6]])
+    assert [(reason, entry['id']) for reason, entry, _ in order] == [
+        (FetchSchedule.NEW, 1), (FetchSchedule.NEW, 2),
+        (FetchSchedule.REPRICED, 4),
+        # oldest first, at most revalidate_per_run, 5 isn't due yet
+        (FetchSchedule.REVALIDATE, 3), (FetchSchedule.REVALIDATE, 6),
+    ]
+
+    schedule.retain([1, 3])
+    schedule.mark_fetched(1)
+    schedule.save()
+    schedule.load()
+    assert sorted(schedule.fetched_at) == [1, 3]
+
+
+def normalized_ids(tmp_path):
+    with open(tmp_path / "laptops" / "normalized.json", encoding='utf-8') as normalized_file:
+        return [item['id'] for item in json.load(normalized_file)['inventory']]
+
+
+def test_time_budget_defers_pages_to_the_next_run(make_downloader, tmp_path):
+    instance = make_downloader("--categories=laptops", "--http-cache=off", "--time-budget=0.000001")
+    assert instance.run_once(['laptops']) == []
+    laptops = instance.inventory('laptops')
+    assert laptops.stats.counters['products_deferred'] == 20
+    assert normalized_ids(tmp_path) == [] # new products without pages wait for the next run
+
+    instance.options.time_budget_minutes = None
+    assert instance.run_once(['laptops']) == []
+    assert len(normalized_ids(tmp_path)) == 20
+
+
+def test_revalidation_catches_spec_edits_without_price_change(make_downloader, synthetic_server):
+    instance = make_downloader("--categories=laptops", "--http-cache=off", "--revalidate-per-run=3")
+    assert instance.run_once(['laptops']) == []
+    laptops = instance.inventory('laptops')
+
+    # pages were fetched long ago and one product got more RAM at the same price
+    schedule = laptops.fetch_schedule
+    schedule.load()
+    schedule.fetched_at = {id: timestamp - 30 * 24 * 60 * 60 + position for position, (id, timestamp) in enumerate(schedule.fetched_at.items())}
+    schedule.save()
+    oldest_id = min(schedule.fetched_at, key=schedule.fetched_at.get)
+    catalogue = synthetic_server.catalogue
+    original_product = catalogue.product
+    def edited_product(category_id, number):
+        product = original_product(category_id, number)
+        if product['id'] == oldest_id:
+            product['specs'][1]['value'] = "64 GB"
+        return product
+    catalogue.product = edited_product
+
+    # index is fresh, so only revalidated pages are requested
+    assert instance.run_once(['laptops']) == []
+    assert laptops.stats.counters['products_revalidated'] == 3
+    assert laptops.stats.counters['requests'] == 3
+    assert laptops.stats.counters['revalidation_changes'] == 1
+    assert laptops.product(oldest_id).load_latest_snapshot()['description_f'][1]['value'] == "64 GB"
@@ -0,0 +1,29 @@
+import pytest
+import html_extract
+
+NEW_TEMPLATE = '<html><body><script>var s = "<buy-now-btn>";</script><div><buy-now-btn :product="{&quot;id&quot;: 1}"></buy-now-btn></div></body></html>'
+OLD_TEMPLATE = '<html><body><buy-now-btn :product="{}"></buy-now-btn><product-item-leasing :product="{&quot;id&quot;: 2}"></product-item-leasing></body></html>'
+SOLD = '<html><body><h1>Prece nav pieejama</h1></body></html>'
+HOMEPAGE = '<html><body><product-categories :categories="[{&quot;id&quot;: 8}]"></product-categories></body></html>'
+
+
+@pytest.fixture(params=['stdlib', 'lxml'])
+def scanner(request, monkeypatch):
+    if request.param == 'stdlib':
+        monkeypatch.setattr(html_extract, 'etree', None)
+    elif html_extract.etree is None:
+        pytest.skip("lxml is not installed")
+
+
+@pytest.mark.parametrize("html", [NEW_TEMPLATE, OLD_TEMPLATE, SOLD])
+def test_extract_product_data_matches_beautifulsoup(scanner, html):
+    assert html_extract.extract_product_data(html) == html_extract.extract_product_data_soup(html)
+
+
+def test_old_template_wins(scanner):
+    assert html_extract.extract_product_data(OLD_TEMPLATE) == '{"id": 2}'
+
+
+def test_extract_attribute(scanner):
+    assert html_extract.extract_attribute(HOMEPAGE, 'product-categories', ':categories') == '[{"id": 8}]'
+    assert html_extract.extract_attribute(SOLD, 'product-categories', ':categories') is None
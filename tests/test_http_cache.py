@@ -0,0 +1,103 @@
+import pytest
+from banknote_client import BanknoteClient
+from http_cache import HttpCache, freshness_lifetime
+from replay import ReplayServer
+from run_stats import RunStats
+
+
+class CountingCatalogue:
+    """Every path responds with its own body and the configured headers"""
+
+    def respond(self, target):
+        self.requests.append(target)
+        return 200, {'Content-Type': 'text/html; charset=utf-8', **self.headers}, f"<html>{target}</html>"
+
+    def __init__(self, headers):
+        self.headers = headers
+        self.requests = []
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def serve(headers):
+        catalogue = CountingCatalogue(headers)
+        server = ReplayServer(catalogue)
+        server.start()
+        servers.append(server)
+        return server.base_url, catalogue
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_client(base_url, tmp_path, max_bytes=1024 * 1024):
+    return BanknoteClient(base_url=base_url, cache=HttpCache(str(tmp_path / "http_cache"), max_bytes))
+
+
+def test_freshness_lifetime():
+    assert freshness_lifetime({'Cache-Control': 'public, max-age=60'}) == 60
+    assert freshness_lifetime({'Cache-Control': 'no-cache, private'}) == 0
+    assert freshness_lifetime({'Expires': 'Thu, 01 Jan 2026 00:10:00 GMT', 'Date': 'Thu, 01 Jan 2026 00:00:00 GMT'}) == 600
+    assert freshness_lifetime({}) is None
+
+
+def test_fresh_pages_are_served_from_cache(serve, tmp_path):
+    base_url, catalogue = serve({'Cache-Control': 'max-age=60'})
+    client = make_client(base_url, tmp_path)
+    stats = RunStats(str(tmp_path), "[Test]")
+
+    first = client.get(f"{BanknoteClient.SHOP_URL}/lv/p/1", stats=stats)
+    second = client.get(f"{BanknoteClient.SHOP_URL}/lv/p/1", stats=stats)
+    assert second.text == first.text == "<html>/lv/p/1</html>"
+    assert second.from_cache
+    assert catalogue.requests.count('/lv/p/1') == 1
+    assert stats.counters['http_cache_hits'] == 1
+    assert stats.counters['http_cache_bytes_saved'] == len(first.content)
+
+    # params are part of the key
+    client.get(f"{BanknoteClient.SHOP_URL}/lv/p/1", params={'page': 2})
+    assert catalogue.requests.count('/lv/p/1?page=2') == 1
+
+
+def test_stale_pages_are_revalidated(serve, tmp_path):
+    base_url, catalogue = serve({'Cache-Control': 'no-cache', 'ETag': '"v1"'})
+    client = make_client(base_url, tmp_path)
+    stats = RunStats(str(tmp_path), "[Test]")
+
+    client.get(f"{BanknoteClient.SHOP_URL}/lv/p/1", stats=stats)
+    revalidated = client.get(f"{BanknoteClient.SHOP_URL}/lv/p/1", stats=stats)
+    assert revalidated.status_code == 200
+    assert revalidated.text == "<html>/lv/p/1</html>"
+    assert catalogue.requests.count('/lv/p/1') == 2
+    assert stats.counters['http_cache_revalidated'] == 1
+
+    # a restarted run may reuse pages for a while whatever the headers say
+    client.get(f"{BanknoteClient.SHOP_URL}/lv/p/1", min_fresh_seconds=60)
+    assert catalogue.requests.count('/lv/p/1') == 2
+
+
+def test_no_store_and_foreign_urls_are_not_cached(serve, tmp_path):
+    base_url, catalogue = serve({'Cache-Control': 'no-store, max-age=60'})
+    client = make_client(base_url, tmp_path)
+    for _ in range(2):
+        client.get(f"{BanknoteClient.SHOP_URL}/lv/p/1")
+        client.get(f"{base_url}/heartbeat")
+    assert catalogue.requests.count('/lv/p/1') == 2
+    assert catalogue.requests.count('/heartbeat') == 2
+
+
+def test_least_recently_used_entries_are_evicted(serve, tmp_path):
+    base_url, catalogue = serve({'Cache-Control': 'max-age=60'})
+    client = make_client(base_url, tmp_path, max_bytes=1000)
+    for id in range(10):
+        client.get(f"{BanknoteClient.SHOP_URL}/lv/p/{id}")
+
+    assert client.cache.size <= 1000
+    client.get(f"{BanknoteClient.SHOP_URL}/lv/p/9")
+    client.get(f"{BanknoteClient.SHOP_URL}/lv/p/0")
+    assert catalogue.requests.count('/lv/p/9') == 1
+    assert catalogue.requests.count('/lv/p/0') == 2
@@ -0,0 +1,56 @@
+import json
+from banknote import Banknote
+from downloader import Downloader
+from replay import SyntheticCatalogue
+
+SYNTHETIC_PRODUCTS = 150
+
+
+def test_diff_index_reports_added_removed_and_repriced():
+    old_index = [{'id': 1, 'price': '100.00'}, {'id': 2, 'price': '50.00'}, {'id': 3, 'price': '10.00'}]
+    new_index = [{'id': 1, 'price': '90.00'}, {'id': 3, 'price': '10.00'}, {'id': 4, 'price': '5.00'}]
+
+    diff = Banknote.diff_index(old_index, new_index)
+
+    assert diff['added'] == [4]
+    assert diff['removed'] == [2]
+    assert diff['repriced'] == [{'id': 1, 'old_price': '100.00', 'new_price': '90.00'}]
+
+
+def test_diff_index_of_first_crawl_adds_everything():
+    diff = Banknote.diff_index([], [{'id': 1, 'price': '1.00'}])
+    assert diff == {'added': [1], 'removed': [], 'repriced': []}
+
+
+def test_unique_items_drops_repeated_products():
+    index = [{'id': 1, 'price': '1.00'}, {'id': 2, 'price': '2.00'}, {'id': 1, 'price': '3.00'}]
+    assert list(Downloader.unique_items(index)) == index[:2]
+
+
+
+def repriced_after_second_page_changes(instance, catalogue):
+    """Ids repriced by an index download after every product past the first page got a new price"""
+    instance.fetch_product_categories()
+    laptops = instance.inventory('laptops')
+    instance.download_index(laptops)
+    original_product = catalogue.product
+    def repriced_product(category_id, number):
+        product = original_product(category_id, number)
+        if number >= SyntheticCatalogue.PER_PAGE_DEFAULT:
+            product['price'] = "1.00"
+        return product
+    catalogue.product = repriced_product
+    instance.download_index(laptops)
+    with open(laptops.index_diff_file_path, encoding='utf-8') as index_diff_file:
+        return json.load(index_diff_file)['repriced']
+
+
+def test_every_index_page_is_crawled_by_default(make_downloader, synthetic_server):
+    instance = make_downloader("--categories=laptops", "--http-cache=off")
+    repriced = repriced_after_second_page_changes(instance, synthetic_server.catalogue)
+    assert len(repriced) == SYNTHETIC_PRODUCTS - SyntheticCatalogue.PER_PAGE_DEFAULT
+
+
+def test_incremental_index_stops_at_first_unchanged_page(make_downloader, synthetic_server):
+    instance = make_downloader("--categories=laptops", "--http-cache=off", "--full-index-every=4")
+    assert repriced_after_second_page_changes(instance, synthetic_server.catalogue) == []
@@ -0,0 +1,50 @@
+import os
+import json
+from manifest import Manifest
+
+
+def write_snapshot(tmp_path, id, name, data):
+    product_path = tmp_path / "products" / f"{id}"
+    product_path.mkdir(parents=True, exist_ok=True)
+    (product_path / name).write_text(json.dumps(data))
+    return os.fspath(product_path / name)
+
+
+def test_rebuild_scans_existing_folders(tmp_path):
+    write_snapshot(tmp_path, 1, "2024-01-01_00-00-00.json", {'price': '1'})
+    write_snapshot(tmp_path, 1, "2024-01-02_00-00-00.json", {'price': '2'})
+    (tmp_path / "products" / "1" / "last_seen").write_text("2024-01-03_00-00-00")
+
+    manifest = Manifest(os.fspath(tmp_path), "[Test]")
+    manifest.load()
+
+    snapshots = manifest.snapshots(1)
+    assert [s['name'] for s in snapshots] == ["2024-01-01_00-00-00.json", "2024-01-02_00-00-00.json"]
+    assert manifest.product(1)['last_seen'] == "2024-01-03_00-00-00"
+
+    # per-folder file is migrated, but only deleted once the manifest is saved
+    assert (tmp_path / "products" / "1" / "last_seen").is_file()
+    manifest.save()
+    assert not (tmp_path / "products" / "1" / "last_seen").exists()
+
+
+def test_save_and_reload_without_touching_product_folders(tmp_path):
+    manifest = Manifest(os.fspath(tmp_path), "[Test]")
+    manifest.load()
+    file_path = write_snapshot(tmp_path, 2, "2024-01-01_00-00-00.json", {'price': '1'})
+    manifest.add_snapshot(2, file_path)
+    manifest.set_last_seen(2, "2024-01-01_00-00-00")
+    manifest.save()
+
+    os.remove(file_path) # reloading must not look at the folder again
+    reloaded = Manifest(os.fspath(tmp_path), "[Test]")
+    reloaded.load()
+    assert [s['name'] for s in reloaded.snapshots(2)] == ["2024-01-01_00-00-00.json"]
+    assert reloaded.product(2)['last_seen'] == "2024-01-01_00-00-00"
+
+
+def test_unknown_product_gets_empty_entry(tmp_path):
+    manifest = Manifest(os.fspath(tmp_path), "[Test]")
+    manifest.load()
+    assert manifest.snapshots(3) == []
+    assert manifest.product(3)['last_seen'] is None
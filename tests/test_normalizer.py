@@ -0,0 +1,38 @@
+from normalizer import normalize_product
+
+
+def test_laptop_rules_fall_through_like_elif_chain():
+    specs = [
+        {'title': "Procesors", 'value': ""}, # empty cpu is skipped, not stored
+        {'title': "Diska lasītājs", 'value': "DVD-RW"}, # excluded from storage
+        {'title': "Cietais disks", 'value': "512 GB SSD\n"},
+        {'title': "Videokarte", 'value': "Intel UHD"},
+        {'title': "Grafiskā karte", 'value': "NVIDIA RTX 3060"},
+        {'title': "Defekts", 'value': "&nbsp;Scratch"},
+    ]
+
+    normalized = normalize_product('laptops', specs)
+
+    assert 'cpu' not in normalized
+    assert normalized['storage'] == "512 GB SSD"
+    assert normalized['storage_gb'] == 512
+    assert normalized['gpu'] == "Intel UHD + NVIDIA RTX 3060"
+    assert normalized['defect'] == "Scratch"
+
+
+def test_monitor_rules():
+    specs = [
+        {'title': "Izšķirtspēja", 'value': "2560 x 1440"},
+        {'title': "Ekrāna izmērs", 'value': "27\""},
+        {'title': "Matricas tips", 'value': "IPS"},
+    ]
+
+    normalized = normalize_product('monitors', specs)
+
+    assert normalized['resolution'] == "2560x1440"
+    assert normalized['size'] == "27"
+    assert normalized['panel'] == "IPS"
+
+
+def test_unknown_category_only_gets_common_rules():
+    assert normalize_product('tablets', [{'title': "Defekts", 'value': "Cracked"}, {'title': "RAM", 'value': "4 GB"}]) == {'defect': "Cracked"}
@@ -0,0 +1,51 @@
+import pytest
+import numeric_fields
+
+# Same vectors as tests/numeric-filters.js
+capacity_cases = [
+    ("RAM parses GB", "8 GB", 8),
+    ("RAM parses compact GB", "16GB", 16),
+    ("RAM ignores DDR prefix", "DDR4 16GB", 16),
+    ("RAM ignores multiplier prefix", "2x8GB DDR4", 8),
+    ("RAM converts MB", "8192 MB", 8),
+    ("RAM parses Cyrillic GB", "16 ГБ Память", 16),
+    ("Storage parses TB", "1 TB SSD", 1024),
+    ("Storage parses T shorthand", "3T SSD", 3072),
+    ("Storage parses decimal TB", "1.5 TB SSD (1 TB NVMe + 500 GB NVMe)", 1536),
+    ("Storage parses TBGB typo as TB", "1TBGB SSD", 1024),
+    ("Storage parses G shorthand", "128G SSD", 128),
+    ("Storage parses Cyrillic TB/GB", "HDD 1 TБ/ SSD 256 ГБ", 1024),
+    ("Storage ignores Gen4 before TB", "NVMe PCIe Gen4 SSD 1TB", 1024),
+    ("Storage ignores model numbers", "Samsung SSD 970 EVO Plus 250GB", 250),
+    ("Storage picks largest capacity", "256 GB SSD, 1 TB HDD", 1024),
+    ("Storage does not sum mirrored notation", "2x 512GB SSD", 512),
+    ("Storage parses bare number before SSD", "512 SSD", 512),
+    ("Storage parses bare number after SSD", "SSD 256", 256),
+    ("Storage rejects typo unit HB", "512HB SSD", None),
+    ("Storage rejects model without capacity", "Optiarc DVD RW AD-7280S", None),
+]
+
+generic_cases = [
+    ("Generic size still parses first number", "27\"", 27),
+    ("Generic refresh still parses first number", "144 Hz", 144),
+]
+
+
+@pytest.mark.parametrize("name, value, expected", capacity_cases, ids=[c[0] for c in capacity_cases])
+def test_parse_capacity_value(name, value, expected):
+    assert numeric_fields.parse_capacity_value(value) == expected
+
+
+@pytest.mark.parametrize("name, value, expected", generic_cases, ids=[c[0] for c in generic_cases])
+def test_parse_numeric_value(name, value, expected):
+    assert numeric_fields.parse_numeric_value(value) == expected
+
+
+def test_numeric_fields_of_monitor():
+    fields = numeric_fields.numeric_fields({'resolution': "2560x1440", 'size': "27,5\"", 'refresh_rate': "165 Hz"})
+    assert fields == {'resolution_width': 2560, 'resolution_height': 1440, 'size_in': 27.5, 'refresh_hz': 165}
+
+
+def test_numeric_fields_of_laptop():
+    fields = numeric_fields.numeric_fields({'ram': "16 GB", 'storage': "512HB SSD", 'cpu': "i5"})
+    assert fields == {'ram_gb': 16, 'storage_gb': None}
@@ -0,0 +1,30 @@
+from storage import FolderStorage, SqliteStorage
+import pytest
+from price_history import PriceHistory
+
+
+@pytest.mark.parametrize("backend", [FolderStorage, SqliteStorage])
+def test_incremental_update_reads_only_new_snapshots(tmp_path, backend):
+    tmp_path = tmp_path / "laptops"
+    tmp_path.mkdir()
+    storage = backend(str(tmp_path), "[Test]")
+    storage.load()
+    for timestamp, price in [("2024-01-01_00-00-00", "100.00"), ("2024-01-02_00-00-00", "100.00"), ("2024-01-03_00-00-00", "90.00")]:
+        storage.add_snapshot(1, timestamp, {'price': price})
+    storage.set_last_seen(1, "2024-01-03_00-00-00")
+
+    history = PriceHistory(str(tmp_path), "[Test]")
+    history.load()
+    assert history.update(storage) == 3
+    history.save()
+
+    storage.add_snapshot(1, "2024-01-04_00-00-00", {'price': "80.00"})
+    storage.set_last_seen(1, "2024-01-04_00-00-00")
+    reloaded = PriceHistory(str(tmp_path), "[Test]")
+    reloaded.load()
+    assert reloaded.update(storage) == 1
+
+    entry = reloaded.products['1']
+    assert entry['first_seen'] == "2024-01-01_00-00-00"
+    assert entry['last_seen'] == "2024-01-04_00-00-00"
+    assert entry['prices'] == [["2024-01-01_00-00-00", 100.0], ["2024-01-03_00-00-00", 90.0], ["2024-01-04_00-00-00", 80.0]]
@@ -0,0 +1,29 @@
+import time
+from banknote_client import RateLimiter
+
+
+def test_burst_is_free_then_rate_applies():
+    limiter = RateLimiter(requests_per_minute=600, burst=2) # 10 per second
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+    waited = limiter.acquire()
+    assert 0.05 < waited <= 0.1
+
+
+def test_slow_down_halves_rate_and_pauses():
+    limiter = RateLimiter(requests_per_minute=600)
+    limiter.slow_down(retry_after=0.2)
+    assert limiter.current_rate == limiter.max_rate / 2
+    started_at = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started_at >= 0.2
+
+
+def test_slow_down_has_a_floor_and_speed_up_recovers():
+    limiter = RateLimiter(requests_per_minute=600)
+    for _ in range(10):
+        limiter.slow_down()
+    assert limiter.current_rate == limiter.max_rate * RateLimiter.MIN_RATE_FRACTION
+    for _ in range(20):
+        limiter.speed_up()
+    assert limiter.current_rate == limiter.max_rate
@@ -0,0 +1,50 @@
+import time
+import json
+import html_extract
+from banknote_client import BanknoteClient
+from replay import ReplayServer, FixtureRecorder, FixtureCatalogue
+
+SYNTHETIC_PRODUCTS = 150
+
+
+def test_client_rewrites_shop_urls_to_synthetic_catalogue(synthetic_server):
+    client = BanknoteClient(base_url=synthetic_server.base_url)
+    first_page = client.get(f"{BanknoteClient.SHOP_URL}/lv/filter-products", params={'categories_id': 8, 'per_page': 120, 'page': 1}).json()
+    assert first_page['last_page'] == 2
+    assert first_page['total'] == 150
+
+    item = first_page['data'][0]
+    product_page = client.get(item['url'], allow_redirects=False)
+    properties = json.loads(html_extract.extract_product_data(product_page.text))
+    assert properties['id'] == item['id']
+    assert properties['price'] == item['price']
+
+
+def test_recorded_responses_replay_identically(synthetic_server, tmp_path):
+    recording_client = BanknoteClient(base_url=synthetic_server.base_url, recorder=FixtureRecorder(str(tmp_path)))
+    params = {'categories_id': 9, 'per_page': 120, 'page': 2}
+    recorded = recording_client.get(f"{BanknoteClient.SHOP_URL}/lv/filter-products", params=params)
+
+    replay_server = ReplayServer(FixtureCatalogue(str(tmp_path)))
+    replay_server.start()
+    try:
+        replaying_client = BanknoteClient(base_url=replay_server.base_url)
+        replayed = replaying_client.get(f"{BanknoteClient.SHOP_URL}/lv/filter-products", params=params)
+        assert replayed.status_code == 200
+        assert replayed.json() == recorded.json()
+        assert replaying_client.get(f"{BanknoteClient.SHOP_URL}/lv/p/1").status_code == 404
+    finally:
+        replay_server.shutdown()
+        replay_server.server_close()
+
+
+def test_get_many_fetches_a_bounded_window_ahead_and_stops_with_the_consumer(synthetic_server):
+    client = BanknoteClient(base_url=synthetic_server.base_url, workers=2)
+    fetched = []
+    client.get = lambda url, **kwargs: fetched.append(url) or url
+
+    responses = client.get_many([f"/lv/p/{i}" for i in range(100)])
+    assert [next(responses) for _ in range(3)] == ["/lv/p/0", "/lv/p/1", "/lv/p/2"]
+    responses.close()
+    time.sleep(0.05)
+    assert len(fetched) <= 3 + client.workers * BanknoteClient.IN_FLIGHT_PER_WORKER
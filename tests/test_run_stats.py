@@ -0,0 +1,38 @@
+import json
+import pytest
+from run_stats import RunStats
+
+
+def test_run_saves_phases_counters_and_cache_hit_rate(tmp_path):
+    stats = RunStats(str(tmp_path), "[Test]")
+    with stats.run("test run"):
+        with stats.phase('lookup'):
+            stats.count('products_unchanged', 3)
+            stats.count('products_to_download')
+        for _ in range(2):
+            with stats.timer('parse'):
+                pass
+
+    runs = json.loads((tmp_path / RunStats.FILE_NAME).read_text())['runs']
+    assert len(runs) == 1
+    assert runs[0]['succeeded']
+    assert set(runs[0]['phases']) == {'lookup', 'parse'}
+    assert runs[0]['counters'] == {'products_unchanged': 3, 'products_to_download': 1}
+    assert runs[0]['cache_hit_rate'] == 0.75
+
+
+def test_failed_runs_are_recorded_and_old_runs_dropped(tmp_path, monkeypatch):
+    monkeypatch.setattr(RunStats, 'MAX_RUNS', 2)
+    stats = RunStats(str(tmp_path), "[Test]")
+    for _ in range(2):
+        with stats.run("test run"):
+            stats.count('requests')
+    with pytest.raises(RuntimeError):
+        with stats.run("test run"):
+            raise RuntimeError("network is down")
+
+    runs = stats.load_runs()
+    assert [run['succeeded'] for run in runs] == [True, False]
+    # counters don't leak between runs
+    assert runs[1]['counters'] == {}
+    assert runs[1]['cache_hit_rate'] is None
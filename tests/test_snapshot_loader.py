@@ -0,0 +1,41 @@
+import os
+import pytest
+import snapshot_loader
+from storage import FolderStorage, SqliteStorage
+
+
+@pytest.fixture(params=[FolderStorage, SqliteStorage])
+def storage(request, tmp_path):
+    storage = request.param(str(tmp_path / "laptops"), "[Test]")
+    os.makedirs(storage.inventory_path, exist_ok=True)
+    storage.load()
+    yield storage
+    storage.close()
+
+
+def properties(id):
+    return {
+        'id': id,
+        'price': f"{100 + id}.00",
+        'description_f': [{'title': "RAM", 'value': f"{id % 4 * 8 + 8} GB"}],
+        'erp_images': [{'path': f"products/{id}/0.jpg"}],
+    }
+
+
+def test_process_pool_loads_the_same_details(storage, monkeypatch):
+    for id in range(40):
+        storage.add_snapshot(id, "2024-01-01_00-00-00", properties(id))
+    storage.commit()
+    entries = [(id, storage.snapshot_source(id, "2024-01-01_00-00-00"), "2024-01-01T00:00:00+00:00") for id in range(40)]
+
+    serial = snapshot_loader.load_details_many("laptops", entries)
+    monkeypatch.setattr(snapshot_loader, 'MIN_PARALLEL_BATCH', 10)
+    parallel = snapshot_loader.load_details_many("laptops", entries, workers=2)
+
+    assert parallel == serial
+    assert serial[5] == {
+        'price': "105.00",
+        'specs': {'ram': "16 GB", 'ram_gb': 16.0},
+        'images': ["https://veikals.banknote.lv/storage/products/5/0.jpg"],
+        'timestamp': "2024-01-01T00:00:00+00:00",
+    }
@@ -0,0 +1,139 @@
+import os
+import json
+import sqlite3
+import pytest
+from product import Product
+from atomic_file import UMASK
+from storage import FolderStorage, SqliteStorage, import_folder_storage
+
+
+@pytest.fixture(params=[FolderStorage, SqliteStorage])
+def storage(request, tmp_path):
+    storage = request.param(str(tmp_path / "laptops"), "[Test]")
+    os.makedirs(storage.inventory_path, exist_ok=True)
+    storage.load()
+    yield storage
+    storage.close()
+
+
+def test_snapshot_insert_and_latest_lookup(storage):
+    assert storage.snapshot_timestamps(1) == []
+    storage.add_snapshot(1, "2024-01-02_00-00-00", {'price': "90.00"})
+    storage.add_snapshot(1, "2024-01-01_00-00-00", {'price': "100.00"})
+
+    assert storage.snapshot_timestamps(1) == ["2024-01-01_00-00-00", "2024-01-02_00-00-00"]
+    assert storage.load_snapshot(1, "2024-01-02_00-00-00") == {'price': "90.00"}
+
+
+def test_duplicates_keep_oldest(storage):
+    storage.add_snapshot(1, "2024-01-01_00-00-00", {'price': "100.00"})
+    storage.add_snapshot(1, "2024-01-02_00-00-00", {'price': "100.00"})
+
+    assert storage.delete_duplicate_snapshots(1) == ["2024-01-02_00-00-00"]
+    assert storage.snapshot_timestamps(1) == ["2024-01-01_00-00-00"]
+
+
+def test_last_seen_and_removal(storage):
+    storage.add_snapshot(1, "2024-01-01_00-00-00", {'price': "100.00"})
+    storage.set_last_seen(1, "2024-01-05_00-00-00")
+    storage.set_last_seen(2, None) # seen in the index, no snapshot yet
+    storage.snapshot_timestamps(3) # looked up only
+    storage.commit()
+
+    assert storage.last_seen(1) == "2024-01-05_00-00-00"
+    assert storage.last_seen(2) is None
+    assert storage.last_seen(3) is None
+    assert sorted(storage.product_ids()) == ["1", "2"]
+    assert len(storage) == 2
+
+    assert storage.remove_product(1)
+    assert storage.product_ids() == ["2"]
+
+
+def test_unchanged_properties_are_not_stored_again(storage):
+    product = Product("laptops", 1, storage)
+    product.save_snapshot({'price': "100.00", 'title': "Laptop"})
+    location = product.latest_location
+
+    # same data in a different key order is the same content
+    assert product.save_snapshot({'title': "Laptop", 'price': "100.00"}) == location
+    assert len(product.snapshot_timestamps) == 1
+
+
+def test_legacy_file_of_the_configured_inventory_is_migrated(storage):
+    legacy_path = os.path.join(storage.inventory_path, "1.json")
+    with open(legacy_path, "w", encoding='utf-8') as legacy_file:
+        json.dump({'price': "100.00"}, legacy_file)
+
+    product = Product("laptops", 1, storage)
+    assert not os.path.exists(legacy_path)
+    assert len(product.snapshot_timestamps) == 1
+    assert product.load_latest_snapshot() == {'price': "100.00"}
+
+def test_identical_contents_share_a_blob(storage):
+    storage.add_snapshot(1, "2024-01-01_00-00-00", {'price': "100.00"})
+    storage.add_snapshot(2, "2024-01-01_00-00-00", {'price': "100.00"})
+    assert storage.snapshot_hash(1, "2024-01-01_00-00-00") == storage.snapshot_hash(2, "2024-01-01_00-00-00")
+
+    storage.remove_product(1)
+    assert storage.prune_blobs() == 0
+    storage.remove_product(2)
+    assert storage.prune_blobs() == 1
+
+
+def test_folder_blobs_are_shared_by_categories(tmp_path):
+    laptops = FolderStorage(str(tmp_path / "laptops"), "[Test]")
+    desktops = FolderStorage(str(tmp_path / "desktops"), "[Test]")
+    laptops.add_snapshot(1, "2024-01-01_00-00-00", {'price': "100.00"})
+    desktops.add_snapshot(1, "2024-01-01_00-00-00", {'price': "100.00"})
+
+    laptop_file = os.stat(laptops.snapshot_location(1, "2024-01-01_00-00-00"))
+    desktop_file = os.stat(desktops.snapshot_location(1, "2024-01-01_00-00-00"))
+    assert laptop_file.st_ino == desktop_file.st_ino
+    assert laptop_file.st_nlink == 3 # blob and two snapshot files
+    assert laptop_file.st_mode & 0o777 == 0o666 & ~UMASK # not only readable by the scraper user
+
+
+def test_folder_hashes_snapshots_written_without_one(tmp_path):
+    product_path = tmp_path / "laptops" / "products" / "1"
+    product_path.mkdir(parents=True)
+    (product_path / "2024-01-01_00-00-00.json").write_text(json.dumps({'price': "100.00"}, indent=4))
+    (product_path / "2024-01-02_00-00-00.json").write_text(json.dumps({'price': "100.00"}))
+    storage = FolderStorage(str(tmp_path / "laptops"), "[Test]")
+    storage.load()
+    for snapshot in storage.manifest.snapshots(1):
+        del snapshot['hash'] # as written by an older version
+
+    assert storage.snapshot_hash(1, "2024-01-01_00-00-00") == Product.content_hash({'price': "100.00"})
+    assert storage.delete_duplicate_snapshots(1) == ["2024-01-02_00-00-00"]
+
+
+def test_sqlite_moves_inline_snapshots_to_blobs(tmp_path):
+    connection = sqlite3.connect(tmp_path / SqliteStorage.FILE_NAME)
+    connection.execute("CREATE TABLE products (id TEXT PRIMARY KEY, last_seen TEXT)")
+    connection.execute("CREATE TABLE snapshots (product_id TEXT NOT NULL, timestamp TEXT NOT NULL, md5 TEXT NOT NULL, data TEXT NOT NULL, PRIMARY KEY (product_id, timestamp))")
+    connection.execute("INSERT INTO products VALUES ('1', '2024-01-02_00-00-00')")
+    connection.execute("INSERT INTO snapshots VALUES ('1', '2024-01-01_00-00-00', '', '{\"price\": \"1.00\"}')")
+    connection.commit()
+    connection.close()
+
+    storage = SqliteStorage(str(tmp_path), "[Test]")
+    storage.load()
+    assert storage.load_snapshot(1, "2024-01-01_00-00-00") == {'price': "1.00"}
+    assert storage.snapshot_hash(1, "2024-01-01_00-00-00") == Product.content_hash({'price': "1.00"})
+    storage.close()
+
+
+def test_import_folder_storage_into_sqlite(tmp_path):
+    folder_storage = FolderStorage(str(tmp_path / "laptops"), "[Test]")
+    folder_storage.load()
+    folder_storage.add_snapshot(7, "2024-01-01_00-00-00", {'price': "1.00"})
+    folder_storage.set_last_seen(7, "2024-01-02_00-00-00")
+    folder_storage.commit()
+
+    sqlite_storage = SqliteStorage(str(tmp_path / "laptops"), "[Test]")
+    sqlite_storage.load()
+    assert import_folder_storage(str(tmp_path / "laptops"), sqlite_storage, "[Test]") == (1, 1)
+    assert sqlite_storage.load_snapshot(7, "2024-01-01_00-00-00") == {'price': "1.00"}
+    assert sqlite_storage.last_seen(7) == "2024-01-02_00-00-00"
+    sqlite_storage.close()